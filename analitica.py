@@ -0,0 +1,230 @@
+# ================================================
+# EduTrack - analitica.py
+# Analítica vectorizada de calificaciones y detección de riesgo
+# ================================================
+
+import io
+import os
+
+import numpy as np
+
+from cache import CacheTTL
+from database import get_db_cursor, get_notas_collection
+
+CALIFICACION_APROBATORIA = 70.0
+TIPOS_NOTA = ('performance', 'attendance', 'behavior')
+UMBRAL_RIESGO = 0.5
+
+# Pesos del puntaje de riesgo (suman 1)
+PESOS_RIESGO = {
+    'promedio': 0.40,
+    'reprobadas': 0.20,
+    'tendencia': 0.10,
+    'asistencia': 0.20,
+    'comportamiento': 0.10
+}
+
+ANALITICA_CACHE_TTL = float(os.getenv('ANALITICA_CACHE_TTL', '600'))
+_cache = CacheTTL(max_entradas=16, ttl=ANALITICA_CACHE_TTL)
+
+
+# ================================================
+# CARGA COLUMNAR
+# ================================================
+def cargar_calificaciones(periodo):
+    """
+    Cargar las calificaciones del periodo con COPY como arreglos columnares.
+    Las calificaciones sin capturar quedan como NaN; el promedio es la
+    columna generada de calificaciones (NaN mientras no se puede calcular).
+    """
+    with get_db_cursor(commit=False) as cursor:
+        consulta = cursor.mogrify(
+            """SELECT i.alumno_id, i.grupo_id, g.materia_id,
+                      COALESCE(c.parcial1::float8, 'NaN'),
+                      COALESCE(c.parcial2::float8, 'NaN'),
+                      COALESCE(c.final::float8, 'NaN'),
+                      COALESCE(c.promedio::float8, 'NaN')
+               FROM inscripciones i
+               JOIN grupos g ON i.grupo_id = g.id
+               LEFT JOIN calificaciones c ON c.inscripcion_id = i.id
+               WHERE g.periodo = %s AND i.estado <> 'baja'""",
+            (periodo,)
+        ).decode('utf-8')
+        buffer = io.StringIO()
+        cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv)", buffer)
+
+    buffer.seek(0)
+    if not buffer.getvalue():
+        datos = np.empty((0, 7), dtype=np.float64)
+    else:
+        datos = np.loadtxt(buffer, delimiter=',', dtype=np.float64, ndmin=2)
+
+    return {
+        'alumno_id': datos[:, 0].astype(np.int64),
+        'grupo_id': datos[:, 1].astype(np.int64),
+        'materia_id': datos[:, 2].astype(np.int64),
+        'calificaciones': datos[:, 3:6],
+        'promedio': datos[:, 6]
+    }
+
+
+def contar_notas(grupo_ids):
+    """
+    Conteo de notas por alumno y tipo, agregado en MongoDB.
+    Retorna (alumno_id, tipo_idx, cantidad) como arreglos.
+    """
+    notas = get_notas_collection()
+    pipeline = [
+        {'$match': {'group_id': {'$in': [int(g) for g in grupo_ids]},
+                    'type': {'$in': list(TIPOS_NOTA)}}},
+        {'$group': {'_id': {'alumno': '$student_id', 'tipo': '$type'},
+                    'cantidad': {'$sum': 1}}}
+    ]
+    resultados = list(notas.aggregate(pipeline))
+    return (
+        np.array([r['_id']['alumno'] for r in resultados], dtype=np.int64),
+        np.array([TIPOS_NOTA.index(r['_id']['tipo']) for r in resultados], dtype=np.int64),
+        np.array([r['cantidad'] for r in resultados], dtype=np.int64)
+    )
+
+
+# ================================================
+# CÁLCULO VECTORIZADO
+# ================================================
+def _promedio_seguro(suma, cantidad):
+    """suma / cantidad con NaN donde cantidad es 0 (sin advertencias)"""
+    resultado = np.full(suma.shape, np.nan)
+    np.divide(suma, cantidad, out=resultado, where=cantidad > 0)
+    return resultado
+
+
+def _agregar_por(indices, n, promedio_fila):
+    """Cantidad, media, desviación y tasa de aprobación por grupo de índices"""
+    valido = ~np.isnan(promedio_fila)
+    valores = np.where(valido, promedio_fila, 0.0)
+    cantidad = np.bincount(indices, weights=valido, minlength=n)
+    suma = np.bincount(indices, weights=valores, minlength=n)
+    suma_cuadrados = np.bincount(indices, weights=valores * valores, minlength=n)
+    aprobados = np.bincount(indices, weights=valido & (promedio_fila >= CALIFICACION_APROBATORIA),
+                            minlength=n)
+
+    media = _promedio_seguro(suma, cantidad)
+    varianza = _promedio_seguro(suma_cuadrados, cantidad) - media * media
+    return {
+        'inscripciones': np.bincount(indices, minlength=n),
+        'con_promedio': cantidad.astype(np.int64),
+        'media': media,
+        'desviacion': np.sqrt(np.clip(varianza, 0, None)),
+        'tasa_aprobacion': _promedio_seguro(aprobados, cantidad)
+    }
+
+
+def calcular_indicadores(datos, notas=None):
+    """
+    Estadísticas por alumno, grupo y materia, y puntaje de riesgo por alumno.
+    `datos` es el resultado de cargar_calificaciones(); `notas` el de
+    contar_notas(). Todo el cálculo es vectorizado (sin ciclos por fila).
+    """
+    calificaciones = datos['calificaciones']
+    capturadas = ~np.isnan(calificaciones)
+
+    # Por inscripción
+    promedio_fila = datos['promedio']
+    reprobadas_fila = (capturadas & (calificaciones < CALIFICACION_APROBATORIA)).sum(axis=1)
+    tendencia_fila = calificaciones[:, 1] - calificaciones[:, 0]
+
+    # Por alumno
+    alumnos, idx_alumno = np.unique(datos['alumno_id'], return_inverse=True)
+    n_alumnos = len(alumnos)
+    por_alumno = _agregar_por(idx_alumno, n_alumnos, promedio_fila)
+    reprobadas = np.bincount(idx_alumno, weights=reprobadas_fila, minlength=n_alumnos)
+    registradas = np.bincount(idx_alumno, weights=capturadas.sum(axis=1), minlength=n_alumnos)
+    tendencia_valida = ~np.isnan(tendencia_fila)
+    tendencia = _promedio_seguro(
+        np.bincount(idx_alumno, weights=np.where(tendencia_valida, tendencia_fila, 0.0),
+                    minlength=n_alumnos),
+        np.bincount(idx_alumno, weights=tendencia_valida, minlength=n_alumnos)
+    )
+
+    conteo_notas = np.zeros((n_alumnos, len(TIPOS_NOTA)), dtype=np.int64)
+    if notas is not None and len(notas[0]) and n_alumnos:
+        nota_alumno, nota_tipo, nota_cantidad = notas
+        posicion = np.minimum(np.searchsorted(alumnos, nota_alumno), n_alumnos - 1)
+        encontrado = alumnos[posicion] == nota_alumno
+        np.add.at(conteo_notas, (posicion[encontrado], nota_tipo[encontrado]),
+                  nota_cantidad[encontrado])
+
+    # Puntaje de riesgo en [0, 1]
+    riesgo_promedio = np.nan_to_num(
+        np.clip((CALIFICACION_APROBATORIA - por_alumno['media']) / 30.0, 0, 1), nan=0.0)
+    riesgo_reprobadas = _promedio_seguro(reprobadas, registradas)
+    riesgo_reprobadas = np.nan_to_num(riesgo_reprobadas, nan=0.0)
+    riesgo_tendencia = np.nan_to_num(np.clip(-tendencia / 20.0, 0, 1), nan=0.0)
+    riesgo_asistencia = 1.0 - np.exp(-conteo_notas[:, TIPOS_NOTA.index('attendance')] / 3.0)
+    riesgo_comportamiento = 1.0 - np.exp(-conteo_notas[:, TIPOS_NOTA.index('behavior')] / 3.0)
+    riesgo = (PESOS_RIESGO['promedio'] * riesgo_promedio
+              + PESOS_RIESGO['reprobadas'] * riesgo_reprobadas
+              + PESOS_RIESGO['tendencia'] * riesgo_tendencia
+              + PESOS_RIESGO['asistencia'] * riesgo_asistencia
+              + PESOS_RIESGO['comportamiento'] * riesgo_comportamiento)
+
+    # Por grupo y por materia
+    grupos, idx_grupo = np.unique(datos['grupo_id'], return_inverse=True)
+    materias, idx_materia = np.unique(datos['materia_id'], return_inverse=True)
+
+    return {
+        'alumnos': {
+            'alumno_id': alumnos,
+            **por_alumno,
+            'reprobadas': reprobadas.astype(np.int64),
+            'tendencia': tendencia,
+            'notas': conteo_notas,
+            'riesgo': riesgo,
+            'en_riesgo': riesgo >= UMBRAL_RIESGO
+        },
+        'grupos': {'grupo_id': grupos, **_agregar_por(idx_grupo, len(grupos), promedio_fila)},
+        'materias': {'materia_id': materias,
+                     **_agregar_por(idx_materia, len(materias), promedio_fila)}
+    }
+
+
+# ================================================
+# API
+# ================================================
+def analizar_periodo(periodo):
+    """Indicadores del periodo, en caché por periodo"""
+    def calcular():
+        datos = cargar_calificaciones(periodo)
+        notas = contar_notas(np.unique(datos['grupo_id']).tolist())
+        return calcular_indicadores(datos, notas)
+    return _cache.obtener_o_calcular(periodo, calcular)
+
+
+def invalidar_periodo(periodo=None):
+    """Descartar los indicadores en caché (de un periodo o de todos)"""
+    if periodo is None:
+        _cache.limpiar()
+    else:
+        _cache.invalidar(periodo)
+
+
+def _numero(valor):
+    return None if np.isnan(valor) else round(float(valor), 2)
+
+
+def alumnos_en_riesgo(periodo, limite=50):
+    """Alumnos con mayor puntaje de riesgo del periodo"""
+    alumnos = analizar_periodo(periodo)['alumnos']
+    orden = np.argsort(-alumnos['riesgo'])[:limite]
+    orden = orden[alumnos['en_riesgo'][orden]]
+    return [
+        {
+            'alumno_id': int(alumnos['alumno_id'][i]),
+            'riesgo': round(float(alumnos['riesgo'][i]), 3),
+            'promedio': _numero(alumnos['media'][i]),
+            'reprobadas': int(alumnos['reprobadas'][i]),
+            'tendencia': _numero(alumnos['tendencia'][i]),
+            'notas': dict(zip(TIPOS_NOTA, alumnos['notas'][i].tolist()))
+        }
+        for i in orden
+    ]
@@ -2,28 +2,80 @@
 # EduTrack - app.py
 # ================================================
 
+import csv
+import io
+import logging
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import (Flask, render_template, request, redirect, url_for, flash, session, jsonify, g,
+                   Response, stream_with_context)
 from functools import wraps
 from datetime import datetime
-
-from database import get_db_cursor
+from pymongo.errors import PyMongoError
+
+import analitica
+import catalogos
+import database
+import instrumentacion
+import notificaciones
+from database import get_db_cursor, estadisticas_pool
+from estadisticas import EstadisticasDashboard
+from exportaciones import FORMATOS_EXPORTACION
 from models_auth import Usuario, Sesion
-from models_inscripciones import Materia, Grupo, Inscripcion
-from models_notas import NotaEstudiante
+from models_inscripciones import (Materia, Grupo, Inscripcion, Calificacion, INSCRIPCION_MAX_REINTENTOS,
+                                  INSCRIPCION_LOTE_MAXIMO, HISTORIAL_LIMITE_DEFAULT, GRUPOS_POR_PAGINA)
+from models_notas import NotaEstudiante, NOTAS_POR_PAGINA, NOTAS_IMPORTACION_MAXIMO
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+database.init_app(app)
+instrumentacion.init_app(app)
+
+# Si se define, /metrics exige "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
 
 # ================================================
 # DECORADORES
 # ================================================
+def usuario_actual():
+    """Usuario de la sesión, memorizado durante la petición"""
+    if 'usuario' not in g:
+        g.usuario = Usuario.obtener_por_id_cache(session['user_id'])
+    return g.usuario
+
+def sesion_valida():
+    """
+    Comprobar que el token de la sesión sigue vigente y es del usuario.
+    Retorna None si no se pudo comprobar (MongoDB no disponible).
+    """
+    if 'sesion_valida' not in g:
+        try:
+            g.sesion_valida = Sesion.validar_sesion(session.get('token')) == session.get('user_id')
+        except PyMongoError as e:
+            app.logger.warning('Session check failed: %s', e)
+            return None
+    return g.sesion_valida
+
+def rechazar_sesion():
+    """Redirección al login si la sesión no es válida o no se pudo comprobar; si no, None"""
+    valida = sesion_valida()
+    if valida:
+        return None
+    if valida is None:
+        flash('No se pudo verificar la sesión, intente de nuevo en unos momentos', 'danger')
+    else:
+        session.clear()
+        flash('Su sesión expiró, inicie sesión nuevamente', 'warning')
+    return redirect(url_for('login'))
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if 'user_id' not in session:
             flash('Debe iniciar sesión para acceder a esta página', 'warning')
             return redirect(url_for('login'))
+        rechazo = rechazar_sesion()
+        if rechazo:
+            return rechazo
         return f(*args, **kwargs)
     return decorated_function
 
@@ -34,9 +86,12 @@ def role_required(*roles):
             if 'user_id' not in session:
                 flash('Debe iniciar sesión', 'warning')
                 return redirect(url_for('login'))
+            rechazo = rechazar_sesion()
+            if rechazo:
+                return rechazo
             
-            user = Usuario.obtener_por_id(session['user_id'])
-            if not user or user['rol'] not in roles:
+            user = usuario_actual()
+            if not user or not user['activo'] or user['rol'] not in roles:
                 flash('No tiene permisos para acceder a esta página', 'danger')
                 return redirect(url_for('dashboard'))
             
@@ -91,27 +146,8 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    user = Usuario.obtener_por_id(session['user_id'])
-    
-    with get_db_cursor(commit=False) as cursor:
-        cursor.execute("SELECT COUNT(*) FROM materias")
-        total_materias = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM grupos")
-        total_grupos = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM alumnos")
-        total_alumnos = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM inscripciones WHERE estado = 'activa'")
-        inscripciones_activas = cursor.fetchone()[0]
-    
-    stats = {
-        'total_materias': total_materias,
-        'total_grupos': total_grupos,
-        'total_alumnos': total_alumnos,
-        'inscripciones_activas': inscripciones_activas
-    }
+    user = usuario_actual()
+    stats = EstadisticasDashboard.obtener()
     
     return render_template('dashboard.html', user=user, stats=stats)
 
@@ -121,8 +157,26 @@ def dashboard():
 @app.route('/grupos')
 @login_required
 def grupos():
-    grupos = Grupo.listar_disponibles()
-    return render_template('grupos.html', grupos=grupos)
+    filtros = {
+        'periodo': request.args.get('periodo') or None,
+        'estado': request.args.get('estado') or None
+    }
+    pagina = max(1, request.args.get('pagina', 1, type=int))
+    grupos = Grupo.listar_disponibles(
+        limite=GRUPOS_POR_PAGINA + 1,
+        desplazamiento=(pagina - 1) * GRUPOS_POR_PAGINA,
+        **filtros
+    )
+    hay_mas = len(grupos) > GRUPOS_POR_PAGINA
+    return render_template('grupos.html', grupos=grupos[:GRUPOS_POR_PAGINA],
+                         filtros=filtros, pagina=pagina, hay_mas=hay_mas)
+
+@app.route('/grupos/eventos')
+@login_required
+def grupos_eventos():
+    return Response(stream_with_context(notificaciones.flujo_sse()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/inscripcion', methods=['GET', 'POST'])
 @role_required('admin', 'coordinator')
@@ -130,16 +184,15 @@ def registrar_inscripcion():
     if request.method == 'POST':
         grupo_id = int(request.form.get('grupo_id'))
         alumno_id = int(request.form.get('alumno_id'))
-        usar_optimista = request.form.get('metodo_concurrencia') == 'optimista'
+        metodo = request.form.get('metodo_concurrencia')
         
-        if usar_optimista:
-            grupo = Grupo.obtener_por_id(grupo_id)
-            if grupo:
-                exito, mensaje, inscripcion_id = Inscripcion.inscribir_optimista(
-                    grupo_id, alumno_id, grupo['version']
-                )
-            else:
-                exito, mensaje, inscripcion_id = False, "Grupo no encontrado", None
+        if metodo == 'optimista':
+            exito, mensaje, inscripcion_id, reintentos = \
+                Inscripcion.inscribir_optimista_con_reintentos(grupo_id, alumno_id)
+            if reintentos:
+                app.logger.info('Inscripción optimista grupo=%s reintentos=%s', grupo_id, reintentos)
+        elif metodo == 'atomica':
+            exito, mensaje, inscripcion_id = Inscripcion.inscribir_atomica(grupo_id, alumno_id)
         else:
             exito, mensaje, inscripcion_id = Inscripcion.inscribir_pesimista(grupo_id, alumno_id)
         
@@ -149,19 +202,77 @@ def registrar_inscripcion():
         else:
             flash(mensaje, 'danger')
     
-    grupos = Grupo.listar_disponibles()
-    # Obtener alumnos
-    with get_db_cursor(commit=False) as cursor:
-        cursor.execute("SELECT id, matricula, nombre FROM alumnos ORDER BY nombre")
-        alumnos = [{'id': r[0], 'matricula': r[1], 'nombre': r[2]} for r in cursor.fetchall()]
+    grupos = Grupo.listar_disponibles_cache()
+    return render_template('registrar_inscripcion.html', grupos=grupos)
+
+@app.route('/api/inscripciones/lote', methods=['POST'])
+@role_required('admin', 'coordinator')
+def inscribir_lote():
+    datos = request.get_json(silent=True)
+    if not isinstance(datos, dict) or not isinstance(datos.get('pares'), list):
+        return jsonify({'error': 'Se esperaba {"pares": [{"alumno_id", "grupo_id"}, ...]}'}), 400
+    if len(datos['pares']) > INSCRIPCION_LOTE_MAXIMO:
+        return jsonify({'error': f'El máximo por lote es {INSCRIPCION_LOTE_MAXIMO} pares'}), 413
+    try:
+        pares = [(int(p['alumno_id']), int(p['grupo_id'])) for p in datos['pares']]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Cada par requiere alumno_id y grupo_id enteros'}), 400
     
-    return render_template('registrar_inscripcion.html', grupos=grupos, alumnos=alumnos)
+    resultados = Inscripcion.inscribir_lote(pares)
+    inscritos = sum(1 for r in resultados if r['exito'])
+    return jsonify({
+        'inscritos': inscritos,
+        'rechazados': len(resultados) - inscritos,
+        'resultados': resultados
+    })
+
+@app.route('/api/inscripciones/reintentos')
+@role_required('admin')
+def estadisticas_reintentos():
+    return jsonify({
+        'max_reintentos': INSCRIPCION_MAX_REINTENTOS,
+        **Inscripcion.estadisticas_reintentos()
+    })
 
 @app.route('/inscripciones')
 @login_required
 def inscripciones():
-    historial = Inscripcion.listar_historial()
-    return render_template('inscripciones.html', inscripciones=historial)
+    filtros = {
+        'periodo': request.args.get('periodo') or None,
+        'estado': request.args.get('estado') or None,
+        'grupo_id': request.args.get('grupo_id', type=int)
+    }
+    pagina = Inscripcion.listar_historial_pagina(
+        cursor=request.args.get('cursor'),
+        direccion=request.args.get('dir', 'siguiente'),
+        limite=request.args.get('limite', HISTORIAL_LIMITE_DEFAULT, type=int),
+        **filtros
+    )
+    grupos = Grupo.listar_disponibles_cache()
+    return render_template('inscripciones.html',
+                         inscripciones=pagina['inscripciones'],
+                         siguiente=pagina['siguiente'],
+                         anterior=pagina['anterior'],
+                         filtros=filtros,
+                         grupos=grupos)
+
+@app.route('/exportar/inscripciones.<formato>')
+@role_required('admin', 'coordinator')
+def exportar_inscripciones(formato):
+    if formato not in FORMATOS_EXPORTACION:
+        return jsonify({'error': 'Formato no soportado (csv, ndjson)'}), 404
+    
+    generador, mimetype = FORMATOS_EXPORTACION[formato]
+    filtros = {
+        'periodo': request.args.get('periodo') or None,
+        'estado': request.args.get('estado') or None,
+        'grupo_id': request.args.get('grupo_id', type=int)
+    }
+    return Response(
+        stream_with_context(generador(filtros)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=inscripciones.{formato}'}
+    )
 
 # ================================================
 # RUTAS DE NOTAS (MongoDB)
@@ -173,11 +284,43 @@ def notas_estudiantes():
     filtros = {}
     if group_id:
         filtros['group_id'] = int(group_id)
+    student_id = request.args.get('student_id', type=int)
+    if student_id:
+        filtros['student_id'] = student_id
+    for campo in ('desde', 'hasta'):
+        if request.args.get(campo):
+            try:
+                filtros[campo] = datetime.strptime(request.args[campo], '%Y-%m-%d')
+            except ValueError:
+                flash(f'Fecha inválida: {request.args[campo]}', 'warning')
     
-    notas = NotaEstudiante.listar(filtros)
-    grupos = Grupo.listar_disponibles()
+    texto = request.args.get('q', '').strip()
+    pagina = max(1, request.args.get('pagina', 1, type=int))
+    hay_mas = False
+    siguiente = anterior = None
+    if texto:
+        resultado = NotaEstudiante.buscar_por_texto(
+            texto, filtros,
+            saltar=(pagina - 1) * NOTAS_POR_PAGINA
+        )
+        notas = resultado['notas']
+        hay_mas = resultado['hay_mas']
+        if resultado['error']:
+            flash(resultado['error'], 'danger')
+    else:
+        resultado = NotaEstudiante.listar_pagina(
+            filtros,
+            cursor=request.args.get('cursor'),
+            direccion=request.args.get('dir', 'siguiente')
+        )
+        notas = resultado['notas']
+        siguiente = resultado['siguiente']
+        anterior = resultado['anterior']
+    grupos = Grupo.listar_disponibles_cache()
     
-    return render_template('notas.html', notas=notas, grupos=grupos)
+    return render_template('notas.html', notas=notas, grupos=grupos,
+                         texto=texto, pagina=pagina, hay_mas=hay_mas,
+                         siguiente=siguiente, anterior=anterior)
 
 @app.route('/notas/nueva', methods=['GET', 'POST'])
 @role_required('admin', 'coordinator', 'teacher')
@@ -193,13 +336,106 @@ def nueva_nota():
         flash('Nota creada exitosamente', 'success')
         return redirect(url_for('notas_estudiantes'))
     
-    # Obtener datos para el formulario
-    grupos = Grupo.listar_disponibles()
-    with get_db_cursor(commit=False) as cursor:
-        cursor.execute("SELECT id, matricula, nombre FROM alumnos ORDER BY nombre")
-        alumnos = [{'id': r[0], 'matricula': r[1], 'nombre': r[2]} for r in cursor.fetchall()]
+    grupos = Grupo.listar_disponibles_cache()
+    return render_template('nueva_nota.html', grupos=grupos)
+
+@app.route('/notas/tablero')
+@role_required('admin', 'coordinator')
+def tablero_notas():
+    periodo = request.args.get('periodo', '').strip()
+    tablero = NotaEstudiante.tablero_periodo(periodo) if periodo else None
+    return render_template('tablero_notas.html', periodo=periodo, tablero=tablero)
+
+@app.route('/api/notas/tablero')
+@role_required('admin', 'coordinator')
+def api_tablero_notas():
+    periodo = request.args.get('periodo')
+    if not periodo:
+        return jsonify({'error': 'Indique el periodo'}), 400
+    return jsonify(NotaEstudiante.tablero_periodo(periodo))
+
+COLUMNAS_IMPORTACION_NOTAS = ['student_id', 'group_id', 'type', 'comment', 'date']
+
+@app.route('/notas/importar', methods=['GET', 'POST'])
+@role_required('admin', 'coordinator', 'teacher')
+def importar_notas():
+    if request.method == 'POST':
+        if request.is_json:
+            datos = request.get_json(silent=True)
+            if not isinstance(datos, dict) or not isinstance(datos.get('notas', []), list):
+                return jsonify({'error': 'Se esperaba {"notas": [...]}'}), 400
+            filas = datos.get('notas', [])
+        else:
+            archivo = request.files.get('archivo')
+            if not archivo or not archivo.filename:
+                flash('Seleccione un archivo CSV', 'warning')
+                return redirect(url_for('importar_notas'))
+            # Valores del formulario para las columnas vacías del archivo
+            defaults = {
+                'group_id': request.form.get('group_id'),
+                'type': request.form.get('tipo')
+            }
+            lector = csv.DictReader(io.TextIOWrapper(archivo.stream, encoding='utf-8-sig'))
+            filas = []
+            try:
+                for fila in lector:
+                    for campo, valor in defaults.items():
+                        if valor and not (fila.get(campo) or '').strip():
+                            fila[campo] = valor
+                    filas.append(fila)
+                    if len(filas) > NOTAS_IMPORTACION_MAXIMO:
+                        break
+            except UnicodeDecodeError:
+                flash('El archivo debe estar codificado en UTF-8', 'danger')
+                return redirect(url_for('importar_notas'))
+            except csv.Error as e:
+                flash(f'El archivo no es un CSV válido: {e}', 'danger')
+                return redirect(url_for('importar_notas'))
+        
+        if len(filas) > NOTAS_IMPORTACION_MAXIMO:
+            mensaje = f'El máximo por importación es {NOTAS_IMPORTACION_MAXIMO} filas'
+            if request.is_json:
+                return jsonify({'error': mensaje}), 413
+            flash(mensaje, 'danger')
+            return redirect(url_for('importar_notas'))
+        
+        resultado = NotaEstudiante.crear_lote(filas, session['user_id'])
+        if request.is_json:
+            return jsonify(resultado)
+        
+        flash(f"{resultado['insertadas']} notas importadas", 'success')
+        for error in resultado['errores'][:20]:
+            flash(f"Fila {error['fila']}: {error['error']}", 'danger')
+        if len(resultado['errores']) > 20:
+            flash(f"... y {len(resultado['errores']) - 20} errores más", 'danger')
+        return redirect(url_for('notas_estudiantes'))
     
-    return render_template('nueva_nota.html', grupos=grupos, alumnos=alumnos)
+    grupos = Grupo.listar_disponibles_cache()
+    return render_template('importar_notas.html', grupos=grupos,
+                         columnas=COLUMNAS_IMPORTACION_NOTAS,
+                         maximo=NOTAS_IMPORTACION_MAXIMO)
+
+@app.route('/notas/importar/plantilla.csv')
+@role_required('admin', 'coordinator', 'teacher')
+def plantilla_importar_notas():
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS_IMPORTACION_NOTAS)
+    escritor.writerow([1, 1, 'attendance', 'Falta sin justificar', datetime.utcnow().date().isoformat()])
+    return Response(buffer.getvalue(), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=plantilla_notas.csv'})
+
+@app.route('/api/notas/seguimientos/lote', methods=['POST'])
+@role_required('admin', 'coordinator', 'teacher')
+def api_seguimientos_lote():
+    datos = request.get_json(silent=True)
+    seguimientos = datos.get('seguimientos') if isinstance(datos, dict) else None
+    if not isinstance(seguimientos, list):
+        return jsonify({'error': 'Se espera {"seguimientos": [{"nota_id", "texto"}, ...]}'}), 400
+    if len(seguimientos) > NOTAS_IMPORTACION_MAXIMO:
+        return jsonify({'error': f'El máximo por lote es {NOTAS_IMPORTACION_MAXIMO}'}), 413
+    
+    return jsonify(NotaEstudiante.agregar_seguimientos_lote(seguimientos, session['username']))
 
 # ================================================
 # RUTAS DE MATERIAS
@@ -267,24 +503,15 @@ def editar_materia(id):
 @app.route('/alumnos')
 @login_required
 def alumnos():
-    with get_db_cursor(commit=False) as cursor:
-        cursor.execute("""
-            SELECT id, matricula, nombre, email, carrera, semestre, fecha_creacion
-            FROM alumnos ORDER BY nombre
-        """)
-        alumnos_list = []
-        for row in cursor.fetchall():
-            alumnos_list.append({
-                'id': row[0],
-                'matricula': row[1],
-                'nombre': row[2],
-                'email': row[3],
-                'carrera': row[4],
-                'semestre': row[5],
-                'fecha_creacion': row[6]
-            })
+    return render_template('alumnos.html', alumnos=catalogos.alumnos())
 
-    return render_template('alumnos.html', alumnos=alumnos_list)
+@app.route('/api/alumnos/buscar')
+@role_required('admin', 'coordinator', 'teacher')
+def api_buscar_alumnos():
+    texto = request.args.get('q', '')
+    if len(texto.strip()) < 2:
+        return jsonify([])
+    return jsonify(catalogos.buscar_alumnos(texto[:100], limite=request.args.get('limite', 10, type=int)))
 
 @app.route('/alumnos/nuevo', methods=['GET', 'POST'])
 @role_required('admin', 'coordinator')
@@ -301,6 +528,8 @@ def nuevo_alumno():
                 request.form.get('carrera'),
                 int(request.form.get('semestre', 1))
             ))
+        EstadisticasDashboard.invalidar()
+        catalogos.invalidar('alumnos')
 
         flash('Alumno creado exitosamente', 'success')
         return redirect(url_for('alumnos'))
@@ -332,6 +561,16 @@ def nuevo_usuario():
 
     return render_template('nuevo_usuario.html')
 
+@app.route('/usuarios/<int:id>/actualizar', methods=['POST'])
+@role_required('admin')
+def actualizar_usuario(id):
+    if Usuario.actualizar_rol_estado(id, request.form.get('rol'),
+                                     request.form.get('activo') == 'on'):
+        flash('Usuario actualizado exitosamente', 'success')
+    else:
+        flash('Usuario no encontrado', 'danger')
+    return redirect(url_for('usuarios'))
+
 @app.route('/grupos/nuevo', methods=['GET', 'POST'])
 @role_required('admin', 'coordinator')
 def nuevo_grupo():
@@ -347,11 +586,7 @@ def nuevo_grupo():
 
     # Obtener materias y profesores para el formulario
     materias_list = Materia.listar_todas()
-    with get_db_cursor(commit=False) as cursor:
-        cursor.execute("SELECT id, nombre FROM profesores ORDER BY nombre")
-        profesores = [{'id': r[0], 'nombre': r[1]} for r in cursor.fetchall()]
-
-    return render_template('nuevo_grupo.html', materias=materias_list, profesores=profesores)
+    return render_template('nuevo_grupo.html', materias=materias_list, profesores=catalogos.profesores())
 
 # ================================================
 # RUTAS DE CALIFICACIONES
@@ -363,54 +598,86 @@ def calificaciones():
     grupo_id = request.args.get('grupo_id', type=int)
 
     # Obtener lista de grupos para el selector
-    grupos = Grupo.listar_disponibles()
+    grupos = Grupo.listar_disponibles_cache()
 
     calificaciones_list = []
+    resumen = None
 
     # Solo buscar calificaciones si se ha seleccionado un grupo
     if grupo_id:
-        with get_db_cursor(commit=False) as cursor:
-            cursor.execute("""
-                SELECT c.inscripcion_id, a.nombre, a.matricula, m.nombre as materia, 
-                       c.parcial1, c.parcial2, c.final, c.fecha_modificacion
-                FROM calificaciones c
-                JOIN inscripciones i ON c.inscripcion_id = i.id
-                JOIN alumnos a ON i.alumno_id = a.id
-                JOIN grupos g ON i.grupo_id = g.id
-                JOIN materias m ON g.materia_id = m.id
-                WHERE g.id = %s
-                ORDER BY a.nombre
-            """, (grupo_id,))
-
-            for row in cursor.fetchall():
-                # Calcular promedio si hay calificaciones
-                parcial1 = row[4]
-                parcial2 = row[5]
-                final = row[6]
-                promedio = None
-
-                if parcial1 is not None and parcial2 is not None and final is not None:
-                    promedio = (parcial1 + parcial2 + final) / 3
-                elif parcial1 is not None and parcial2 is not None:
-                    promedio = (parcial1 + parcial2) / 2
-
-                calificaciones_list.append({
-                    'inscripcion_id': row[0],
-                    'alumno': row[1],
-                    'matricula': row[2],
-                    'materia': row[3],
-                    'parcial1': parcial1,
-                    'parcial2': parcial2,
-                    'final': final,
-                    'fecha_modificacion': row[7],
-                    'promedio': promedio
-                })
+        calificaciones_list = Calificacion.listar_por_grupo(grupo_id)
+        resumen = Calificacion.estadisticas_grupo(grupo_id)
 
     return render_template('calificaciones.html',
                          calificaciones=calificaciones_list,
+                         resumen=resumen,
                          grupos=grupos,
                          grupo_id=grupo_id)
 
+@app.route('/api/grupos/estadisticas')
+@role_required('admin', 'coordinator', 'teacher')
+def api_estadisticas_grupos():
+    return jsonify(Calificacion.estadisticas_por_grupos(periodo=request.args.get('periodo') or None))
+
+@app.route('/api/analitica/riesgo')
+@role_required('admin', 'coordinator')
+def api_alumnos_en_riesgo():
+    periodo = request.args.get('periodo')
+    if not periodo:
+        return jsonify({'error': 'Indique el periodo'}), 400
+    return jsonify({
+        'periodo': periodo,
+        'alumnos': analitica.alumnos_en_riesgo(periodo, limite=request.args.get('limite', 50, type=int))
+    })
+
+@app.route('/api/grupos/<int:grupo_id>/estadisticas')
+@role_required('admin', 'coordinator', 'teacher')
+def api_estadisticas_grupo(grupo_id):
+    resumen = Calificacion.estadisticas_grupo(grupo_id)
+    if resumen is None:
+        return jsonify({'error': 'Grupo no encontrado'}), 404
+    return jsonify(resumen)
+
+@app.route('/calificaciones/grupo/<int:grupo_id>/lote', methods=['GET', 'POST'])
+@role_required('admin', 'coordinator', 'teacher')
+def calificaciones_lote(grupo_id):
+    if request.method == 'POST':
+        if request.is_json:
+            datos = request.get_json(silent=True)
+            if not isinstance(datos, dict) or not isinstance(datos.get('calificaciones', []), list):
+                return jsonify({'error': 'Se esperaba {"calificaciones": [...]}'}), 400
+            filas = datos.get('calificaciones', [])
+        else:
+            filas = [
+                {
+                    'inscripcion_id': inscripcion_id,
+                    'parcial1': request.form.get(f'parcial1_{inscripcion_id}'),
+                    'parcial2': request.form.get(f'parcial2_{inscripcion_id}'),
+                    'final': request.form.get(f'final_{inscripcion_id}')
+                }
+                for inscripcion_id in request.form.getlist('inscripcion_id')
+            ]
+        
+        resultado = Calificacion.actualizar_lote(grupo_id, filas)
+        if request.is_json:
+            return jsonify(resultado)
+        
+        flash(f"{resultado['actualizadas']} calificaciones actualizadas", 'success')
+        for error in resultado['errores']:
+            flash(f"Inscripción {error['inscripcion_id']}: {error['error']}", 'danger')
+        if resultado['errores']:
+            return redirect(url_for('calificaciones_lote', grupo_id=grupo_id))
+        return redirect(url_for('calificaciones', grupo_id=grupo_id))
+    
+    grupo = Grupo.obtener_por_id(grupo_id)
+    if not grupo:
+        flash('Grupo no encontrado', 'danger')
+        return redirect(url_for('calificaciones'))
+    
+    return render_template('calificaciones_lote.html',
+                         grupo=grupo,
+                         calificaciones=Calificacion.listar_por_grupo(grupo_id))
+
 @app.route('/calificaciones/editar/<int:id>', methods=['GET', 'POST'])
 @role_required('admin', 'coordinator', 'teacher')
 def editar_calificacion(id):
@@ -430,6 +697,7 @@ def editar_calificacion(id):
                 float(final) if final else None,
                 id
             ))
+        analitica.invalidar_periodo()
         flash('Calificación actualizada exitosamente', 'success')
         return redirect(url_for('calificaciones'))
 
@@ -461,8 +729,39 @@ def editar_calificacion(id):
             flash('Calificación no encontrada', 'danger')
             return redirect(url_for('calificaciones'))
 
+# ================================================
+# SALUD Y MÉTRICAS
+# ================================================
+@app.route('/salud')
+def salud():
+    listo, detalle = database.salud()
+    return jsonify({'estado': 'ok' if listo else 'degradado', **detalle}), 200 if listo else 503
+
+@app.route('/metrics')
+def metricas():
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        return Response('No autorizado\n', status=401, mimetype='text/plain')
+
+    pools = estadisticas_pool()
+    conexiones = {}
+    for nombre, datos in pools.items():
+        for estado in ('en_uso', 'disponibles', 'esperando'):
+            conexiones[(nombre, estado)] = datos[estado]
+    texto = instrumentacion.exportar(
+        instrumentacion.formatear_gauge(
+            'edutrack_db_pool_connections', 'Conexiones de cada pool PostgreSQL por estado',
+            ('pool', 'estado'), conexiones
+        ),
+        instrumentacion.formatear_gauge(
+            'edutrack_sse_subscribers', 'Navegadores conectados a /grupos/eventos',
+            (), {(): notificaciones.escucha_cupos.estadisticas()['suscriptores']}
+        )
+    )
+    return Response(texto, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 # ================================================
 # INICIO
 # ================================================
 if __name__ == '__main__':
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO'))
     app.run(debug=True, host='0.0.0.0', port=5000)
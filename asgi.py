@@ -0,0 +1,224 @@
+# ================================================
+# EduTrack - asgi.py
+# API JSON asíncrona (ASGI) sobre models_async
+# ================================================
+#
+# Atiende las operaciones de mayor tráfico del día de inscripciones sin
+# retener un hilo por petición. Autenticación con el mismo token de sesión
+# de MongoDB que usa la app Flask: "Authorization: Bearer <token>"
+# (se obtiene en POST /api/sesiones).
+#
+#   uvicorn asgi:app --workers 4
+
+import json
+import logging
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from urllib.parse import parse_qs
+
+import database_async
+from models_async import Grupo, Inscripcion, NotaEstudiante, Sesion, Usuario
+from models_inscripciones import GRUPOS_POR_PAGINA
+from models_notas import NOTAS_POR_PAGINA
+
+logger = logging.getLogger('edutrack.asgi')
+
+# Tamaño máximo del cuerpo JSON aceptado
+CUERPO_MAXIMO = 64 * 1024
+
+
+class ErrorHTTP(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+
+# ================================================
+# PETICIÓN Y RESPUESTA
+# ================================================
+def _serializar(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    raise TypeError(f"{type(valor).__name__} no es serializable")
+
+
+async def _responder(send, estado, datos):
+    cuerpo = json.dumps(datos, default=_serializar).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': estado,
+        'headers': [(b'content-type', b'application/json'),
+                    (b'content-length', str(len(cuerpo)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': cuerpo})
+
+
+async def _leer_json(receive):
+    cuerpo = b''
+    while True:
+        mensaje = await receive()
+        cuerpo += mensaje.get('body', b'')
+        if len(cuerpo) > CUERPO_MAXIMO:
+            raise ErrorHTTP(413, 'Cuerpo demasiado grande')
+        if not mensaje.get('more_body'):
+            break
+    try:
+        datos = json.loads(cuerpo or b'{}')
+    except ValueError:
+        raise ErrorHTTP(400, 'JSON inválido')
+    if not isinstance(datos, dict):
+        raise ErrorHTTP(400, 'Se esperaba un objeto JSON')
+    return datos
+
+
+def _entero(valor, campo):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorHTTP(400, f"'{campo}' debe ser un entero")
+
+
+async def _usuario(scope, *roles):
+    """Usuario del token Bearer; con `roles`, exige uno de ellos"""
+    encabezados = dict(scope['headers'])
+    autorizacion = encabezados.get(b'authorization', b'').decode('latin-1')
+    token = autorizacion[7:] if autorizacion.startswith('Bearer ') else None
+    usuario_id = await Sesion.validar_sesion(token)
+    if usuario_id is None:
+        raise ErrorHTTP(401, 'Sesión inválida o expirada')
+    usuario = await Usuario.obtener_por_id_cache(usuario_id)
+    if not usuario or not usuario['activo'] or (roles and usuario['rol'] not in roles):
+        raise ErrorHTTP(403, 'No tiene permisos para esta operación')
+    return usuario
+
+
+# ================================================
+# RUTAS
+# ================================================
+async def salud(scope, receive, args, query):
+    listo, detalle = await database_async.salud()
+    return (200 if listo else 503), {'estado': 'ok' if listo else 'degradado', **detalle}
+
+
+async def iniciar_sesion(scope, receive, args, query):
+    datos = await _leer_json(receive)
+    usuario = await Usuario.autenticar(str(datos.get('username', '')), str(datos.get('password', '')))
+    if usuario is None:
+        raise ErrorHTTP(401, 'Usuario o contraseña incorrectos')
+    return 201, {'token': await Sesion.crear_sesion(usuario['id']), 'usuario': usuario}
+
+
+async def cerrar_sesion(scope, receive, args, query):
+    await _usuario(scope)
+    autorizacion = dict(scope['headers']).get(b'authorization', b'').decode('latin-1')
+    await Sesion.eliminar_sesion(autorizacion[7:])
+    return 200, {'ok': True}
+
+
+async def listar_grupos(scope, receive, args, query):
+    await _usuario(scope)
+    pagina = max(1, _entero(query.get('pagina', 1), 'pagina'))
+    grupos = await Grupo.listar_disponibles(
+        periodo=query.get('periodo') or None,
+        estado=query.get('estado') or None,
+        limite=GRUPOS_POR_PAGINA + 1,
+        desplazamiento=(pagina - 1) * GRUPOS_POR_PAGINA
+    )
+    return 200, {'grupos': grupos[:GRUPOS_POR_PAGINA], 'hay_mas': len(grupos) > GRUPOS_POR_PAGINA}
+
+
+async def obtener_grupo(scope, receive, args, query):
+    await _usuario(scope)
+    grupo = await Grupo.obtener_por_id(int(args[0]))
+    if grupo is None:
+        raise ErrorHTTP(404, 'Grupo no encontrado')
+    return 200, grupo
+
+
+async def inscribir(scope, receive, args, query):
+    await _usuario(scope, 'admin', 'coordinator')
+    datos = await _leer_json(receive)
+    exito, mensaje, inscripcion_id = await Inscripcion.inscribir_atomica(
+        _entero(datos.get('grupo_id'), 'grupo_id'),
+        _entero(datos.get('alumno_id'), 'alumno_id')
+    )
+    return (201 if exito else 409), {'exito': exito, 'mensaje': mensaje,
+                                     'inscripcion_id': inscripcion_id}
+
+
+async def listar_notas(scope, receive, args, query):
+    await _usuario(scope)
+    filtros = {}
+    for campo in ('group_id', 'student_id'):
+        if query.get(campo):
+            filtros[campo] = _entero(query[campo], campo)
+    if query.get('type'):
+        filtros['type'] = query['type']
+    return 200, await NotaEstudiante.listar_pagina(
+        filtros,
+        cursor=query.get('cursor'),
+        direccion=query.get('dir', 'siguiente'),
+        limite=_entero(query.get('limite', NOTAS_POR_PAGINA), 'limite')
+    )
+
+
+RUTAS = [
+    ('GET', re.compile(r'^/salud$'), salud),
+    ('POST', re.compile(r'^/api/sesiones$'), iniciar_sesion),
+    ('DELETE', re.compile(r'^/api/sesiones$'), cerrar_sesion),
+    ('GET', re.compile(r'^/api/grupos$'), listar_grupos),
+    ('GET', re.compile(r'^/api/grupos/(\d+)$'), obtener_grupo),
+    ('POST', re.compile(r'^/api/inscripciones$'), inscribir),
+    ('GET', re.compile(r'^/api/notas$'), listar_notas),
+]
+
+
+# ================================================
+# APLICACIÓN ASGI
+# ================================================
+async def _ciclo_de_vida(receive, send):
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensaje['type'] == 'lifespan.shutdown':
+            await database_async.cerrar()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _ciclo_de_vida(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    query = {clave: valores[0] for clave, valores in
+             parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+    metodo_permitido = False
+    for metodo, patron, vista in RUTAS:
+        encontrada = patron.match(scope['path'])
+        if not encontrada:
+            continue
+        if metodo != scope['method']:
+            metodo_permitido = True
+            continue
+        try:
+            estado, datos = await vista(scope, receive, encontrada.groups(), query)
+        except ErrorHTTP as e:
+            estado, datos = e.estado, {'error': e.mensaje}
+        except Exception:
+            logger.exception("Error in %s %s", scope['method'], scope['path'])
+            estado, datos = 500, {'error': 'Error interno'}
+        await _responder(send, estado, datos)
+        return
+
+    if metodo_permitido:
+        await _responder(send, 405, {'error': 'Método no permitido'})
+    else:
+        await _responder(send, 404, {'error': 'No encontrado'})
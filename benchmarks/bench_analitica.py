@@ -0,0 +1,83 @@
+# ================================================
+# EduTrack - benchmarks/bench_analitica.py
+# Benchmark del cálculo vectorizado de analitica.py
+# ================================================
+#
+# Genera calificaciones sintéticas en memoria (sin base de datos) y mide
+# calcular_indicadores() para tamaños crecientes. Imprime JSON.
+#
+#   python benchmarks/bench_analitica.py --filas 10000 100000 1000000
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analitica import TIPOS_NOTA, calcular_indicadores
+
+
+def generar(filas, semilla):
+    """Datos con la misma forma que cargar_calificaciones() y contar_notas()"""
+    rng = np.random.default_rng(semilla)
+    alumnos = max(1, filas // 5)
+    grupos = max(1, filas // 40)
+    calificaciones = np.clip(rng.normal(75, 12, size=(filas, 3)), 0, 100).round(2)
+    # ~15 % de calificaciones sin capturar
+    calificaciones[rng.random((filas, 3)) < 0.15] = np.nan
+    grupo_id = rng.integers(1, grupos + 1, size=filas)
+    # Misma regla que la columna generada calificaciones.promedio
+    parcial1, parcial2, final = calificaciones.T
+    promedio = np.where(~np.isnan(final), (parcial1 + parcial2 + final) / 3,
+                        (parcial1 + parcial2) / 2).round(2)
+    datos = {
+        'alumno_id': rng.integers(1, alumnos + 1, size=filas),
+        'grupo_id': grupo_id,
+        'materia_id': grupo_id % 200 + 1,
+        'calificaciones': calificaciones,
+        'promedio': promedio
+    }
+    n_notas = filas // 2
+    notas = (
+        rng.integers(1, alumnos + 1, size=n_notas),
+        rng.integers(0, len(TIPOS_NOTA), size=n_notas),
+        rng.integers(1, 6, size=n_notas)
+    )
+    return datos, notas
+
+
+def medir(filas, repeticiones, semilla):
+    datos, notas = generar(filas, semilla)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = calcular_indicadores(datos, notas)
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'filas': filas,
+        'alumnos': int(len(resultado['alumnos']['alumno_id'])),
+        'grupos': int(len(resultado['grupos']['grupo_id'])),
+        'en_riesgo': int(resultado['alumnos']['en_riesgo'].sum()),
+        'mejor_s': round(min(tiempos), 4),
+        'mediana_s': round(float(np.median(tiempos)), 4),
+        'filas_por_s': int(filas / min(tiempos))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de analitica.calcular_indicadores')
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    resultados = [medir(filas, args.repeticiones, args.semilla) for filas in args.filas]
+    print(json.dumps({'benchmark': 'analitica', 'resultados': resultados}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
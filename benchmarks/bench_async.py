@@ -0,0 +1,252 @@
+# ================================================
+# EduTrack - benchmarks/bench_async.py
+# Peticiones por segundo: modelos síncronos (hilos) vs models_async (asyncio)
+# ================================================
+#
+# Ejecuta la misma "petición" con ambos stacks y el mismo presupuesto de
+# conexiones a PostgreSQL (--conexiones), a varios niveles de concurrencia:
+#
+#   sync:  N hilos llamando a models_auth / models_inscripciones / models_notas
+#   async: N tareas en un event loop llamando a models_async
+#
+# Escenarios:
+#   lectura      validar sesión + Grupo.obtener_por_id + NotaEstudiante.listar_pagina
+#   inscripcion  Inscripcion.inscribir_atomica sobre grupos temporales
+#
+#   python benchmarks/bench_async.py --concurrencia 16 64 256 --peticiones 5000
+#   python benchmarks/bench_async.py --escenario inscripcion --conexiones 10
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+MODOS = ('sync', 'async')
+ESCENARIOS = ('lectura', 'inscripcion')
+
+
+# ================================================
+# DATOS
+# ================================================
+def preparar_lectura(args, rng):
+    """Grupos existentes (con repetición, como tráfico real) y un token de sesión"""
+    from database import get_db_cursor
+    from models_auth import Sesion
+
+    with get_db_cursor(commit=False) as cursor:
+        cursor.execute("SELECT id FROM grupos ORDER BY random() LIMIT 200")
+        grupos = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT id FROM usuarios WHERE activo ORDER BY id LIMIT 1")
+        usuario = cursor.fetchone()
+    if not grupos or usuario is None:
+        sys.exit("✗ Se necesitan grupos y un usuario activo (python generar_datos.py)")
+
+    token = Sesion.crear_sesion(usuario[0], duracion_horas=1)
+    tareas = [int(g) for g in rng.choice(grupos, size=args.peticiones)]
+    return {'token': token, 'tareas': {modo: tareas for modo in args.modos}}
+
+
+def preparar_inscripcion(args, rng):
+    """Grupos y alumnos temporales (los de bench_inscripciones.py), un juego por stack"""
+    from bench_inscripciones import crear_datos
+
+    datos = argparse.Namespace(modos=list(args.modos), alumnos=args.alumnos,
+                               grupos=args.grupos, cupo=args.cupo)
+    materia_id, alumnos, grupos = crear_datos(datos, uuid.uuid4().hex)
+    tareas = {}
+    for modo in args.modos:
+        pares = [(grupo_id, alumno_id) for alumno_id in alumnos for grupo_id in grupos[modo]]
+        random.Random(args.semilla).shuffle(pares)
+        tareas[modo] = pares[:args.peticiones]
+    return {'materia_id': materia_id, 'alumnos': alumnos, 'grupos': grupos, 'tareas': tareas}
+
+
+def limpiar(escenario, datos):
+    if escenario == 'lectura':
+        from models_auth import Sesion
+        Sesion.eliminar_sesion(datos['token'])
+    else:
+        from bench_inscripciones import borrar_datos
+        borrar_datos(datos['materia_id'], datos['alumnos'])
+
+
+# ================================================
+# PETICIONES
+# ================================================
+def peticion_sync(escenario, tarea, token):
+    from models_auth import Sesion
+    from models_inscripciones import Grupo, Inscripcion
+    from models_notas import NotaEstudiante
+
+    if escenario == 'inscripcion':
+        return Inscripcion.inscribir_atomica(*tarea)[0]
+    Sesion.validar_sesion(token)
+    Grupo.obtener_por_id(tarea)
+    NotaEstudiante.listar_pagina({'group_id': tarea})
+    return True
+
+
+async def peticion_async(escenario, tarea, token):
+    from models_async import Grupo, Inscripcion, NotaEstudiante, Sesion
+
+    if escenario == 'inscripcion':
+        return (await Inscripcion.inscribir_atomica(*tarea))[0]
+    await Sesion.validar_sesion(token)
+    await Grupo.obtener_por_id(tarea)
+    await NotaEstudiante.listar_pagina({'group_id': tarea})
+    return True
+
+
+# ================================================
+# EJECUCIÓN
+# ================================================
+def ejecutar_sync(escenario, tareas, token, concurrencia):
+    """N hilos consumen las tareas; retorna (latencias, errores, duracion)"""
+    pendientes = iter(tareas)
+    lock = threading.Lock()
+    latencias = []
+    errores = []
+    salida = threading.Barrier(concurrencia + 1)
+
+    def trabajador():
+        salida.wait()
+        while True:
+            with lock:
+                tarea = next(pendientes, None)
+            if tarea is None:
+                return
+            inicio = time.perf_counter()
+            try:
+                peticion_sync(escenario, tarea, token)
+            except Exception as e:
+                with lock:
+                    errores.append(f"{type(e).__name__}: {e}")
+            duracion = time.perf_counter() - inicio
+            with lock:
+                latencias.append(duracion)
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    salida.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    return latencias, errores, time.perf_counter() - inicio
+
+
+async def _ejecutar_async(escenario, tareas, token, concurrencia):
+    import database_async
+
+    # Abrir el pool antes de medir, como el primer uso en un worker ya caliente
+    await database_async.obtener_pool()
+    pendientes = iter(tareas)
+    latencias = []
+    errores = []
+
+    async def trabajador():
+        for tarea in pendientes:
+            inicio = time.perf_counter()
+            try:
+                await peticion_async(escenario, tarea, token)
+            except Exception as e:
+                errores.append(f"{type(e).__name__}: {e}")
+            latencias.append(time.perf_counter() - inicio)
+
+    try:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        return latencias, errores, time.perf_counter() - inicio
+    finally:
+        await database_async.cerrar()
+
+
+def ejecutar_async(escenario, tareas, token, concurrencia):
+    return asyncio.run(_ejecutar_async(escenario, tareas, token, concurrencia))
+
+
+def resumir(modo, concurrencia, latencias, errores, duracion):
+    percentiles = np.percentile(latencias, [50, 95, 99]) * 1000 if latencias else [0, 0, 0]
+    return {
+        'modo': modo,
+        'concurrencia': concurrencia,
+        'peticiones': len(latencias),
+        'duracion_s': round(duracion, 3),
+        'peticiones_por_s': round(len(latencias) / duracion, 1) if duracion else 0,
+        'latencia_ms': {
+            'p50': round(float(percentiles[0]), 2),
+            'p95': round(float(percentiles[1]), 2),
+            'p99': round(float(percentiles[2]), 2)
+        },
+        'errores': len(errores),
+        'errores_ejemplo': errores[:3]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de modelos síncronos vs asyncio')
+    parser.add_argument('--escenario', choices=ESCENARIOS, default='lectura')
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS))
+    parser.add_argument('--concurrencia', nargs='+', type=int, default=[16, 64, 256])
+    parser.add_argument('--peticiones', type=int, default=2000, help='Peticiones por medición')
+    parser.add_argument('--conexiones', type=int, default=20,
+                        help='Conexiones PostgreSQL por stack (mismo presupuesto para ambos)')
+    parser.add_argument('--grupos', type=int, default=20, help='Grupos temporales (inscripcion)')
+    parser.add_argument('--cupo', type=int, default=1000)
+    parser.add_argument('--alumnos', type=int, default=2000)
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    # Mismo número de conexiones para los hilos y para el event loop; los
+    # hilos que no alcanzan conexión esperan en el pool como en producción
+    conexiones = str(args.conexiones)
+    os.environ.setdefault('POSTGRES_POOL_MAX', conexiones)
+    os.environ.setdefault('POSTGRES_READ_POOL_MAX', conexiones)
+    os.environ.setdefault('POSTGRES_ASYNC_POOL_MAX', conexiones)
+    os.environ.setdefault('POSTGRES_POOL_TIMEOUT', '60')
+
+    rng = np.random.default_rng(args.semilla)
+    preparar = preparar_lectura if args.escenario == 'lectura' else preparar_inscripcion
+    datos = preparar(args, rng)
+    token = datos.get('token')
+
+    resultados = []
+    try:
+        for concurrencia in args.concurrencia:
+            for modo in args.modos:
+                ejecutar = ejecutar_sync if modo == 'sync' else ejecutar_async
+                tareas = datos['tareas'][modo]
+                if args.escenario == 'inscripcion':
+                    # Cada medición consume pares distintos de su propio juego de grupos
+                    parte = len(tareas) // len(args.concurrencia)
+                    indice = args.concurrencia.index(concurrencia)
+                    tareas = tareas[indice * parte:(indice + 1) * parte]
+                resultados.append(resumir(modo, concurrencia,
+                                          *ejecutar(args.escenario, tareas, token, concurrencia)))
+    finally:
+        limpiar(args.escenario, datos)
+
+    print(json.dumps({
+        'benchmark': 'async',
+        'configuracion': {
+            'escenario': args.escenario,
+            'peticiones': args.peticiones,
+            'conexiones': args.conexiones,
+            'semilla': args.semilla
+        },
+        'resultados': resultados
+    }, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# ================================================
+# EduTrack - benchmarks/bench_inscripciones.py
+# Prueba de carga de los métodos de inscripción sobre grupos "calientes"
+# ================================================
+#
+# Crea una materia, pocos grupos con cupo limitado y muchos alumnos
+# sintéticos en la base configurada (.env), y lanza N hilos que inscriben
+# a la vez con cada método. Por método reporta rendimiento, latencias
+# p50/p95/p99, conflictos y reintentos, espera por bloqueos (muestreada de
+# pg_stat_activity) y violaciones de cupo. Imprime JSON y borra los datos
+# de prueba al terminar.
+#
+#   python benchmarks/bench_inscripciones.py --hilos 32 --grupos 2 --cupo 50 --alumnos 400
+#   python benchmarks/bench_inscripciones.py --modos atomica pesimista --estricto
+
+import argparse
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODOS = ('optimista', 'optimista_reintentos', 'pesimista', 'atomica')
+
+
+# ================================================
+# DATOS DE PRUEBA
+# ================================================
+def crear_datos(args, etiqueta):
+    """Materia, alumnos y un juego de grupos por método. Retorna (materia_id, alumnos, grupos)"""
+    from psycopg2.extras import execute_values
+
+    from database import get_db_cursor
+
+    with get_db_cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO materias (nombre, descripcion) VALUES (%s, %s) RETURNING id",
+            (f"Benchmark {etiqueta}", 'Datos temporales de bench_inscripciones.py')
+        )
+        materia_id = cursor.fetchone()[0]
+
+        alumnos = [row[0] for row in execute_values(
+            cursor,
+            "INSERT INTO alumnos (matricula, nombre) VALUES %s RETURNING id",
+            [(f"B{etiqueta[:8]}{i:06d}", f"Alumno Benchmark {i}") for i in range(args.alumnos)],
+            page_size=1000,
+            fetch=True
+        )]
+
+        grupos = {}
+        for modo in args.modos:
+            grupos[modo] = [row[0] for row in execute_values(
+                cursor,
+                "INSERT INTO grupos (materia_id, periodo, cupo_maximo) VALUES %s RETURNING id",
+                [(materia_id, f"BENCH-{modo}"[:20], args.cupo) for _ in range(args.grupos)],
+                fetch=True
+            )]
+    return materia_id, alumnos, grupos
+
+
+def borrar_datos(materia_id, alumnos):
+    """Las inscripciones, calificaciones y grupos se borran en cascada"""
+    from database import get_db_cursor
+
+    with get_db_cursor() as cursor:
+        cursor.execute("DELETE FROM alumnos WHERE id = ANY(%s)", (alumnos,))
+        cursor.execute("DELETE FROM materias WHERE id = %s", (materia_id,))
+
+
+def verificar_cupos(grupos):
+    """Comparar contador, inscripciones reales y cupo de cada grupo"""
+    from database import get_db_cursor
+
+    with get_db_cursor(commit=False, permitir_replica=False) as cursor:
+        cursor.execute(
+            """SELECT g.id, g.cupo_maximo, g.inscritos_count, COUNT(i.id)
+               FROM grupos g
+               LEFT JOIN inscripciones i ON i.grupo_id = g.id AND i.estado <> 'baja'
+               WHERE g.id = ANY(%s)
+               GROUP BY g.id""",
+            (grupos,)
+        )
+        filas = cursor.fetchall()
+    return {
+        'inscritos': int(sum(row[3] for row in filas)),
+        'sobrecupo': [row[0] for row in filas if row[3] > row[1]],
+        'contador_desfasado': [row[0] for row in filas if row[2] != row[3]]
+    }
+
+
+# ================================================
+# MUESTREO DE BLOQUEOS
+# ================================================
+class MuestreoBloqueos(threading.Thread):
+    """Cuenta en pg_stat_activity las sesiones esperando un lock, cada `intervalo` segundos"""
+
+    def __init__(self, intervalo):
+        super().__init__(daemon=True)
+        self.intervalo = intervalo
+        self.muestras = []
+        self._detener = threading.Event()
+
+    def run(self):
+        import psycopg2
+
+        from database import POSTGRES_CONFIG
+
+        conn = psycopg2.connect(**POSTGRES_CONFIG)
+        conn.set_session(autocommit=True)
+        try:
+            with conn.cursor() as cursor:
+                while not self._detener.is_set():
+                    cursor.execute(
+                        """SELECT COUNT(*) FROM pg_stat_activity
+                           WHERE datname = current_database() AND wait_event_type = 'Lock'"""
+                    )
+                    self.muestras.append(cursor.fetchone()[0])
+                    self._detener.wait(self.intervalo)
+        finally:
+            conn.close()
+
+    def detener(self):
+        self._detener.set()
+        self.join()
+        muestras = self.muestras or [0]
+        return {
+            'espera_bloqueo_s': round(sum(muestras) * self.intervalo, 3),
+            'en_espera_promedio': round(float(np.mean(muestras)), 2),
+            'en_espera_max': int(max(muestras))
+        }
+
+
+# ================================================
+# EJECUCIÓN POR MÉTODO
+# ================================================
+def inscribir(modo, grupo_id, alumno_id):
+    """Retorna (exito, mensaje, reintentos) según el método"""
+    from models_inscripciones import Grupo, Inscripcion
+
+    if modo == 'optimista':
+        # Como el formulario: leer la versión y luego inscribir con ella
+        grupo = Grupo.obtener_por_id(grupo_id)
+        exito, mensaje, _ = Inscripcion.inscribir_optimista(grupo_id, alumno_id, grupo['version'])
+        return exito, mensaje, 0
+    if modo == 'optimista_reintentos':
+        exito, mensaje, _, reintentos = Inscripcion.inscribir_optimista_con_reintentos(grupo_id, alumno_id)
+        return exito, mensaje, reintentos
+    if modo == 'pesimista':
+        exito, mensaje, _ = Inscripcion.inscribir_pesimista(grupo_id, alumno_id)
+        return exito, mensaje, 0
+    exito, mensaje, _ = Inscripcion.inscribir_atomica(grupo_id, alumno_id)
+    return exito, mensaje, 0
+
+
+def clasificar(exito, mensaje):
+    if exito:
+        return 'exito'
+    if mensaje.startswith('Conflicto'):
+        return 'conflicto'
+    if mensaje.startswith('Cupo lleno'):
+        return 'lleno'
+    if 'ya está inscrito' in mensaje:
+        return 'duplicado'
+    return 'error'
+
+
+def ejecutar_modo(modo, grupos, alumnos, args):
+    # Cada alumno intenta inscribirse una vez en cada grupo caliente
+    tareas = queue.Queue()
+    pares = [(grupo_id, alumno_id) for alumno_id in alumnos for grupo_id in grupos]
+    random.Random(args.semilla).shuffle(pares)
+    for par in pares:
+        tareas.put(par)
+
+    latencias = []
+    resultados = {'exito': 0, 'conflicto': 0, 'lleno': 0, 'duplicado': 0, 'error': 0}
+    reintentos = [0]
+    errores = []
+    lock = threading.Lock()
+    salida = threading.Barrier(args.hilos + 1)
+
+    def trabajador():
+        salida.wait()
+        while True:
+            try:
+                grupo_id, alumno_id = tareas.get_nowait()
+            except queue.Empty:
+                return
+            inicio = time.perf_counter()
+            try:
+                exito, mensaje, n_reintentos = inscribir(modo, grupo_id, alumno_id)
+            except Exception as e:
+                exito, mensaje, n_reintentos = False, f"Error: {e}", 0
+            duracion = time.perf_counter() - inicio
+            categoria = clasificar(exito, mensaje)
+            with lock:
+                latencias.append(duracion)
+                resultados[categoria] += 1
+                reintentos[0] += n_reintentos
+                if categoria == 'error' and len(errores) < 5:
+                    errores.append(mensaje)
+
+    hilos = [threading.Thread(target=trabajador) for _ in range(args.hilos)]
+    for hilo in hilos:
+        hilo.start()
+    muestreo = MuestreoBloqueos(args.muestreo_ms / 1000.0)
+    muestreo.start()
+    salida.wait()
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+    bloqueos = muestreo.detener()
+
+    intentos = len(latencias)
+    percentiles = np.percentile(latencias, [50, 95, 99]) * 1000 if latencias else [0, 0, 0]
+    cupos = verificar_cupos(grupos)
+    return {
+        'modo': modo,
+        'intentos': intentos,
+        'duracion_s': round(duracion, 3),
+        'intentos_por_s': round(intentos / duracion, 1) if duracion else 0,
+        'inscripciones_por_s': round(resultados['exito'] / duracion, 1) if duracion else 0,
+        'latencia_ms': {
+            'p50': round(float(percentiles[0]), 2),
+            'p95': round(float(percentiles[1]), 2),
+            'p99': round(float(percentiles[2]), 2),
+            'max': round(max(latencias) * 1000, 2) if latencias else 0
+        },
+        'resultados': resultados,
+        'tasa_conflicto': round(resultados['conflicto'] / intentos, 4) if intentos else 0,
+        'reintentos': reintentos[0],
+        'reintentos_por_intento': round(reintentos[0] / intentos, 4) if intentos else 0,
+        **bloqueos,
+        'cupo_total': args.cupo * len(grupos),
+        'inscritos': cupos['inscritos'],
+        'violaciones': {
+            'sobrecupo': cupos['sobrecupo'],
+            'contador_desfasado': cupos['contador_desfasado']
+        },
+        'errores_ejemplo': errores
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de concurrencia de inscripciones')
+    parser.add_argument('--modos', nargs='+', choices=MODOS, default=list(MODOS))
+    parser.add_argument('--hilos', type=int, default=32)
+    parser.add_argument('--grupos', type=int, default=2, help='Grupos calientes por método')
+    parser.add_argument('--cupo', type=int, default=50)
+    parser.add_argument('--alumnos', type=int, default=400)
+    parser.add_argument('--muestreo-ms', type=float, default=10.0,
+                        help='Intervalo de muestreo de pg_stat_activity')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--conservar', action='store_true', help='No borrar los datos de prueba')
+    parser.add_argument('--estricto', action='store_true',
+                        help='Salir con código 1 si hay sobrecupo o contadores desfasados')
+    args = parser.parse_args()
+
+    # El pool no debe ser el cuello de botella medido: el modo optimista
+    # retiene dos conexiones por hilo (su cursor y el de actualizar_cupo_optimista)
+    os.environ.setdefault('POSTGRES_POOL_MAX', str(2 * args.hilos + 4))
+    os.environ.setdefault('POSTGRES_READ_POOL_MAX', str(args.hilos + 4))
+    from database import estadisticas_pool
+
+    etiqueta = uuid.uuid4().hex
+    materia_id, alumnos, grupos = crear_datos(args, etiqueta)
+    try:
+        resultados = [ejecutar_modo(modo, grupos[modo], alumnos, args) for modo in args.modos]
+    finally:
+        if not args.conservar:
+            borrar_datos(materia_id, alumnos)
+
+    print(json.dumps({
+        'benchmark': 'inscripciones',
+        'configuracion': {
+            'hilos': args.hilos,
+            'grupos': args.grupos,
+            'cupo': args.cupo,
+            'alumnos': args.alumnos,
+            'semilla': args.semilla
+        },
+        'pool': estadisticas_pool(),
+        'resultados': resultados
+    }, indent=2, default=str))
+
+    violaciones = any(r['violaciones']['sobrecupo'] or r['violaciones']['contador_desfasado']
+                      for r in resultados)
+    if args.estricto and violaciones:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# ================================================
+# EduTrack - cache.py
+# Caché en memoria del proceso (LRU con expiración)
+# ================================================
+
+import threading
+import time
+from collections import OrderedDict
+
+_FALTA = object()
+
+
+class CacheTTL:
+    """
+    Caché LRU acotada y segura para hilos.
+    Cada entrada expira a los `ttl` segundos de haberse guardado.
+    """
+
+    def __init__(self, max_entradas=1024, ttl=60.0):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()   # clave -> (expira, valor)
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, default=None):
+        """Valor vigente de la clave o `default`"""
+        with self._lock:
+            entrada = self._datos.get(clave, _FALTA)
+            if entrada is _FALTA:
+                return default
+            expira, valor = entrada
+            if expira <= time.monotonic():
+                del self._datos[clave]
+                return default
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        """Guardar un valor; descarta la entrada menos usada si está llena"""
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._datos[clave] = (expira, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def obtener_o_calcular(self, clave, funcion, ttl=None):
+        """Valor en caché o el resultado de `funcion()` (que se guarda)"""
+        valor = self.obtener(clave, _FALTA)
+        if valor is _FALTA:
+            valor = funcion()
+            self.guardar(clave, valor, ttl)
+        return valor
+
+    def invalidar(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._datos)
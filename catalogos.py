@@ -0,0 +1,133 @@
+# ================================================
+# EduTrack - catalogos.py
+# Catálogos para formularios (grupos, alumnos, profesores) en caché
+# ================================================
+
+import os
+import threading
+import time
+
+from cache import CacheTTL
+from database import get_db_cursor
+
+# Cada cuánto se releen las versiones de catálogo_versiones (segundos)
+CATALOGO_VERSION_TTL = float(os.getenv('CATALOGO_VERSION_TTL', '2'))
+# Vigencia máxima de un catálogo aunque su versión no cambie
+CATALOGO_CACHE_TTL = float(os.getenv('CATALOGO_CACHE_TTL', '300'))
+
+BUSQUEDA_ALUMNOS_LIMITE = 20
+
+_cache = CacheTTL(max_entradas=16, ttl=CATALOGO_CACHE_TTL)
+
+_versiones = {}
+_versiones_expira = 0.0
+_versiones_lock = threading.Lock()
+
+
+# ================================================
+# VERSIONES
+# ================================================
+def versiones():
+    """
+    Versión de cada catálogo según la tabla catalogo_versiones, que
+    incrementan los triggers del schema. Se relee cada CATALOGO_VERSION_TTL.
+    """
+    global _versiones, _versiones_expira
+    with _versiones_lock:
+        if _versiones_expira > time.monotonic():
+            return _versiones
+
+    with get_db_cursor(commit=False) as cursor:
+        cursor.execute("SELECT catalogo, version FROM catalogo_versiones")
+        actuales = dict(cursor.fetchall())
+
+    with _versiones_lock:
+        _versiones = actuales
+        _versiones_expira = time.monotonic() + CATALOGO_VERSION_TTL
+    return actuales
+
+
+def obtener(nombre, cargar, ttl=None):
+    """
+    Catálogo `nombre` desde la caché del proceso; se recarga con `cargar()`
+    si su versión cambió o expiró.
+    """
+    version = versiones().get(nombre)
+    entrada = _cache.obtener(nombre)
+    if entrada is not None and entrada[0] == version:
+        return entrada[1]
+
+    valor = cargar()
+    _cache.guardar(nombre, (version, valor), ttl)
+    return valor
+
+
+def invalidar(*nombres):
+    """Descartar catálogos de este proceso tras una escritura propia"""
+    global _versiones_expira
+    for nombre in nombres:
+        _cache.invalidar(nombre)
+    with _versiones_lock:
+        _versiones_expira = 0.0
+
+
+# ================================================
+# CATÁLOGOS
+# ================================================
+def _cargar_alumnos():
+    with get_db_cursor(commit=False) as cursor:
+        cursor.execute(
+            """SELECT id, matricula, nombre, email, carrera, semestre, fecha_creacion
+               FROM alumnos ORDER BY nombre"""
+        )
+        return [
+            {
+                'id': row[0],
+                'matricula': row[1],
+                'nombre': row[2],
+                'email': row[3],
+                'carrera': row[4],
+                'semestre': row[5],
+                'fecha_creacion': row[6]
+            }
+            for row in cursor.fetchall()
+        ]
+
+
+def _cargar_profesores():
+    with get_db_cursor(commit=False) as cursor:
+        cursor.execute("SELECT id, nombre FROM profesores ORDER BY nombre")
+        return [{'id': row[0], 'nombre': row[1]} for row in cursor.fetchall()]
+
+
+def alumnos():
+    """Todos los alumnos (listado de alumnos)"""
+    return obtener('alumnos', _cargar_alumnos)
+
+
+def profesores():
+    """Todos los profesores (formulario de grupos)"""
+    return obtener('profesores', _cargar_profesores)
+
+
+def buscar_alumnos(texto, limite=BUSQUEDA_ALUMNOS_LIMITE):
+    """
+    Alumnos cuyo nombre o matrícula empieza con `texto` (sin distinguir
+    mayúsculas). Usa los índices text_pattern_ops sobre lower(nombre)
+    y lower(matricula).
+    """
+    prefijo = texto.strip().lower()
+    if not prefijo:
+        return []
+    patron = prefijo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+    with get_db_cursor(commit=False) as cursor:
+        cursor.execute(
+            """SELECT id, matricula, nombre FROM alumnos
+               WHERE lower(nombre) LIKE %s OR lower(matricula) LIKE %s
+               ORDER BY nombre
+               LIMIT %s""",
+            (patron, patron, max(1, min(int(limite), BUSQUEDA_ALUMNOS_LIMITE)))
+        )
+        return [{'id': row[0], 'matricula': row[1], 'nombre': row[2]}
+                for row in cursor.fetchall()]
@@ -3,14 +3,26 @@
 # Configuración de conexiones a PostgreSQL y MongoDB
 # ================================================
 
+import logging
 import os
+import threading
+import time
+import click
+import psycopg2
+import pymongo
 from dotenv import load_dotenv
 from psycopg2 import pool
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 from contextlib import contextmanager
 
+import instrumentacion
+from pool_conexiones import PoolConexiones
+
 load_dotenv()
 
+logger = logging.getLogger('edutrack.database')
+
 # ================================================
 # CONFIGURACIÓN DE POSTGRESQL
 # ================================================
@@ -19,16 +31,108 @@ POSTGRES_CONFIG = {
     'port': os.getenv('POSTGRES_PORT', '5432'),
     'database': os.getenv('POSTGRES_DB', 'edutrack'),
     'user': os.getenv('POSTGRES_USER', 'edutrack_admin'),
-    'password': os.getenv('POSTGRES_PASSWORD', 'your_password_here')
+    'password': os.getenv('POSTGRES_PASSWORD', 'your_password_here'),
+    'connect_timeout': int(os.getenv('POSTGRES_CONNECT_TIMEOUT', '5'))
+}
+
+# Tamaño y comportamiento del pool (por proceso worker)
+POSTGRES_POOL_CONFIG = {
+    'minconn': int(os.getenv('POSTGRES_POOL_MIN', '2')),
+    'maxconn': int(os.getenv('POSTGRES_POOL_MAX', '20')),
+    'timeout': float(os.getenv('POSTGRES_POOL_TIMEOUT', '10')),
+    'max_vida': float(os.getenv('POSTGRES_POOL_MAX_LIFETIME', '1800')),
+    'validar_inactiva': float(os.getenv('POSTGRES_POOL_IDLE_CHECK', '30'))
 }
 
-# Pool de conexiones PostgreSQL
-try:
-    postgres_pool = pool.SimpleConnectionPool(1, 20, **POSTGRES_CONFIG)
-    print("✓ PostgreSQL connection pool created successfully")
-except Exception as e:
-    print(f"✗ Error creating PostgreSQL pool: {e}")
-    postgres_pool = None
+# Réplica de solo lectura opcional (POSTGRES_REPLICA_*)
+POSTGRES_REPLICA_CONFIG = {
+    'host': os.getenv('POSTGRES_REPLICA_HOST'),
+    'port': os.getenv('POSTGRES_REPLICA_PORT', POSTGRES_CONFIG['port']),
+    'database': os.getenv('POSTGRES_REPLICA_DB', POSTGRES_CONFIG['database']),
+    'user': os.getenv('POSTGRES_REPLICA_USER', POSTGRES_CONFIG['user']),
+    'password': os.getenv('POSTGRES_REPLICA_PASSWORD', POSTGRES_CONFIG['password']),
+    'connect_timeout': POSTGRES_CONFIG['connect_timeout']
+} if os.getenv('POSTGRES_REPLICA_HOST') else None
+
+# Segundos de espera por la réplica antes de leer del primario
+POSTGRES_REPLICA_TIMEOUT = float(os.getenv('POSTGRES_REPLICA_TIMEOUT', '1'))
+
+# Pool para lecturas (conexiones READ ONLY en autocommit)
+POSTGRES_READ_POOL_CONFIG = dict(
+    POSTGRES_POOL_CONFIG,
+    minconn=int(os.getenv('POSTGRES_READ_POOL_MIN', '1')),
+    maxconn=int(os.getenv('POSTGRES_READ_POOL_MAX', '10'))
+)
+
+def _configurar_solo_lectura(conn):
+    """Sesión de solo lectura sin BEGIN/COMMIT por consulta"""
+    conn.set_session(readonly=True, autocommit=True)
+
+# Pools por nombre: (configuración del pool, de la conexión, configurar)
+POOLS = {
+    'primario': (POSTGRES_POOL_CONFIG, POSTGRES_CONFIG, None),
+    'lectura': (POSTGRES_READ_POOL_CONFIG, POSTGRES_CONFIG, _configurar_solo_lectura),
+}
+if POSTGRES_REPLICA_CONFIG:
+    POOLS['replica'] = (POSTGRES_READ_POOL_CONFIG, POSTGRES_REPLICA_CONFIG, _configurar_solo_lectura)
+
+# ================================================
+# CONEXIONES PEREZOSAS
+# ================================================
+# Importar este módulo no abre conexiones: los pools y el cliente de
+# MongoDB se crean en el primer uso, ya dentro del proceso worker.
+_lock = threading.Lock()
+_pools = {}
+_mongo_client = None
+# Objetos heredados por un fork: no se cierran en el hijo porque
+# comparten el socket con el padre (cerrarlos cortaría sus sesiones)
+_heredados = []
+
+def obtener_pool(nombre='primario'):
+    """Pool PostgreSQL `nombre` ('primario', 'lectura' o 'replica'), creado en el primer uso"""
+    existente = _pools.get(nombre)
+    if existente is not None:
+        return existente
+    with _lock:
+        if nombre not in _pools:
+            config_pool, config_conexion, configurar = POOLS[nombre]
+            _pools[nombre] = PoolConexiones(**config_pool, configurar=configurar,
+                                            cursor_factory=instrumentacion.cursor_factory(),
+                                            **config_conexion)
+            logger.info("PostgreSQL %s pool created", nombre)
+        return _pools[nombre]
+
+def calentar():
+    """Crear todos los pools y abrir sus conexiones mínimas (p. ej. en post_fork)"""
+    for nombre in POOLS:
+        obtener_pool(nombre).calentar()
+
+def cerrar():
+    """Cerrar pools y cliente de MongoDB (al terminar un script)"""
+    global _mongo_client
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        cliente, _mongo_client = _mongo_client, None
+    for existente in pools:
+        existente.closeall()
+    if cliente is not None:
+        cliente.close()
+
+def _reiniciar_tras_fork():
+    """En el hijo: olvidar las conexiones del padre y crear las propias al usarlas"""
+    global _lock, _mongo_client
+    _heredados.append((list(_pools.values()), _mongo_client))
+    _pools.clear()
+    _mongo_client = None
+    _lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_tras_fork)
+
+def estadisticas_pool():
+    """Estado de los pools PostgreSQL (en uso, esperando, histograma de espera)"""
+    return {nombre: p.estadisticas() for nombre, p in list(_pools.items())}
 
 # ================================================
 # CONFIGURACIÓN DE MONGODB
@@ -36,49 +140,73 @@ except Exception as e:
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/')
 MONGODB_DB = os.getenv('MONGODB_DB', 'edutrack')
 
-try:
-    mongo_client = MongoClient(MONGODB_URI)
-    mongo_db = mongo_client[MONGODB_DB]
-    print("✓ MongoDB connected successfully")
-except Exception as e:
-    print(f"✗ Error connecting to MongoDB: {e}")
-    mongo_client = None
-    mongo_db = None
+def obtener_mongo():
+    """Base de datos de MongoDB; el cliente se crea en el primer uso"""
+    global _mongo_client
+    if _mongo_client is None:
+        with _lock:
+            if _mongo_client is None:
+                # connect=False: sin hilos ni sockets hasta la primera operación
+                _mongo_client = MongoClient(MONGODB_URI, connect=False,
+                                            event_listeners=instrumentacion.listeners_mongo())
+                logger.info("MongoDB client created")
+    return _mongo_client[MONGODB_DB]
 
 # ================================================
 # COLECCIONES DE MONGODB
 # ================================================
 def get_notas_collection():
     """Colección para notas de estudiantes (documentos flexibles)"""
-    return mongo_db.student_notes if mongo_db is not None else None
+    return obtener_mongo().student_notes
 
 def get_sesiones_collection():
     """Colección para tokens de sesión (clave-valor)"""
-    return mongo_db.sesiones if mongo_db is not None else None
+    return obtener_mongo().sesiones
 
 # ================================================
 # CONTEXT MANAGERS PARA POSTGRESQL
 # ================================================
+def _obtener_conexion_lectura(permitir_replica=True):
+    """Conexión de solo lectura: réplica si está disponible, si no el primario"""
+    if permitir_replica and 'replica' in POOLS:
+        replica = obtener_pool('replica')
+        try:
+            return replica.getconn(POSTGRES_REPLICA_TIMEOUT), replica
+        except (psycopg2.Error, pool.PoolError) as e:
+            logger.warning("Replica unavailable, reading from primary: %s", e)
+    lectura = obtener_pool('lectura')
+    return lectura.getconn(), lectura
+
 @contextmanager
-def get_db_connection():
+def get_db_connection(solo_lectura=False, permitir_replica=True):
     """Context manager para conexiones con manejo de transacciones"""
     conn = None
+    origen = None
     try:
-        conn = postgres_pool.getconn()
+        if solo_lectura:
+            conn, origen = _obtener_conexion_lectura(permitir_replica)
+        else:
+            origen = obtener_pool('primario')
+            conn = origen.getconn()
         yield conn
-        conn.commit()
+        if not conn.autocommit:
+            conn.commit()
     except Exception as e:
         if conn:
             conn.rollback()
         raise e
     finally:
         if conn:
-            postgres_pool.putconn(conn)
+            origen.putconn(conn)
 
 @contextmanager
-def get_db_cursor(commit=True):
-    """Context manager para cursor PostgreSQL"""
-    with get_db_connection() as conn:
+def get_db_cursor(commit=True, permitir_replica=True):
+    """
+    Context manager para cursor PostgreSQL.
+    Con commit=False la consulta corre en una conexión READ ONLY en
+    autocommit (réplica si está configurada).
+    """
+    with get_db_connection(solo_lectura=not commit, permitir_replica=permitir_replica) as conn:
         cursor = conn.cursor()
         try:
             yield cursor
@@ -90,31 +218,119 @@ def get_db_cursor(commit=True):
         finally:
             cursor.close()
 
+@contextmanager
+def get_db_cursor_servidor(nombre='exportacion', itersize=2000, permitir_replica=True):
+    """
+    Cursor con nombre (del lado del servidor) para recorrer resultados
+    grandes en bloques de `itersize` filas con memoria constante.
+    """
+    conn, origen = _obtener_conexion_lectura(permitir_replica)
+    autocommit = conn.autocommit
+    try:
+        # Los cursores con nombre requieren una transacción abierta
+        conn.autocommit = False
+        cursor = conn.cursor(name=nombre)
+        cursor.itersize = itersize
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+    finally:
+        descartar = False
+        try:
+            conn.rollback()
+            conn.autocommit = autocommit
+        except psycopg2.Error:
+            descartar = True
+        origen.putconn(conn, close=descartar)
+
 # ================================================
-# INICIALIZACIÓN DE ÍNDICES MONGODB
+# ÍNDICES MONGODB (MIGRACIÓN)
 # ================================================
+def crear_indice_ttl(coleccion, campo):
+    """Índice TTL que borra el documento al llegar la fecha del campo"""
+    try:
+        coleccion.create_index(campo, expireAfterSeconds=0)
+    except OperationFailure:
+        # Existía un índice normal sobre el campo: reemplazarlo
+        coleccion.drop_index(f"{campo}_1")
+        coleccion.create_index(campo, expireAfterSeconds=0)
+
 def init_mongodb_indexes():
-    """Crear índices en MongoDB para optimizar consultas"""
-    if mongo_db is not None:
+    """
+    Crear índices en MongoDB para optimizar consultas.
+    Se ejecuta una vez por despliegue con `flask --app app crear-indices`.
+    """
+    # Índices para notas de estudiantes
+    # Compuestos según las consultas reales: filtro + orden (date, _id)
+    notas = get_notas_collection()
+    notas.create_index([("group_id", 1), ("date", -1), ("_id", -1)])
+    notas.create_index([("student_id", 1), ("date", -1), ("_id", -1)])
+    notas.create_index([("type", 1), ("group_id", 1), ("date", -1), ("_id", -1)])
+    notas.create_index([("date", -1), ("_id", -1)])
+    notas.create_index("teacher_id")
+    notas.create_index(
+        [("comment", "text"), ("seguimientos.texto", "text")],
+        name="busqueda_texto",
+        default_language="spanish"
+    )
+
+    # Índices para sesiones
+    sesiones = get_sesiones_collection()
+    sesiones.create_index("token", unique=True)
+    sesiones.create_index("usuario_id")
+    crear_indice_ttl(sesiones, "fecha_expiracion")
+
+# ================================================
+# SALUD
+# ================================================
+# Segundos máximos por comprobación de /salud
+SALUD_TIMEOUT = float(os.getenv('SALUD_TIMEOUT', '2'))
+
+def _comprobar_postgres():
+    conn = None
+    origen = obtener_pool('primario')
+    try:
+        conn = origen.getconn(SALUD_TIMEOUT)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+    finally:
+        if conn is not None:
+            origen.putconn(conn)
+
+def _comprobar_mongo():
+    with pymongo.timeout(SALUD_TIMEOUT):
+        obtener_mongo().command('ping')
+
+def salud():
+    """
+    Comprobar PostgreSQL y MongoDB. Retorna (listo, detalle) con
+    {'ok', 'ms'} por servicio y el tipo de error si falló.
+    """
+    detalle = {}
+    for servicio, comprobar in (('postgres', _comprobar_postgres), ('mongodb', _comprobar_mongo)):
+        inicio = time.perf_counter()
         try:
-            # Índices para notas de estudiantes
-            notas = get_notas_collection()
-            notas.create_index("student_id")
-            notas.create_index("teacher_id")
-            notas.create_index("group_id")
-            notas.create_index("date")
-            
-            # Índices para sesiones
-            sesiones = get_sesiones_collection()
-            sesiones.create_index("token", unique=True)
-            sesiones.create_index("usuario_id")
-            sesiones.create_index("fecha_expiracion")
-            
-            print("✓ MongoDB indexes created successfully")
+            comprobar()
+            detalle[servicio] = {'ok': True}
         except Exception as e:
-            print(f"✗ Error creating MongoDB indexes: {e}")
+            logger.warning("Health check failed for %s: %s", servicio, e)
+            detalle[servicio] = {'ok': False, 'error': type(e).__name__}
+        detalle[servicio]['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    return all(d['ok'] for d in detalle.values()), detalle
 
-# Inicializar al importar
-if mongo_db is not None:
-    init_mongodb_indexes()
+# ================================================
+# INTEGRACIÓN CON FLASK
+# ================================================
+def init_app(app):
+    """Registrar el comando de migración `crear-indices` en la aplicación"""
 
+    @app.cli.command('crear-indices')
+    def crear_indices():
+        """Crear los índices de MongoDB (una vez por despliegue)"""
+        try:
+            init_mongodb_indexes()
+        except Exception as e:
+            raise click.ClickException(f"Error creating MongoDB indexes: {e}")
+        click.echo("✓ MongoDB indexes created successfully")
@@ -0,0 +1,157 @@
+# ================================================
+# EduTrack - database_async.py
+# Conexiones asyncio a PostgreSQL (asyncpg) y MongoDB (motor)
+# ================================================
+#
+# Misma configuración que database.py. El pool de asyncpg y el cliente
+# de motor quedan ligados al event loop que los crea, así que se guardan
+# por loop y se crean en el primer uso dentro de él.
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+
+import asyncpg
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import instrumentacion
+from database import MONGODB_DB, MONGODB_URI, POSTGRES_CONFIG, SALUD_TIMEOUT
+
+logger = logging.getLogger('edutrack.database')
+
+# Conexiones por proceso: un worker asyncio atiende muchas peticiones con
+# pocas conexiones, porque no retiene una mientras espera otra E/S
+POSTGRES_ASYNC_POOL_CONFIG = {
+    'min_size': int(os.getenv('POSTGRES_ASYNC_POOL_MIN', '2')),
+    'max_size': int(os.getenv('POSTGRES_ASYNC_POOL_MAX', '20')),
+    'max_inactive_connection_lifetime': float(os.getenv('POSTGRES_ASYNC_POOL_IDLE', '300'))
+}
+
+# Segundos de espera por una conexión libre del pool
+POSTGRES_ASYNC_TIMEOUT = float(os.getenv('POSTGRES_POOL_TIMEOUT', '10'))
+
+# event loop -> {'lock', 'pool', 'mongo'}
+_estado = weakref.WeakKeyDictionary()
+
+
+def _estado_loop():
+    loop = asyncio.get_running_loop()
+    estado = _estado.get(loop)
+    if estado is None:
+        estado = _estado[loop] = {'lock': asyncio.Lock(), 'pool': None, 'mongo': None}
+    return estado
+
+
+# ================================================
+# POSTGRESQL
+# ================================================
+def _registrar_consulta(registro):
+    """Query logger de asyncpg: alimenta las métricas de instrumentacion.py"""
+    instrumentacion.registrar_sql(registro.query, registro.elapsed, registro.exception is not None)
+
+
+async def _configurar_conexion(conn):
+    if instrumentacion.INSTRUMENTACION:
+        conn.add_query_logger(_registrar_consulta)
+
+
+async def obtener_pool():
+    """Pool de asyncpg del event loop actual, creado en el primer uso"""
+    estado = _estado_loop()
+    if estado['pool'] is None:
+        async with estado['lock']:
+            if estado['pool'] is None:
+                estado['pool'] = await asyncpg.create_pool(
+                    host=POSTGRES_CONFIG['host'],
+                    port=int(POSTGRES_CONFIG['port']),
+                    database=POSTGRES_CONFIG['database'],
+                    user=POSTGRES_CONFIG['user'],
+                    password=POSTGRES_CONFIG['password'],
+                    timeout=POSTGRES_CONFIG['connect_timeout'],
+                    init=_configurar_conexion,
+                    **POSTGRES_ASYNC_POOL_CONFIG
+                )
+                logger.info("PostgreSQL async pool created")
+    return estado['pool']
+
+
+@asynccontextmanager
+async def get_db_connection():
+    """Conexión del pool (en autocommit; usar conn.transaction() para escribir)"""
+    pool = await obtener_pool()
+    async with pool.acquire(timeout=POSTGRES_ASYNC_TIMEOUT) as conn:
+        yield conn
+
+
+# ================================================
+# MONGODB
+# ================================================
+def obtener_mongo():
+    """Base de datos de MongoDB (motor) del event loop actual"""
+    estado = _estado_loop()
+    if estado['mongo'] is None:
+        estado['mongo'] = AsyncIOMotorClient(MONGODB_URI,
+                                             event_listeners=instrumentacion.listeners_mongo())
+        logger.info("MongoDB async client created")
+    return estado['mongo'][MONGODB_DB]
+
+
+def get_notas_collection():
+    """Colección para notas de estudiantes"""
+    return obtener_mongo().student_notes
+
+
+def get_sesiones_collection():
+    """Colección para tokens de sesión"""
+    return obtener_mongo().sesiones
+
+
+# ================================================
+# CICLO DE VIDA
+# ================================================
+async def cerrar():
+    """Cerrar el pool y el cliente del event loop actual"""
+    estado = _estado.pop(asyncio.get_running_loop(), None)
+    if estado is None:
+        return
+    if estado['pool'] is not None:
+        await estado['pool'].close()
+    if estado['mongo'] is not None:
+        estado['mongo'].close()
+
+
+@asynccontextmanager
+async def alcance():
+    """
+    Conexiones que viven lo que dura el bloque. Para vistas async de Flask,
+    que corren cada petición en un event loop nuevo.
+    """
+    try:
+        yield
+    finally:
+        await cerrar()
+
+
+async def salud():
+    """Como database.salud(), con asyncpg y motor"""
+    async def comprobar_postgres():
+        async with get_db_connection() as conn:
+            await conn.fetchval("SELECT 1")
+
+    async def comprobar_mongo():
+        await obtener_mongo().command('ping')
+
+    detalle = {}
+    for servicio, comprobar in (('postgres', comprobar_postgres), ('mongodb', comprobar_mongo)):
+        inicio = time.perf_counter()
+        try:
+            await asyncio.wait_for(comprobar(), SALUD_TIMEOUT)
+            detalle[servicio] = {'ok': True}
+        except Exception as e:
+            logger.warning("Health check failed for %s: %s", servicio, e)
+            detalle[servicio] = {'ok': False, 'error': type(e).__name__}
+        detalle[servicio]['ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+    return all(d['ok'] for d in detalle.values()), detalle
@@ -0,0 +1,51 @@
+# ================================================
+# EduTrack - estadisticas.py
+# Estadísticas del dashboard (contadores + caché)
+# ================================================
+
+import os
+
+from cache import CacheTTL
+from database import get_db_cursor
+
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+
+_cache = CacheTTL(max_entradas=1, ttl=DASHBOARD_CACHE_TTL)
+
+
+class EstadisticasDashboard:
+    """
+    Totales del dashboard leídos de la tabla estadisticas_conteos,
+    que mantienen los triggers del schema. Una sola consulta por cálculo
+    y caché corta en memoria delante.
+    """
+
+    CLAVES = {
+        'materias': 'total_materias',
+        'grupos': 'total_grupos',
+        'alumnos': 'total_alumnos',
+        'inscripciones_activas': 'inscripciones_activas'
+    }
+
+    @staticmethod
+    def obtener():
+        """Totales de materias, grupos, alumnos e inscripciones activas"""
+        return _cache.obtener_o_calcular('dashboard', EstadisticasDashboard._consultar)
+
+    @staticmethod
+    def _consultar():
+        stats = {nombre: 0 for nombre in EstadisticasDashboard.CLAVES.values()}
+        with get_db_cursor(commit=False) as cursor:
+            cursor.execute(
+                """SELECT clave, SUM(valor) FROM estadisticas_conteos
+                   GROUP BY clave"""
+            )
+            for clave, valor in cursor.fetchall():
+                if clave in EstadisticasDashboard.CLAVES:
+                    stats[EstadisticasDashboard.CLAVES[clave]] = int(valor)
+        return stats
+
+    @staticmethod
+    def invalidar():
+        """Descartar los totales en caché tras una escritura"""
+        _cache.limpiar()
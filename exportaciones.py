@@ -0,0 +1,105 @@
+# ================================================
+# EduTrack - exportaciones.py
+# Exportación de inscripciones y calificaciones (CSV / NDJSON)
+# ================================================
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from database import get_db_cursor_servidor
+
+COLUMNAS_EXPORTACION = [
+    'inscripcion_id', 'matricula', 'alumno', 'materia', 'periodo', 'grupo_id',
+    'fecha_inscripcion', 'estado', 'parcial1', 'parcial2', 'final'
+]
+
+# Filas por bloque enviado al cliente
+FILAS_POR_BLOQUE = 500
+
+
+def consulta_exportacion(filtros=None):
+    """
+    Consulta de inscripciones con sus calificaciones.
+    Acepta los mismos filtros que la interfaz: periodo, grupo_id y estado.
+    Retorna (sql, params)
+    """
+    filtros = filtros or {}
+    condiciones = []
+    params = []
+    if filtros.get('periodo'):
+        condiciones.append("g.periodo = %s")
+        params.append(filtros['periodo'])
+    if filtros.get('grupo_id'):
+        condiciones.append("i.grupo_id = %s")
+        params.append(filtros['grupo_id'])
+    if filtros.get('estado'):
+        condiciones.append("i.estado = %s")
+        params.append(filtros['estado'])
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+    sql = f"""SELECT i.id, a.matricula, a.nombre, m.nombre, g.periodo, g.id,
+                     i.fecha_inscripcion, i.estado, c.parcial1, c.parcial2, c.final
+              FROM inscripciones i
+              JOIN alumnos a ON i.alumno_id = a.id
+              JOIN grupos g ON i.grupo_id = g.id
+              JOIN materias m ON g.materia_id = m.id
+              LEFT JOIN calificaciones c ON c.inscripcion_id = i.id
+              {where}
+              ORDER BY i.id"""
+    return sql, params
+
+
+def iterar_filas(filtros=None):
+    """Recorrer las filas con un cursor del lado del servidor"""
+    sql, params = consulta_exportacion(filtros)
+    with get_db_cursor_servidor('exportacion_inscripciones') as cursor:
+        cursor.execute(sql, params)
+        for row in cursor:
+            yield row
+
+
+def _valor_json(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def exportar_csv(filtros=None):
+    """Generar el CSV en bloques de texto (encabezado incluido)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS_EXPORTACION)
+    pendientes = 0
+    for row in iterar_filas(filtros):
+        escritor.writerow(row)
+        pendientes += 1
+        if pendientes >= FILAS_POR_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    yield buffer.getvalue()
+
+
+def exportar_ndjson(filtros=None):
+    """Generar un objeto JSON por línea, en bloques de texto"""
+    bloque = []
+    for row in iterar_filas(filtros):
+        bloque.append(json.dumps(dict(zip(COLUMNAS_EXPORTACION, row)),
+                                 default=_valor_json, ensure_ascii=False))
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield '\n'.join(bloque) + '\n'
+            bloque = []
+    if bloque:
+        yield '\n'.join(bloque) + '\n'
+
+
+FORMATOS_EXPORTACION = {
+    'csv': (exportar_csv, 'text/csv'),
+    'ndjson': (exportar_ndjson, 'application/x-ndjson')
+}
@@ -0,0 +1,45 @@
+# ================================================
+# EduTrack - exportar_datos.py
+# Exportar inscripciones y calificaciones desde la terminal
+# ================================================
+
+import argparse
+import sys
+
+from database import get_db_cursor
+from exportaciones import COLUMNAS_EXPORTACION, consulta_exportacion, exportar_ndjson
+
+
+def exportar_copy_csv(filtros, salida):
+    """CSV directo con COPY ... TO STDOUT (el servidor genera el texto)"""
+    sql, params = consulta_exportacion(filtros)
+    with get_db_cursor(commit=False) as cursor:
+        consulta = cursor.mogrify(sql, params).decode('utf-8')
+        salida.write(','.join(COLUMNAS_EXPORTACION) + '\n')
+        cursor.copy_expert(f"COPY ({consulta}) TO STDOUT WITH (FORMAT csv)", salida)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exportar inscripciones con sus calificaciones')
+    parser.add_argument('--formato', choices=['csv', 'ndjson'], default='csv')
+    parser.add_argument('--periodo', help='Filtrar por periodo (ej. 2025-1)')
+    parser.add_argument('--grupo', type=int, help='Filtrar por id de grupo')
+    parser.add_argument('--estado', choices=['activa', 'baja', 'completada'])
+    parser.add_argument('--salida', help='Archivo de salida (default: stdout)')
+    args = parser.parse_args()
+
+    filtros = {'periodo': args.periodo, 'grupo_id': args.grupo, 'estado': args.estado}
+    salida = open(args.salida, 'w', encoding='utf-8', newline='') if args.salida else sys.stdout
+    try:
+        if args.formato == 'csv':
+            exportar_copy_csv(filtros, salida)
+        else:
+            for bloque in exportar_ndjson(filtros):
+                salida.write(bloque)
+    finally:
+        if args.salida:
+            salida.close()
+
+
+if __name__ == "__main__":
+    main()
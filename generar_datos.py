@@ -0,0 +1,334 @@
+# ================================================
+# EduTrack - generar_datos.py
+# Generador de datos sintéticos a escala (PostgreSQL con COPY, MongoDB con insert_many)
+# ================================================
+#
+# Datos reproducibles (--semilla) con sesgos realistas: materias y grupos
+# populares (Zipf), grupos populares llenos, profesores que escriben muchas
+# más notas que otros. Los triggers de usuario se desactivan durante la
+# carga y al final se reconstruyen contadores, agregados y catálogos.
+#
+#   python generar_datos.py --alumnos 200000 --grupos 5000 --notas 2000000 --periodos 8
+#   python generar_datos.py --alumnos 5000 --grupos 200 --notas 20000 --sin-mongo
+
+import argparse
+import io
+import time
+from datetime import datetime, timedelta
+
+import bcrypt
+import numpy as np
+from pymongo.errors import PyMongoError
+
+from database import get_db_cursor, get_notas_collection
+
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Sofía', 'Jorge', 'Lucía', 'Miguel', 'Valeria',
+           'Diego', 'Fernanda', 'José', 'Camila', 'Juan', 'Daniela', 'Pedro', 'Regina',
+           'Andrés', 'Paula', 'Ricardo', 'Ximena', 'Emilio', 'Renata', 'Santiago']
+APELLIDOS = ['García', 'Hernández', 'López', 'Martínez', 'González', 'Pérez', 'Rodríguez',
+             'Sánchez', 'Ramírez', 'Cruz', 'Flores', 'Gómez', 'Morales', 'Vázquez', 'Reyes',
+             'Jiménez', 'Torres', 'Díaz', 'Gutiérrez', 'Ruiz', 'Mendoza', 'Aguilar']
+CARRERAS = ['Ing. Sistemas', 'Ing. Software', 'Ing. Industrial', 'Administración',
+            'Contaduría', 'Derecho', 'Arquitectura', 'Psicología']
+DEPARTAMENTOS = ['Matemáticas', 'Computación', 'Sistemas', 'Ciencias Sociales', 'Economía']
+AREAS = ['Cálculo', 'Programación', 'Bases de Datos', 'Redes', 'Estadística', 'Física',
+         'Contabilidad', 'Economía', 'Derecho', 'Diseño', 'Psicología', 'Álgebra']
+
+# Tipo de nota -> (probabilidad, comentarios)
+NOTAS = {
+    'attendance': (0.5, ['Falta sin justificar', 'Llegó tarde a la clase',
+                         'Falta justificada por motivos médicos', 'Salió antes de terminar la clase']),
+    'performance': (0.3, ['Excelente participación en clase', 'No entregó la tarea',
+                          'Buen desempeño en el examen parcial', 'Necesita reforzar los ejercicios prácticos']),
+    'behavior': (0.2, ['Interrumpe constantemente la clase', 'Ayuda a sus compañeros',
+                       'Uso del celular durante el examen', 'Actitud respetuosa y colaborativa'])
+}
+SEGUIMIENTOS = ['Se habló con el alumno', 'Se notificó al tutor', 'Mejoró en la siguiente sesión',
+                'Se canalizó a asesoría académica']
+
+PASSWORD_PROFESORES = 'profesor123'
+NOTAS_POR_LOTE = 10000
+TABLAS_CON_TRIGGERS = ['materias', 'profesores', 'alumnos', 'grupos', 'inscripciones', 'calificaciones']
+
+
+# ================================================
+# UTILIDADES
+# ================================================
+def pesos_zipf(n, exponente, rng):
+    """Pesos 1/rango^s en orden aleatorio (qué elementos son populares cambia con la semilla)"""
+    pesos = 1.0 / np.arange(1, n + 1) ** exponente
+    rng.shuffle(pesos)
+    return pesos / pesos.sum()
+
+
+def nombre_periodo(indice):
+    """0 -> 2021-1, 1 -> 2021-2, 2 -> 2022-1, ..."""
+    return f"{2021 + indice // 2}-{indice % 2 + 1}"
+
+
+def inicio_periodo(indice):
+    return datetime(2021 + indice // 2, 1 if indice % 2 == 0 else 8, 15)
+
+
+def copiar(cursor, tabla, columnas, filas):
+    """COPY de filas (tuplas ya en texto; None -> NULL) a la tabla"""
+    buffer = io.StringIO()
+    for fila in filas:
+        buffer.write('\t'.join('\\N' if v is None else str(v) for v in fila))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN", buffer)
+
+
+def siguiente_id(cursor, tabla):
+    cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabla}")
+    return cursor.fetchone()[0] + 1
+
+
+def ajustar_secuencia(cursor, tabla):
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {tabla}))"
+    )
+
+
+def paso(mensaje, inicio):
+    print(f"✓ {mensaje} ({time.perf_counter() - inicio:.1f} s)")
+
+
+# ================================================
+# POSTGRESQL
+# ================================================
+def generar_postgres(args, rng):
+    """
+    Cargar todo en una transacción con COPY e ids asignados aquí.
+    Retorna lo que necesitan las notas: inscripciones (alumno, grupo),
+    profesor por grupo, usuario por profesor y periodo por grupo.
+    """
+    with get_db_cursor() as cursor:
+        for tabla in TABLAS_CON_TRIGGERS:
+            cursor.execute(f"ALTER TABLE {tabla} DISABLE TRIGGER USER")
+
+        # Materias
+        inicio = time.perf_counter()
+        base_materia = siguiente_id(cursor, 'materias')
+        materia_ids = np.arange(base_materia, base_materia + args.materias)
+        copiar(cursor, 'materias', ['id', 'nombre', 'descripcion', 'creditos'], (
+            (m, f"{AREAS[i % len(AREAS)]} {i // len(AREAS) + 1}", 'Materia generada', int(c))
+            for i, (m, c) in enumerate(zip(materia_ids, rng.integers(3, 7, size=args.materias)))
+        ))
+        paso(f"{args.materias} materias", inicio)
+
+        # Usuarios y profesores (mismo hash para todos: bcrypt es lento a propósito)
+        inicio = time.perf_counter()
+        password_hash = bcrypt.hashpw(PASSWORD_PROFESORES.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        base_usuario = siguiente_id(cursor, 'usuarios')
+        base_profesor = siguiente_id(cursor, 'profesores')
+        usuario_ids = np.arange(base_usuario, base_usuario + args.profesores)
+        profesor_ids = np.arange(base_profesor, base_profesor + args.profesores)
+        nombres_profesores = [
+            f"{NOMBRES[rng.integers(len(NOMBRES))]} {APELLIDOS[rng.integers(len(APELLIDOS))]}"
+            for _ in range(args.profesores)
+        ]
+        copiar(cursor, 'usuarios', ['id', 'username', 'password_hash', 'nombre_completo', 'email', 'rol'], (
+            (u, f"prof{u}", password_hash, nombre, f"prof{u}@edutrack.com", 'teacher')
+            for u, nombre in zip(usuario_ids, nombres_profesores)
+        ))
+        copiar(cursor, 'profesores', ['id', 'usuario_id', 'nombre', 'email', 'departamento'], (
+            (p, u, nombre, f"prof{u}@edutrack.com", DEPARTAMENTOS[i % len(DEPARTAMENTOS)])
+            for i, (p, u, nombre) in enumerate(zip(profesor_ids, usuario_ids, nombres_profesores))
+        ))
+        paso(f"{args.profesores} profesores (password: {PASSWORD_PROFESORES})", inicio)
+
+        # Alumnos
+        inicio = time.perf_counter()
+        base_alumno = siguiente_id(cursor, 'alumnos')
+        alumno_ids = np.arange(base_alumno, base_alumno + args.alumnos)
+        n1, a1, a2 = (rng.integers(len(lista), size=args.alumnos) for lista in (NOMBRES, APELLIDOS, APELLIDOS))
+        carreras = rng.integers(len(CARRERAS), size=args.alumnos)
+        semestres = rng.integers(1, 10, size=args.alumnos)
+        copiar(cursor, 'alumnos', ['id', 'matricula', 'nombre', 'email', 'carrera', 'semestre'], (
+            (a, f"A{a:08d}", f"{NOMBRES[n1[i]]} {APELLIDOS[a1[i]]} {APELLIDOS[a2[i]]}",
+             f"a{a}@alumnos.edu", CARRERAS[carreras[i]], semestres[i])
+            for i, a in enumerate(alumno_ids)
+        ))
+        paso(f"{args.alumnos} alumnos", inicio)
+
+        # Grupos: materias populares tienen más grupos; periodos repartidos
+        inicio = time.perf_counter()
+        base_grupo = siguiente_id(cursor, 'grupos')
+        grupo_ids = np.arange(base_grupo, base_grupo + args.grupos)
+        grupo_materia = rng.choice(materia_ids, size=args.grupos, p=pesos_zipf(args.materias, 1.0, rng))
+        grupo_profesor = rng.integers(args.profesores, size=args.grupos)
+        grupo_periodo = rng.integers(args.periodos, size=args.grupos)
+        grupo_cupo = rng.integers(20, 61, size=args.grupos)
+
+        # Inscripciones: solicitudes a grupos elegidos con sesgo Zipf; los grupos
+        # populares se llenan y el resto de solicitudes se descarta (el total
+        # queda limitado por la suma de cupos)
+        n_solicitudes = int(args.alumnos * args.inscripciones_por_alumno * 1.5)
+        popularidad = pesos_zipf(args.grupos, 0.8, rng)
+        sol_alumno = rng.integers(args.alumnos, size=n_solicitudes)
+        sol_grupo = rng.choice(args.grupos, size=n_solicitudes, p=popularidad)
+        _, unicos = np.unique(sol_alumno.astype(np.int64) * args.grupos + sol_grupo, return_index=True)
+        sol_alumno, sol_grupo = sol_alumno[unicos], sol_grupo[unicos]
+        orden = np.lexsort((rng.random(len(sol_grupo)), sol_grupo))
+        sol_alumno, sol_grupo = sol_alumno[orden], sol_grupo[orden]
+        primero = np.searchsorted(sol_grupo, sol_grupo, side='left')
+        aceptada = (np.arange(len(sol_grupo)) - primero) < grupo_cupo[sol_grupo]
+        insc_alumno, insc_grupo = sol_alumno[aceptada], sol_grupo[aceptada]
+        # Más allá de las inscripciones pedidas por alumno no hace falta cargar
+        limite = args.alumnos * args.inscripciones_por_alumno
+        if len(insc_alumno) > limite:
+            elegidas = np.sort(rng.choice(len(insc_alumno), size=limite, replace=False))
+            insc_alumno, insc_grupo = insc_alumno[elegidas], insc_grupo[elegidas]
+
+        # Periodos pasados: completada (3 % baja); periodo actual: activa
+        actual = args.periodos - 1
+        insc_periodo = grupo_periodo[insc_grupo]
+        baja = rng.random(len(insc_grupo)) < 0.03
+        estados = np.where(baja, 'baja', np.where(insc_periodo == actual, 'activa', 'completada'))
+        inscritos = np.bincount(insc_grupo[~baja], minlength=args.grupos)
+
+        copiar(cursor, 'grupos', ['id', 'materia_id', 'profesor_id', 'periodo', 'cupo_maximo',
+                                  'inscritos_count', 'version'], (
+            (grupo_ids[i], grupo_materia[i], profesor_ids[grupo_profesor[i]],
+             nombre_periodo(grupo_periodo[i]), grupo_cupo[i], inscritos[i], 1)
+            for i in range(args.grupos)
+        ))
+        llenos = int((inscritos >= grupo_cupo).sum())
+        paso(f"{args.grupos} grupos en {args.periodos} periodos ({llenos} llenos)", inicio)
+
+        inicio = time.perf_counter()
+        base_inscripcion = siguiente_id(cursor, 'inscripciones')
+        n_insc = len(insc_alumno)
+        inscripcion_ids = np.arange(base_inscripcion, base_inscripcion + n_insc)
+        desfase = rng.integers(0, 21, size=n_insc)
+        copiar(cursor, 'inscripciones', ['id', 'alumno_id', 'grupo_id', 'fecha_inscripcion', 'estado'], (
+            (inscripcion_ids[i], alumno_ids[insc_alumno[i]], grupo_ids[insc_grupo[i]],
+             (inicio_periodo(insc_periodo[i]) - timedelta(days=int(desfase[i]))).date().isoformat(),
+             estados[i])
+            for i in range(n_insc)
+        ))
+
+        # Calificaciones: completas en periodos pasados, solo parciales en el actual
+        notas_cal = np.clip(rng.normal(76, 12, size=(n_insc, 3)) + rng.normal(0, 6, size=(n_insc, 1)),
+                            0, 100).round(2)
+        en_curso = insc_periodo == actual
+        copiar(cursor, 'calificaciones', ['inscripcion_id', 'parcial1', 'parcial2', 'final'], (
+            (inscripcion_ids[i], notas_cal[i, 0],
+             None if en_curso[i] and desfase[i] % 2 else notas_cal[i, 1],
+             None if en_curso[i] else notas_cal[i, 2])
+            for i in range(n_insc)
+        ))
+        paso(f"{n_insc} inscripciones con calificaciones", inicio)
+
+        for tabla in ['usuarios'] + TABLAS_CON_TRIGGERS:
+            ajustar_secuencia(cursor, tabla)
+        for tabla in TABLAS_CON_TRIGGERS:
+            cursor.execute(f"ALTER TABLE {tabla} ENABLE TRIGGER USER")
+
+        # Lo que mantienen los triggers, reconstruido de una vez
+        inicio = time.perf_counter()
+        cursor.execute("SELECT recalcular_estadisticas_conteos()")
+        cursor.execute("SELECT recalcular_estadisticas_grupo(%s)", (grupo_ids.tolist(),))
+        cursor.execute("SELECT recalcular_grupos_catalogo()")
+        cursor.execute("UPDATE catalogo_versiones SET version = version + 1")
+        cursor.execute(f"ANALYZE {', '.join(['usuarios'] + TABLAS_CON_TRIGGERS + ['grupos_catalogo'])}")
+        paso("contadores, estadísticas por grupo y catálogo recalculados", inicio)
+
+    activas = ~baja
+    return {
+        'alumno': alumno_ids[insc_alumno[activas]],
+        'grupo': grupo_ids[insc_grupo[activas]],
+        'indice_grupo': insc_grupo[activas],
+        'grupo_profesor': grupo_profesor,
+        'grupo_periodo': grupo_periodo,
+        'usuario_ids': usuario_ids
+    }
+
+
+# ================================================
+# MONGODB
+# ================================================
+def generar_notas(args, rng, inscripciones):
+    """Notas sobre inscripciones reales; unos pocos profesores escriben la mayoría"""
+    inicio = time.perf_counter()
+    if not len(inscripciones['alumno']):
+        print("ℹ Sin inscripciones: no se generan notas")
+        return
+    notas = get_notas_collection()
+    try:
+        # El cliente conecta de forma perezosa: comprobar antes de generar
+        notas.database.command('ping')
+    except PyMongoError as e:
+        print(f"ℹ MongoDB no disponible ({type(e).__name__}): no se generan notas")
+        return
+
+    peso_profesor = pesos_zipf(args.profesores, 1.2, rng)
+    peso = peso_profesor[inscripciones['grupo_profesor'][inscripciones['indice_grupo']]]
+    peso = peso / peso.sum()
+    tipos = list(NOTAS)
+    prob_tipos = [NOTAS[t][0] for t in tipos]
+
+    insertadas = 0
+    for inicio_lote in range(0, args.notas, NOTAS_POR_LOTE):
+        n = min(NOTAS_POR_LOTE, args.notas - inicio_lote)
+        elegidas = rng.choice(len(peso), size=n, p=peso)
+        tipo_idx = rng.choice(len(tipos), size=n, p=prob_tipos)
+        comentario_idx = rng.integers(4, size=n)
+        dias = rng.integers(0, 120, size=n)
+        segundos = rng.integers(8 * 3600, 20 * 3600, size=n)
+        n_seguimientos = np.where(rng.random(n) < 0.1, rng.integers(1, 4, size=n), 0)
+
+        documentos = []
+        for i, e in enumerate(elegidas):
+            indice_grupo = inscripciones['indice_grupo'][e]
+            fecha = inicio_periodo(inscripciones['grupo_periodo'][indice_grupo]) + \
+                timedelta(days=int(dias[i]), seconds=int(segundos[i]))
+            tipo = tipos[tipo_idx[i]]
+            documentos.append({
+                'student_id': int(inscripciones['alumno'][e]),
+                'teacher_id': int(inscripciones['usuario_ids'][inscripciones['grupo_profesor'][indice_grupo]]),
+                'group_id': int(inscripciones['grupo'][e]),
+                'date': fecha,
+                'type': tipo,
+                'comment': NOTAS[tipo][1][comentario_idx[i]],
+                'datos_adicionales': {},
+                'seguimientos': [
+                    {'texto': SEGUIMIENTOS[(comentario_idx[i] + k) % len(SEGUIMIENTOS)],
+                     'autor': 'generador', 'fecha': fecha + timedelta(days=k + 1)}
+                    for k in range(n_seguimientos[i])
+                ],
+                'fecha_creacion': fecha,
+                'ultima_modificacion': fecha
+            })
+        insertadas += len(notas.insert_many(documentos, ordered=False).inserted_ids)
+
+    paso(f"{insertadas} notas en MongoDB", inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generar datos sintéticos de EduTrack')
+    parser.add_argument('--alumnos', type=int, default=20000)
+    parser.add_argument('--grupos', type=int, default=500)
+    parser.add_argument('--materias', type=int, default=None, help='Default: grupos / 10')
+    parser.add_argument('--profesores', type=int, default=None, help='Default: grupos / 5')
+    parser.add_argument('--periodos', type=int, default=4)
+    parser.add_argument('--inscripciones-por-alumno', type=int, default=5)
+    parser.add_argument('--notas', type=int, default=100000)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--sin-mongo', action='store_true', help='No generar notas')
+    args = parser.parse_args()
+    args.materias = args.materias or max(1, args.grupos // 10)
+    args.profesores = args.profesores or max(1, args.grupos // 5)
+
+    rng = np.random.default_rng(args.semilla)
+    inicio = time.perf_counter()
+    inscripciones = generar_postgres(args, rng)
+    if not args.sin_mongo:
+        generar_notas(args, rng, inscripciones)
+    print(f"\nDatos generados en {time.perf_counter() - inicio:.1f} s (semilla {args.semilla})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+# ================================================
+# EduTrack - instrumentacion.py
+# Métricas de peticiones y consultas (formato de texto de Prometheus)
+# ================================================
+#
+# - Latencia por ruta con hooks before/after_request de Flask.
+# - CursorInstrumentado: cursor de psycopg2 que mide cada execute y
+#   cuenta las consultas de la petición en curso.
+# - MonitorMongo: CommandListener de pymongo que mide cada comando.
+# - Registro de consultas lentas (SLOW_QUERY_MS) en el logger
+#   'edutrack.consultas_lentas'.
+#
+# Todo se agrega en memoria del proceso: una observación cuesta un
+# perf_counter, un bisect y un incremento bajo lock.
+
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+
+from flask import g, has_request_context, request
+from psycopg2.extensions import cursor as _cursor_base
+from pymongo import monitoring
+
+# Desactivar con INSTRUMENTACION=0
+INSTRUMENTACION = os.getenv('INSTRUMENTACION', '1') not in ('0', 'false', 'no')
+# Consultas (PostgreSQL o MongoDB) más lentas que esto se registran en el log
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+# Caracteres de SQL que se guardan en el log (sin parámetros)
+SLOW_QUERY_SQL_MAX = 500
+
+LIMITES_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_CONSULTA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+LIMITES_CONSULTAS_PETICION = (0, 1, 2, 5, 10, 20, 50, 100)
+
+logger_lentas = logging.getLogger('edutrack.consultas_lentas')
+
+_PRIMERA_PALABRA = re.compile(r'\s*(\w+)')
+
+
+# ================================================
+# MÉTRICAS
+# ================================================
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=''):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma acumulativo por combinación de etiquetas (seguro entre hilos)"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.limites = tuple(limites)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        # Índice del primer límite >= valor (los buckets son "<= le")
+        i = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valor
+
+    def exportar(self):
+        with self._lock:
+            series = [(k, list(v[0]), v[1]) for k, v in self._series.items()]
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, cuentas, suma in sorted(series):
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + (float('inf'),), cuentas):
+                acumulado += cuenta
+                le = '+Inf' if limite == float('inf') else _numero(limite)
+                etiquetas = _etiquetas(self.etiquetas, valores, 'le="' + le + '"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {suma!r}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}")
+        return lineas
+
+
+class Contador:
+    """Contador monotónico por combinación de etiquetas"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *etiquetas, cantidad=1):
+        with self._lock:
+            self._series[etiquetas] = self._series.get(etiquetas, 0) + cantidad
+
+    def exportar(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} counter"]
+        lineas += [f"{self.nombre}{_etiquetas(self.etiquetas, k)} {_numero(v)}" for k, v in series]
+        return lineas
+
+
+def formatear_gauge(nombre, ayuda, etiquetas, series):
+    """Líneas de un gauge calculado al momento (`series`: {valores_etiquetas: valor})"""
+    lineas = [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} gauge"]
+    lineas += [f"{nombre}{_etiquetas(etiquetas, k)} {_numero(v)}" for k, v in sorted(series.items())]
+    return lineas
+
+
+peticiones_duracion = Histograma(
+    'edutrack_http_request_duration_seconds',
+    'Latencia de las peticiones HTTP por ruta',
+    ('endpoint', 'method', 'status'), LIMITES_LATENCIA
+)
+peticiones_consultas = Histograma(
+    'edutrack_http_request_db_queries',
+    'Consultas a base de datos por petición HTTP',
+    ('endpoint', 'db'), LIMITES_CONSULTAS_PETICION
+)
+consultas_duracion = Histograma(
+    'edutrack_db_query_duration_seconds',
+    'Duración de cada consulta a PostgreSQL o comando de MongoDB',
+    ('db', 'operacion'), LIMITES_CONSULTA
+)
+consultas_errores = Contador(
+    'edutrack_db_query_errors_total',
+    'Consultas o comandos que terminaron en error',
+    ('db', 'operacion')
+)
+consultas_lentas = Contador(
+    'edutrack_db_slow_queries_total',
+    'Consultas más lentas que SLOW_QUERY_MS',
+    ('db', 'operacion')
+)
+
+METRICAS = [peticiones_duracion, peticiones_consultas, consultas_duracion,
+            consultas_errores, consultas_lentas]
+
+
+def exportar(*extra):
+    """Texto de exposición de Prometheus con todas las métricas (y líneas extra)"""
+    lineas = []
+    for metrica in METRICAS:
+        lineas += metrica.exportar()
+    for bloque in extra:
+        lineas += bloque
+    return '\n'.join(lineas) + '\n'
+
+
+# ================================================
+# REGISTRO DE CONSULTAS
+# ================================================
+def _contexto_peticion():
+    """Contadores de la petición en curso, o None fuera de una petición"""
+    if not has_request_context():
+        return None
+    return g.get('_instrumentacion')
+
+
+def registrar_consulta(db, operacion, duracion, detalle=None, error=False):
+    """Observar una consulta: histograma, contador por petición y log si es lenta"""
+    consultas_duracion.observar(duracion, db, operacion)
+    if error:
+        consultas_errores.incrementar(db, operacion)
+
+    contexto = _contexto_peticion()
+    if contexto is not None:
+        contexto[db] = contexto.get(db, 0) + 1
+
+    if duracion * 1000 >= SLOW_QUERY_MS:
+        consultas_lentas.incrementar(db, operacion)
+        logger_lentas.warning(
+            "%s %s %.1f ms ruta=%s %s", db, operacion, duracion * 1000,
+            request.endpoint if contexto is not None else '-', detalle or ''
+        )
+
+
+def _operacion_sql(consulta):
+    """Primera palabra del SQL en mayúsculas (SELECT, INSERT, WITH, ...)"""
+    if isinstance(consulta, bytes):
+        # execute_values manda el lote completo como bytes: basta el inicio
+        consulta = consulta[:64].decode('ascii', 'ignore')
+    elif not isinstance(consulta, str):
+        # sql.Composed: sólo se convierte si la consulta resulta lenta
+        return 'COMPUESTA'
+    encontrada = _PRIMERA_PALABRA.match(consulta)
+    return encontrada.group(1).upper() if encontrada else 'VACIA'
+
+
+def _texto_sql(consulta, cursor):
+    """SQL sin parámetros, recortado, para el log de consultas lentas"""
+    if not isinstance(consulta, (str, bytes)):
+        try:
+            consulta = consulta.as_string(cursor)
+        except Exception:
+            consulta = str(consulta)
+    if isinstance(consulta, bytes):
+        consulta = consulta.decode('utf-8', 'replace')
+    return ' '.join(consulta.split())[:SLOW_QUERY_SQL_MAX]
+
+
+def registrar_sql(consulta, duracion, error=False, cursor=None):
+    """Observar una consulta de PostgreSQL (psycopg2 o asyncpg)"""
+    detalle = _texto_sql(consulta, cursor) if duracion * 1000 >= SLOW_QUERY_MS else None
+    registrar_consulta('postgres', _operacion_sql(consulta), duracion, detalle, error)
+
+
+class CursorInstrumentado(_cursor_base):
+    """
+    Cursor de psycopg2 que mide execute/executemany. Se instala como
+    cursor_factory de las conexiones del pool, así que también cubre
+    execute_values y los cursores con nombre.
+    """
+
+    def _medir(self, metodo, consulta, vars):
+        inicio = time.perf_counter()
+        error = False
+        try:
+            return metodo(consulta, vars)
+        except BaseException:
+            error = True
+            raise
+        finally:
+            registrar_sql(consulta, time.perf_counter() - inicio, error, self)
+
+    def execute(self, query, vars=None):
+        return self._medir(super().execute, query, vars)
+
+    def executemany(self, query, vars_list):
+        return self._medir(super().executemany, query, vars_list)
+
+
+class MonitorMongo(monitoring.CommandListener):
+    """Duración de cada comando de MongoDB (find, aggregate, insert, ...)"""
+
+    def __init__(self):
+        # Colección de cada comando en vuelo, para el log de lentas
+        self._colecciones = {}
+
+    def started(self, event):
+        coleccion = event.command.get(event.command_name)
+        if isinstance(coleccion, str):
+            self._colecciones[(event.connection_id, event.request_id)] = coleccion
+
+    def succeeded(self, event):
+        self._registrar(event, False)
+
+    def failed(self, event):
+        self._registrar(event, True)
+
+    def _registrar(self, event, error):
+        duracion = event.duration_micros / 1e6
+        coleccion = self._colecciones.pop((event.connection_id, event.request_id), '')
+        # Sólo base y colección: los filtros pueden contener datos de alumnos
+        detalle = f"{event.database_name}.{coleccion}" if duracion * 1000 >= SLOW_QUERY_MS else None
+        registrar_consulta('mongo', event.command_name, duracion, detalle, error)
+
+
+def cursor_factory():
+    """cursor_factory para psycopg2.connect (None si la instrumentación está apagada)"""
+    return CursorInstrumentado if INSTRUMENTACION else None
+
+
+def listeners_mongo():
+    """event_listeners para MongoClient"""
+    return [MonitorMongo()] if INSTRUMENTACION else []
+
+
+# ================================================
+# FLASK
+# ================================================
+def _antes_de_peticion():
+    g._instrumentacion = {'inicio': time.perf_counter()}
+
+
+def _despues_de_peticion(respuesta):
+    contexto = g.pop('_instrumentacion', None)
+    if contexto is None:
+        return respuesta
+    duracion = time.perf_counter() - contexto['inicio']
+    endpoint = request.endpoint or 'sin_ruta'
+    peticiones_duracion.observar(duracion, endpoint, request.method, str(respuesta.status_code))
+    for db in ('postgres', 'mongo'):
+        peticiones_consultas.observar(contexto.get(db, 0), endpoint, db)
+    respuesta.headers['Server-Timing'] = f"app;dur={duracion * 1000:.1f}"
+    return respuesta
+
+
+def init_app(app):
+    """Registrar los hooks de latencia por ruta en la aplicación"""
+    if INSTRUMENTACION:
+        app.before_request(_antes_de_peticion)
+        app.after_request(_despues_de_peticion)
@@ -0,0 +1,819 @@
+# ================================================
+# EduTrack - models_async.py
+# Modelos asyncio (asyncpg + motor) con la misma API que los síncronos
+# ================================================
+#
+# Mismos nombres de método, argumentos y formas de retorno que
+# models_auth, models_inscripciones y models_notas, pero como corrutinas:
+#
+#   grupo = await Grupo.obtener_por_id(grupo_id)
+#   exito, mensaje, inscripcion_id = await Inscripcion.inscribir_atomica(grupo_id, alumno_id)
+#
+# Las cachés del proceso (usuarios, sesiones, tablero, estadísticas) son
+# las mismas que usan los modelos síncronos, así que una invalidación en
+# un lado vale para el otro.
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+import secrets
+
+import asyncpg
+import bcrypt
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+import catalogos
+from cache import CacheTTL
+from database_async import get_db_connection, get_notas_collection, get_sesiones_collection
+from estadisticas import EstadisticasDashboard
+from models_auth import (_cache_sesiones, _cache_usuarios, SESION_CACHE_NEGATIVA_TTL,
+                         SESION_CACHE_TTL)
+from models_inscripciones import (CATALOGO_GRUPOS_TTL, INSCRIPCION_BACKOFF_MS,
+                                  INSCRIPCION_MAX_REINTENTOS)
+from models_inscripciones import Inscripcion as _InscripcionSync
+from models_notas import (CODIGO_INDICE_NO_ENCONTRADO, NOTAS_LIMITE_MAXIMO, NOTAS_POR_PAGINA,
+                          PROYECCION_RESUMEN)
+from models_notas import NotaEstudiante as _NotaSync
+
+# Equivalente de psycopg2.Error para los mensajes "Error: ..."
+ERRORES_POSTGRES = (asyncpg.PostgresError, asyncpg.InterfaceError)
+
+# Catálogo de grupos de este stack: sólo TTL (sin versiones de catálogo)
+_cache_grupos = CacheTTL(max_entradas=4, ttl=CATALOGO_GRUPOS_TTL)
+
+
+def _invalidar_grupos():
+    EstadisticasDashboard.invalidar()
+    catalogos.invalidar('grupos')
+    _cache_grupos.limpiar()
+
+
+# ================================================
+# USUARIOS Y SESIONES
+# ================================================
+class Usuario:
+    """Modelo de usuario con autenticación (asyncio)"""
+
+    @staticmethod
+    async def crear_usuario(username, password, nombre_completo, email, rol):
+        """Crear nuevo usuario con hash de password"""
+        # bcrypt es CPU intensivo: fuera del event loop
+        password_hash = (await asyncio.to_thread(
+            bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt()
+        )).decode('utf-8')
+
+        async with get_db_connection() as conn:
+            return await conn.fetchval(
+                """INSERT INTO usuarios (username, password_hash, nombre_completo, email, rol)
+                   VALUES ($1, $2, $3, $4, $5) RETURNING id""",
+                username, password_hash, nombre_completo, email, rol
+            )
+
+    @staticmethod
+    async def autenticar(username, password):
+        """Autenticar usuario y retornar sus datos si es válido"""
+        async with get_db_connection() as conn:
+            result = await conn.fetchrow(
+                """SELECT id, username, password_hash, nombre_completo, email, rol, activo
+                   FROM usuarios WHERE username = $1""",
+                username
+            )
+
+        if result and result[6]:  # Usuario existe y está activo
+            user_id, username, password_hash, nombre, email, rol, activo = result
+            if await asyncio.to_thread(bcrypt.checkpw, password.encode('utf-8'),
+                                       password_hash.encode('utf-8')):
+                return {
+                    'id': user_id,
+                    'username': username,
+                    'nombre_completo': nombre,
+                    'email': email,
+                    'rol': rol
+                }
+        return None
+
+    @staticmethod
+    async def obtener_por_id(user_id):
+        """Obtener usuario por ID"""
+        async with get_db_connection() as conn:
+            result = await conn.fetchrow(
+                """SELECT id, username, nombre_completo, email, rol, activo
+                   FROM usuarios WHERE id = $1""",
+                user_id
+            )
+        if result:
+            return {
+                'id': result[0],
+                'username': result[1],
+                'nombre_completo': result[2],
+                'email': result[3],
+                'rol': result[4],
+                'activo': result[5]
+            }
+        return None
+
+    @staticmethod
+    async def obtener_por_id_cache(user_id):
+        """Obtener usuario por ID usando la caché del proceso"""
+        user = _cache_usuarios.obtener(user_id)
+        if user is None:
+            user = await Usuario.obtener_por_id(user_id)
+            if user is None:
+                return None
+            _cache_usuarios.guardar(user_id, user)
+        return dict(user)
+
+    @staticmethod
+    async def actualizar_rol_estado(user_id, rol, activo):
+        """Cambiar rol y estado de un usuario e invalidar su caché"""
+        async with get_db_connection() as conn:
+            estado = await conn.execute(
+                "UPDATE usuarios SET rol = $1, activo = $2 WHERE id = $3",
+                rol, activo, user_id
+            )
+        Usuario.invalidar_cache(user_id)
+        return estado != 'UPDATE 0'
+
+    @staticmethod
+    def invalidar_cache(user_id):
+        """Descartar el usuario de la caché del proceso"""
+        _cache_usuarios.invalidar(user_id)
+
+    @staticmethod
+    async def listar_usuarios():
+        """Listar todos los usuarios"""
+        async with get_db_connection() as conn:
+            filas = await conn.fetch(
+                """SELECT id, username, nombre_completo, email, rol, activo, fecha_creacion
+                   FROM usuarios ORDER BY id"""
+            )
+        return [
+            {
+                'id': row[0],
+                'username': row[1],
+                'nombre_completo': row[2],
+                'email': row[3],
+                'rol': row[4],
+                'activo': row[5],
+                'fecha_creacion': row[6]
+            }
+            for row in filas
+        ]
+
+    @staticmethod
+    async def listar_todos():
+        """Alias de listar_usuarios() para compatibilidad"""
+        return await Usuario.listar_usuarios()
+
+
+class Sesion:
+    """Sesiones en MongoDB con la caché de tokens del proceso (asyncio)"""
+
+    @staticmethod
+    async def crear_sesion(usuario_id, duracion_horas=24):
+        """Crear token de sesión en MongoDB"""
+        token = secrets.token_urlsafe(32)
+        ahora = datetime.utcnow()
+
+        sesion_data = {
+            'token': token,
+            'usuario_id': usuario_id,
+            'fecha_creacion': ahora,
+            'fecha_expiracion': ahora + timedelta(hours=duracion_horas)
+        }
+
+        await get_sesiones_collection().insert_one(sesion_data)
+        _cache_sesiones.guardar(token, (usuario_id, sesion_data['fecha_expiracion']))
+        return token
+
+    @staticmethod
+    async def validar_sesion(token):
+        """Validar token de sesión y retornar usuario_id si es válido"""
+        if not token:
+            return None
+
+        ahora = datetime.utcnow()
+        entrada = _cache_sesiones.obtener(token)
+        if entrada is False:
+            return None
+        if entrada is not None:
+            usuario_id, fecha_expiracion = entrada
+            if fecha_expiracion > ahora:
+                return usuario_id
+            _cache_sesiones.guardar(token, False, SESION_CACHE_NEGATIVA_TTL)
+            return None
+
+        sesion = await get_sesiones_collection().find_one(
+            {'token': token, 'fecha_expiracion': {'$gt': ahora}},
+            {'_id': 0, 'usuario_id': 1, 'fecha_expiracion': 1}
+        )
+
+        if sesion:
+            _cache_sesiones.guardar(token, (sesion['usuario_id'], sesion['fecha_expiracion']))
+            return sesion['usuario_id']
+        _cache_sesiones.guardar(token, False, SESION_CACHE_NEGATIVA_TTL)
+        return None
+
+    @staticmethod
+    async def eliminar_sesion(token):
+        """Eliminar sesión (logout)"""
+        await get_sesiones_collection().delete_one({'token': token})
+        _cache_sesiones.guardar(token, False, SESION_CACHE_TTL)
+
+    @staticmethod
+    async def limpiar_sesiones_expiradas():
+        """Eliminar sesiones expiradas (el índice TTL ya lo hace en segundo plano)"""
+        result = await get_sesiones_collection().delete_many(
+            {'fecha_expiracion': {'$lt': datetime.utcnow()}}
+        )
+        return result.deleted_count
+
+
+# ================================================
+# GRUPOS E INSCRIPCIONES
+# ================================================
+class Grupo:
+    """Grupos y catálogo de grupos (asyncio)"""
+
+    @staticmethod
+    async def crear(materia_id, profesor_id, periodo, cupo_maximo):
+        """Crear nuevo grupo"""
+        async with get_db_connection() as conn:
+            grupo_id = await conn.fetchval(
+                """INSERT INTO grupos (materia_id, profesor_id, periodo, cupo_maximo)
+                   VALUES ($1, $2, $3, $4) RETURNING id""",
+                materia_id, profesor_id, periodo, cupo_maximo
+            )
+        _invalidar_grupos()
+        return grupo_id
+
+    @staticmethod
+    async def listar_disponibles(periodo=None, estado=None, limite=None, desplazamiento=0):
+        """
+        Listar grupos desde grupos_catalogo, ordenados por materia y periodo.
+        Mismos filtros y paginación que Grupo.listar_disponibles síncrono.
+        """
+        condiciones = []
+        params = []
+        if periodo:
+            params.append(periodo)
+            condiciones.append(f"periodo = ${len(params)}")
+        if estado:
+            params.append(estado)
+            condiciones.append(f"estado_cupo = ${len(params)}")
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        paginacion = ""
+        if limite is not None:
+            params.extend([max(1, int(limite)), max(0, int(desplazamiento))])
+            paginacion = f"LIMIT ${len(params) - 1} OFFSET ${len(params)}"
+
+        async with get_db_connection() as conn:
+            filas = await conn.fetch(
+                f"""SELECT grupo_id, materia, profesor, periodo,
+                           cupo_maximo, inscritos_count, cupos_disponibles,
+                           version, estado_cupo
+                    FROM grupos_catalogo
+                    {where}
+                    ORDER BY materia, periodo, grupo_id
+                    {paginacion}""",
+                *params
+            )
+        return [
+            {
+                'id': row[0],
+                'materia': row[1],
+                'profesor': row[2],
+                'periodo': row[3],
+                'cupo_maximo': row[4],
+                'inscritos': row[5],
+                'disponibles': row[6],
+                'version': row[7],
+                'estado': row[8]
+            }
+            for row in filas
+        ]
+
+    @staticmethod
+    async def listar_disponibles_cache():
+        """Grupos para listas de selección; hasta CATALOGO_GRUPOS_TTL segundos de atraso"""
+        grupos = _cache_grupos.obtener('grupos')
+        if grupos is None:
+            grupos = await Grupo.listar_disponibles()
+            _cache_grupos.guardar('grupos', grupos)
+        return grupos
+
+    @staticmethod
+    async def obtener_por_id(grupo_id):
+        """Obtener grupo con su versión actual"""
+        async with get_db_connection() as conn:
+            row = await conn.fetchrow(
+                """SELECT g.id, m.nombre, p.nombre, g.periodo,
+                          g.cupo_maximo, g.inscritos_count, g.version
+                   FROM grupos g
+                   JOIN materias m ON g.materia_id = m.id
+                   LEFT JOIN profesores p ON g.profesor_id = p.id
+                   WHERE g.id = $1""",
+                grupo_id
+            )
+        if row:
+            return {
+                'id': row[0],
+                'materia': row[1],
+                'profesor': row[2],
+                'periodo': row[3],
+                'cupo_maximo': row[4],
+                'inscritos': row[5],
+                'version': row[6]
+            }
+        return None
+
+
+class Inscripcion:
+    """Inscripciones con control de concurrencia (asyncio)"""
+
+    @staticmethod
+    async def _ya_inscrito(conn, alumno_id, grupo_id):
+        return await conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM inscripciones WHERE alumno_id = $1 AND grupo_id = $2)",
+            alumno_id, grupo_id
+        )
+
+    @staticmethod
+    async def _insertar(conn, alumno_id, grupo_id):
+        """Insertar la inscripción y su fila de calificaciones; retorna el id"""
+        inscripcion_id = await conn.fetchval(
+            "INSERT INTO inscripciones (alumno_id, grupo_id) VALUES ($1, $2) RETURNING id",
+            alumno_id, grupo_id
+        )
+        await conn.execute("INSERT INTO calificaciones (inscripcion_id) VALUES ($1)", inscripcion_id)
+        return inscripcion_id
+
+    @staticmethod
+    async def inscribir_optimista(grupo_id, alumno_id, version_esperada):
+        """
+        Inscribir con concurrencia OPTIMISTA.
+        Retorna (exito, mensaje, inscripcion_id)
+        """
+        try:
+            async with get_db_connection() as conn:
+                async with conn.transaction():
+                    result = await conn.fetchrow(
+                        "SELECT cupo_maximo, inscritos_count, version FROM grupos WHERE id = $1",
+                        grupo_id
+                    )
+                    if not result:
+                        return (False, "Grupo no encontrado", None)
+
+                    cupo_maximo, inscritos, version = result
+                    if version != version_esperada:
+                        return (False, "Conflicto: el grupo fue modificado. Intente nuevamente.", None)
+                    if await Inscripcion._ya_inscrito(conn, alumno_id, grupo_id):
+                        return (False, "El alumno ya está inscrito en este grupo", None)
+                    if inscritos >= cupo_maximo:
+                        return (False, f"Cupo lleno ({inscritos}/{cupo_maximo})", None)
+
+                    estado = await conn.execute(
+                        """UPDATE grupos
+                           SET inscritos_count = $1, version = version + 1
+                           WHERE id = $2 AND version = $3""",
+                        inscritos + 1, grupo_id, version_esperada
+                    )
+                    if estado == 'UPDATE 0':
+                        return (False, "Conflicto al actualizar. Intente nuevamente.", None)
+
+                    inscripcion_id = await Inscripcion._insertar(conn, alumno_id, grupo_id)
+
+            _invalidar_grupos()
+            return (True, "Inscripción exitosa (método optimista)", inscripcion_id)
+
+        except ERRORES_POSTGRES as e:
+            return (False, f"Error: {str(e)}", None)
+
+    @staticmethod
+    async def inscribir_optimista_con_reintentos(grupo_id, alumno_id, max_reintentos=None):
+        """
+        Inscribir con concurrencia OPTIMISTA, reintentando los conflictos de
+        versión con espera exponencial aleatoria (sin bloquear el event loop).
+        Retorna (exito, mensaje, inscripcion_id, reintentos)
+        """
+        if max_reintentos is None:
+            max_reintentos = INSCRIPCION_MAX_REINTENTOS
+
+        reintentos = 0
+        try:
+            async with get_db_connection() as conn:
+                while True:
+                    transaccion = conn.transaction()
+                    await transaccion.start()
+                    try:
+                        result = await conn.fetchrow(
+                            "SELECT cupo_maximo, inscritos_count, version FROM grupos WHERE id = $1",
+                            grupo_id
+                        )
+                        if not result:
+                            await transaccion.rollback()
+                            return (False, "Grupo no encontrado", None, reintentos)
+
+                        cupo_maximo, inscritos, version = result
+                        if await Inscripcion._ya_inscrito(conn, alumno_id, grupo_id):
+                            await transaccion.rollback()
+                            return (False, "El alumno ya está inscrito en este grupo", None, reintentos)
+                        if inscritos >= cupo_maximo:
+                            await transaccion.rollback()
+                            return (False, f"Cupo lleno ({inscritos}/{cupo_maximo})", None, reintentos)
+
+                        estado = await conn.execute(
+                            """UPDATE grupos
+                               SET inscritos_count = inscritos_count + 1, version = version + 1
+                               WHERE id = $1 AND version = $2
+                                 AND inscritos_count < cupo_maximo""",
+                            grupo_id, version
+                        )
+                        if estado != 'UPDATE 0':
+                            inscripcion_id = await Inscripcion._insertar(conn, alumno_id, grupo_id)
+                            await transaccion.commit()
+                            break
+                        await transaccion.rollback()
+                    except BaseException:
+                        await transaccion.rollback()
+                        raise
+
+                    # Conflicto: esperar antes de reintentar
+                    if reintentos >= max_reintentos:
+                        _InscripcionSync._registrar_reintentos(reintentos, agotado=True)
+                        return (False, "Conflicto: el grupo fue modificado. Intente nuevamente.",
+                                None, reintentos)
+                    reintentos += 1
+                    espera = INSCRIPCION_BACKOFF_MS * (2 ** (reintentos - 1))
+                    await asyncio.sleep(random.uniform(0, espera) / 1000.0)
+
+            _InscripcionSync._registrar_reintentos(reintentos)
+            _invalidar_grupos()
+            return (True, "Inscripción exitosa (método optimista)", inscripcion_id, reintentos)
+
+        except ERRORES_POSTGRES as e:
+            return (False, f"Error: {str(e)}", None, reintentos)
+
+    @staticmethod
+    def estadisticas_reintentos():
+        """Contadores de reintentos optimistas (compartidos con el stack síncrono)"""
+        return _InscripcionSync.estadisticas_reintentos()
+
+    @staticmethod
+    async def inscribir_pesimista(grupo_id, alumno_id):
+        """
+        Inscribir con concurrencia PESIMISTA (SELECT ... FOR UPDATE).
+        Retorna (exito, mensaje, inscripcion_id)
+        """
+        try:
+            async with get_db_connection() as conn:
+                async with conn.transaction():
+                    result = await conn.fetchrow(
+                        "SELECT cupo_maximo, inscritos_count FROM grupos WHERE id = $1 FOR UPDATE",
+                        grupo_id
+                    )
+                    if not result:
+                        return (False, "Grupo no encontrado", None)
+
+                    cupo_maximo, inscritos = result
+                    if await Inscripcion._ya_inscrito(conn, alumno_id, grupo_id):
+                        return (False, "El alumno ya está inscrito en este grupo", None)
+                    if inscritos >= cupo_maximo:
+                        return (False, f"Cupo lleno ({inscritos}/{cupo_maximo})", None)
+
+                    await conn.execute(
+                        """UPDATE grupos
+                           SET inscritos_count = inscritos_count + 1, version = version + 1
+                           WHERE id = $1""",
+                        grupo_id
+                    )
+                    inscripcion_id = await Inscripcion._insertar(conn, alumno_id, grupo_id)
+
+            _invalidar_grupos()
+            return (True, "Inscripción exitosa (método pesimista)", inscripcion_id)
+
+        except ERRORES_POSTGRES as e:
+            return (False, f"Error: {str(e)}", None)
+
+    @staticmethod
+    async def inscribir_atomica(grupo_id, alumno_id):
+        """
+        Inscribir con una sola sentencia ATÓMICA (misma CTE que el stack síncrono).
+        Retorna (exito, mensaje, inscripcion_id)
+        """
+        try:
+            async with get_db_connection() as conn:
+                transaccion = conn.transaction()
+                await transaccion.start()
+                try:
+                    row = await conn.fetchrow(
+                        """WITH cupo AS (
+                               UPDATE grupos
+                               SET inscritos_count = inscritos_count + 1, version = version + 1
+                               WHERE id = $1
+                                 AND inscritos_count < cupo_maximo
+                                 AND NOT EXISTS (
+                                     SELECT 1 FROM inscripciones
+                                     WHERE alumno_id = $2 AND grupo_id = $1
+                                 )
+                               RETURNING id
+                           ), nueva AS (
+                               INSERT INTO inscripciones (alumno_id, grupo_id)
+                               SELECT $2, id FROM cupo
+                               ON CONFLICT (alumno_id, grupo_id) DO NOTHING
+                               RETURNING id
+                           ), calificacion AS (
+                               INSERT INTO calificaciones (inscripcion_id)
+                               SELECT id FROM nueva
+                           )
+                           SELECT (SELECT id FROM cupo), (SELECT id FROM nueva),
+                                  g.cupo_maximo, g.inscritos_count,
+                                  EXISTS (
+                                      SELECT 1 FROM inscripciones
+                                      WHERE alumno_id = $2 AND grupo_id = $1
+                                  )
+                           FROM (SELECT 1) AS uno
+                           LEFT JOIN grupos g ON g.id = $1""",
+                        grupo_id, alumno_id
+                    )
+                except BaseException:
+                    await transaccion.rollback()
+                    raise
+
+                reservado, inscripcion_id, cupo_maximo, inscritos, ya_inscrito = row
+                if inscripcion_id:
+                    await transaccion.commit()
+                    _invalidar_grupos()
+                    return (True, "Inscripción exitosa (método atómico)", inscripcion_id)
+
+                # Sin inscripción no hay nada que conservar (y si hubo reserva,
+                # el incremento del contador debe deshacerse)
+                await transaccion.rollback()
+                if reservado:
+                    return (False, "El alumno ya está inscrito en este grupo", None)
+                if cupo_maximo is None:
+                    return (False, "Grupo no encontrado", None)
+                if ya_inscrito:
+                    return (False, "El alumno ya está inscrito en este grupo", None)
+                return (False, f"Cupo lleno ({inscritos}/{cupo_maximo})", None)
+
+        except ERRORES_POSTGRES as e:
+            return (False, f"Error: {str(e)}", None)
+
+    @staticmethod
+    async def inscribir_lote(pares):
+        """
+        Inscribir muchos pares (alumno_id, grupo_id) en una sola transacción,
+        con los grupos bloqueados en orden de id e INSERT ... SELECT unnest().
+        Retorna una lista con el resultado de cada par, en el mismo orden.
+        """
+        resultados = [
+            {'alumno_id': alumno_id, 'grupo_id': grupo_id,
+             'exito': False, 'mensaje': None, 'inscripcion_id': None}
+            for alumno_id, grupo_id in pares
+        ]
+        if not resultados:
+            return resultados
+
+        grupo_ids = sorted({r['grupo_id'] for r in resultados})
+        alumno_ids = sorted({r['alumno_id'] for r in resultados})
+
+        try:
+            async with get_db_connection() as conn:
+                async with conn.transaction():
+                    filas = await conn.fetch(
+                        """SELECT id, cupo_maximo, inscritos_count
+                           FROM grupos WHERE id = ANY($1::int[])
+                           ORDER BY id
+                           FOR UPDATE""",
+                        grupo_ids
+                    )
+                    grupos = {row[0]: [row[1], row[2]] for row in filas}
+
+                    filas = await conn.fetch("SELECT id FROM alumnos WHERE id = ANY($1::int[])",
+                                             alumno_ids)
+                    alumnos = {row[0] for row in filas}
+
+                    filas = await conn.fetch(
+                        """SELECT i.alumno_id, i.grupo_id
+                           FROM inscripciones i
+                           JOIN unnest($1::int[], $2::int[]) AS p(alumno_id, grupo_id)
+                             ON i.alumno_id = p.alumno_id AND i.grupo_id = p.grupo_id""",
+                        [r['alumno_id'] for r in resultados], [r['grupo_id'] for r in resultados]
+                    )
+                    existentes = {(row[0], row[1]) for row in filas}
+
+                    aceptados = _InscripcionSync._asignar_lugares(resultados, grupos, alumnos,
+                                                                   existentes)
+                    if not aceptados:
+                        return resultados
+
+                    # Un par inscrito en paralelo tras la comprobación se omite
+                    filas = await conn.fetch(
+                        """INSERT INTO inscripciones (alumno_id, grupo_id)
+                           SELECT * FROM unnest($1::int[], $2::int[])
+                           ON CONFLICT (alumno_id, grupo_id) DO NOTHING
+                           RETURNING id, alumno_id, grupo_id""",
+                        [r['alumno_id'] for r in aceptados], [r['grupo_id'] for r in aceptados]
+                    )
+                    ids = {(row[1], row[2]): row[0] for row in filas}
+                    await conn.execute(
+                        "INSERT INTO calificaciones (inscripcion_id) SELECT unnest($1::int[])",
+                        list(ids.values())
+                    )
+
+                    incrementos = {}
+                    for alumno_id, grupo_id in ids:
+                        incrementos[grupo_id] = incrementos.get(grupo_id, 0) + 1
+                    await conn.execute(
+                        """UPDATE grupos g
+                           SET inscritos_count = g.inscritos_count + v.cantidad,
+                               version = g.version + 1
+                           FROM unnest($1::int[], $2::int[]) AS v(id, cantidad)
+                           WHERE g.id = v.id""",
+                        sorted(incrementos), [incrementos[g] for g in sorted(incrementos)]
+                    )
+
+                    for r in aceptados:
+                        inscripcion_id = ids.get((r['alumno_id'], r['grupo_id']))
+                        if inscripcion_id is None:
+                            r['mensaje'] = "El alumno ya está inscrito en este grupo"
+                            continue
+                        r['exito'] = True
+                        r['mensaje'] = "Inscripción exitosa (lote)"
+                        r['inscripcion_id'] = inscripcion_id
+
+            _invalidar_grupos()
+            return resultados
+
+        except ERRORES_POSTGRES as e:
+            for r in resultados:
+                r['exito'] = False
+                r['mensaje'] = f"Error: {str(e)}"
+                r['inscripcion_id'] = None
+            return resultados
+
+    @staticmethod
+    async def listar_por_alumno(alumno_id):
+        """Listar inscripciones de un alumno"""
+        async with get_db_connection() as conn:
+            filas = await conn.fetch(
+                """SELECT i.id, m.nombre, p.nombre, g.periodo, i.fecha_inscripcion
+                   FROM inscripciones i
+                   JOIN grupos g ON i.grupo_id = g.id
+                   JOIN materias m ON g.materia_id = m.id
+                   LEFT JOIN profesores p ON g.profesor_id = p.id
+                   WHERE i.alumno_id = $1 AND i.estado = 'activa'
+                   ORDER BY i.fecha_inscripcion DESC""",
+                alumno_id
+            )
+        return [
+            {
+                'id': row[0],
+                'materia': row[1],
+                'profesor': row[2],
+                'periodo': row[3],
+                'fecha': row[4]
+            }
+            for row in filas
+        ]
+
+
+# ================================================
+# NOTAS
+# ================================================
+class NotaEstudiante:
+    """Notas de estudiantes en MongoDB (motor)"""
+
+    @staticmethod
+    async def crear(student_id, teacher_id, group_id, tipo, comentario, datos_adicionales=None):
+        """Crear nueva nota de estudiante"""
+        ahora = datetime.utcnow()
+        documento = {
+            'student_id': student_id,
+            'teacher_id': teacher_id,
+            'group_id': group_id,
+            'date': ahora,
+            'type': tipo,
+            'comment': comentario,
+            'datos_adicionales': datos_adicionales or {},
+            'seguimientos': [],
+            'fecha_creacion': ahora,
+            'ultima_modificacion': ahora
+        }
+
+        result = await get_notas_collection().insert_one(documento)
+        NotaEstudiante.invalidar_tablero()
+        return str(result.inserted_id)
+
+    @staticmethod
+    async def listar(filtros=None, limite=NOTAS_LIMITE_MAXIMO):
+        """Listar notas (resumen, más recientes primero) con filtros opcionales"""
+        return (await NotaEstudiante.listar_pagina(filtros, limite=limite))['notas']
+
+    @staticmethod
+    async def listar_pagina(filtros=None, cursor=None, direccion='siguiente', limite=NOTAS_POR_PAGINA):
+        """
+        Listar notas con paginación por rango sobre (date, _id).
+        Retorna {'notas': [...], 'siguiente': token, 'anterior': token}
+        """
+        limite = max(1, min(int(limite), NOTAS_LIMITE_MAXIMO))
+        query, orden, llave, hacia_atras = _NotaSync._consulta_pagina(filtros, cursor, direccion)
+
+        documentos = await get_notas_collection().find(query, PROYECCION_RESUMEN).sort(
+            orden
+        ).limit(limite + 1).to_list(length=limite + 1)
+        return _NotaSync._armar_pagina(documentos, limite, llave, hacia_atras)
+
+    @staticmethod
+    async def obtener_por_id(nota_id):
+        """Obtener nota por ID"""
+        try:
+            doc = await get_notas_collection().find_one({'_id': ObjectId(nota_id)})
+            if doc:
+                doc['_id'] = str(doc['_id'])
+                return doc
+        except Exception:
+            pass
+
+        return None
+
+    @staticmethod
+    async def actualizar(nota_id, datos_actualizacion):
+        """Actualizar nota"""
+        datos_actualizacion['ultima_modificacion'] = datetime.utcnow()
+
+        try:
+            result = await get_notas_collection().update_one(
+                {'_id': ObjectId(nota_id)},
+                {'$set': datos_actualizacion}
+            )
+            NotaEstudiante.invalidar_tablero()
+            return result.modified_count > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    async def agregar_seguimiento(nota_id, texto, autor):
+        """Agregar seguimiento a una nota existente"""
+        ahora = datetime.utcnow()
+        try:
+            result = await get_notas_collection().update_one(
+                {'_id': ObjectId(nota_id)},
+                {
+                    '$push': {'seguimientos': {'texto': texto, 'autor': autor, 'fecha': ahora}},
+                    '$set': {'ultima_modificacion': ahora}
+                }
+            )
+            return result.modified_count > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    async def buscar_por_texto(texto_busqueda, filtros=None, limite=NOTAS_POR_PAGINA, saltar=0):
+        """Búsqueda de texto en comentarios y seguimientos, por relevancia"""
+        query = _NotaSync._construir_filtro(filtros)
+        query['$text'] = {'$search': texto_busqueda[:200], '$language': 'spanish'}
+        limite = max(1, min(int(limite), NOTAS_LIMITE_MAXIMO))
+
+        try:
+            documentos = await get_notas_collection().find(
+                query,
+                {**PROYECCION_RESUMEN, 'score': {'$meta': 'textScore'}}
+            ).sort([
+                ('score', {'$meta': 'textScore'}),
+                ('date', -1)
+            ]).skip(max(0, saltar)).limit(limite + 1).to_list(length=limite + 1)
+        except OperationFailure as e:
+            if e.code == CODIGO_INDICE_NO_ENCONTRADO:
+                error = "La búsqueda de texto no está disponible: faltan los índices de MongoDB"
+            else:
+                error = f"Error en la búsqueda de texto: {e}"
+            return {'notas': [], 'hay_mas': False, 'error': error}
+
+        for doc in documentos:
+            doc['_id'] = str(doc['_id'])
+        return {'notas': documentos[:limite], 'hay_mas': len(documentos) > limite, 'error': None}
+
+    @staticmethod
+    async def eliminar(nota_id):
+        """Eliminar nota"""
+        try:
+            result = await get_notas_collection().delete_one({'_id': ObjectId(nota_id)})
+            NotaEstudiante.invalidar_tablero()
+            return result.deleted_count > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    async def contar_por_tipo(group_id):
+        """Agregación: contar notas por tipo en un grupo"""
+        pipeline = [{'$match': {'group_id': group_id}}] + _NotaSync._etapas_por_tipo()
+        return await get_notas_collection().aggregate(pipeline).to_list(length=None)
+
+    @staticmethod
+    def invalidar_tablero():
+        """Descartar los tableros en caché del proceso"""
+        _NotaSync.invalidar_tablero()
@@ -4,10 +4,28 @@
 # ================================================
 
 import bcrypt
+import os
+import pymongo
+from cache import CacheTTL
 from database import get_db_cursor, get_sesiones_collection
 from datetime import datetime, timedelta
 import secrets
 
+# Caché de usuarios por id (rol/activo) para las comprobaciones de permisos
+USUARIO_CACHE_TTL = float(os.getenv('USUARIO_CACHE_TTL', '60'))
+_cache_usuarios = CacheTTL(max_entradas=4096, ttl=USUARIO_CACHE_TTL)
+
+# Caché de tokens de sesión validados (y de tokens desconocidos)
+SESION_CACHE_TTL = float(os.getenv('SESION_CACHE_TTL', '60'))
+SESION_CACHE_NEGATIVA_TTL = float(os.getenv('SESION_CACHE_NEGATIVA_TTL', '10'))
+_cache_sesiones = CacheTTL(
+    max_entradas=int(os.getenv('SESION_CACHE_MAX', '10000')),
+    ttl=SESION_CACHE_TTL
+)
+
+# Segundos máximos de la consulta de sesión a MongoDB (sin servidor, falla rápido)
+SESION_MONGO_TIMEOUT = float(os.getenv('SESION_MONGO_TIMEOUT', '2'))
+
 class Usuario:
     """Modelo de usuario con autenticación"""
     
@@ -68,6 +86,35 @@ class Usuario:
                 }
             return None
     
+    @staticmethod
+    def obtener_por_id_cache(user_id):
+        """Obtener usuario por ID usando la caché del proceso"""
+        user = _cache_usuarios.obtener(user_id)
+        if user is None:
+            user = Usuario.obtener_por_id(user_id)
+            if user is None:
+                return None
+            _cache_usuarios.guardar(user_id, user)
+        return dict(user)
+    
+    @staticmethod
+    def actualizar_rol_estado(user_id, rol, activo):
+        """Cambiar rol y estado de un usuario e invalidar su caché"""
+        with get_db_cursor() as cursor:
+            cursor.execute(
+                """UPDATE usuarios SET rol = %s, activo = %s
+                   WHERE id = %s""",
+                (rol, activo, user_id)
+            )
+            actualizado = cursor.rowcount > 0
+        Usuario.invalidar_cache(user_id)
+        return actualizado
+    
+    @staticmethod
+    def invalidar_cache(user_id):
+        """Descartar el usuario de la caché del proceso"""
+        _cache_usuarios.invalidar(user_id)
+    
     @staticmethod
     def listar_usuarios():
         """Listar todos los usuarios"""
@@ -96,35 +143,63 @@ class Usuario:
 
 
 class Sesion:
-    """Manejo de sesiones en MongoDB (clave-valor para acceso rápido)"""
+    """
+    Manejo de sesiones en MongoDB (clave-valor para acceso rápido).
+    Los tokens validados se guardan en una caché LRU del proceso que respeta
+    fecha_expiracion; los desconocidos se cachean como negativos. El índice
+    TTL sobre fecha_expiracion elimina las sesiones vencidas.
+    """
     
     @staticmethod
     def crear_sesion(usuario_id, duracion_horas=24):
         """Crear token de sesión en MongoDB"""
         token = secrets.token_urlsafe(32)
         sesiones = get_sesiones_collection()
+        ahora = datetime.utcnow()
         
         sesion_data = {
             'token': token,
             'usuario_id': usuario_id,
-            'fecha_creacion': datetime.utcnow(),
-            'fecha_expiracion': datetime.utcnow() + timedelta(hours=duracion_horas)
+            'fecha_creacion': ahora,
+            'fecha_expiracion': ahora + timedelta(hours=duracion_horas)
         }
         
         sesiones.insert_one(sesion_data)
+        _cache_sesiones.guardar(token, (usuario_id, sesion_data['fecha_expiracion']))
         return token
     
     @staticmethod
     def validar_sesion(token):
-        """Validar token de sesión y retornar usuario_id si es válido"""
+        """
+        Validar token de sesión y retornar usuario_id si es válido.
+        Si MongoDB no responde en SESION_MONGO_TIMEOUT segundos propaga
+        PyMongoError (sin guardar nada en la caché).
+        """
+        if not token:
+            return None
+        
+        ahora = datetime.utcnow()
+        entrada = _cache_sesiones.obtener(token)
+        if entrada is False:
+            return None
+        if entrada is not None:
+            usuario_id, fecha_expiracion = entrada
+            if fecha_expiracion > ahora:
+                return usuario_id
+            _cache_sesiones.guardar(token, False, SESION_CACHE_NEGATIVA_TTL)
+            return None
+        
         sesiones = get_sesiones_collection()
-        sesion = sesiones.find_one({
-            'token': token,
-            'fecha_expiracion': {'$gt': datetime.utcnow()}
-        })
+        with pymongo.timeout(SESION_MONGO_TIMEOUT):
+            sesion = sesiones.find_one(
+                {'token': token, 'fecha_expiracion': {'$gt': ahora}},
+                {'_id': 0, 'usuario_id': 1, 'fecha_expiracion': 1}
+            )
         
         if sesion:
+            _cache_sesiones.guardar(token, (sesion['usuario_id'], sesion['fecha_expiracion']))
             return sesion['usuario_id']
+        _cache_sesiones.guardar(token, False, SESION_CACHE_NEGATIVA_TTL)
         return None
     
     @staticmethod
@@ -132,10 +207,15 @@ class Sesion:
         """Eliminar sesión (logout)"""
         sesiones = get_sesiones_collection()
         sesiones.delete_one({'token': token})
+        _cache_sesiones.guardar(token, False, SESION_CACHE_TTL)
     
     @staticmethod
     def limpiar_sesiones_expiradas():
-        """Eliminar sesiones expiradas"""
+        """
+        Eliminar sesiones expiradas.
+        El índice TTL ya lo hace en segundo plano; se conserva para
+        limpiezas inmediatas.
+        """
         sesiones = get_sesiones_collection()
         result = sesiones.delete_many({'fecha_expiracion': {'$lt': datetime.utcnow()}})
         return result.deleted_count
@@ -3,8 +3,42 @@
 # Modelos con Control de Concurrencia
 # ================================================
 
+import os
+import random
+import threading
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+import analitica
+import catalogos
 from database import get_db_cursor
+from estadisticas import EstadisticasDashboard
+from paginacion import codificar_cursor, decodificar_cursor
 import psycopg2
+from psycopg2 import sql
+from psycopg2.extras import execute_values
+
+# Reintentos del método optimista (configurables por variables de entorno)
+INSCRIPCION_MAX_REINTENTOS = int(os.getenv('INSCRIPCION_MAX_REINTENTOS', '3'))
+INSCRIPCION_BACKOFF_MS = int(os.getenv('INSCRIPCION_BACKOFF_MS', '20'))
+
+# Pares por lote: todo el lote corre en una transacción con los grupos bloqueados
+INSCRIPCION_LOTE_MAXIMO = int(os.getenv('INSCRIPCION_LOTE_MAXIMO', '2000'))
+
+# Tamaño de página del historial de inscripciones
+HISTORIAL_LIMITE_DEFAULT = 50
+HISTORIAL_LIMITE_MAXIMO = 200
+
+# Tamaño de página del catálogo de grupos
+GRUPOS_POR_PAGINA = 50
+
+# Atraso máximo de los cupos en el catálogo de grupos (segundos)
+CATALOGO_GRUPOS_TTL = float(os.getenv('CATALOGO_GRUPOS_TTL', '5'))
+
+# Contadores acumulados de reintentos para ajustar la configuración
+_estadisticas_reintentos = {'inscripciones': 0, 'reintentos': 0, 'agotados': 0}
+_estadisticas_lock = threading.Lock()
 
 class Materia:
     """Modelo para materias"""
@@ -18,7 +52,9 @@ class Materia:
                    VALUES (%s, %s, %s) RETURNING id""",
                 (nombre, descripcion, creditos)
             )
-            return cursor.fetchone()[0]
+            materia_id = cursor.fetchone()[0]
+        EstadisticasDashboard.invalidar()
+        return materia_id
     
     @staticmethod
     def listar():
@@ -56,17 +92,44 @@ class Grupo:
                    VALUES (%s, %s, %s, %s) RETURNING id""",
                 (materia_id, profesor_id, periodo, cupo_maximo)
             )
-            return cursor.fetchone()[0]
+            grupo_id = cursor.fetchone()[0]
+        EstadisticasDashboard.invalidar()
+        catalogos.invalidar('grupos')
+        return grupo_id
     
     @staticmethod
-    def listar_disponibles():
-        """Listar grupos usando la vista optimizada"""
+    def listar_disponibles(periodo=None, estado=None, limite=None, desplazamiento=0):
+        """
+        Listar grupos desde el catálogo desnormalizado (grupos_catalogo),
+        ordenados por materia y periodo.
+        `estado` es 'disponible', 'casi_lleno' o 'lleno'; `limite` y
+        `desplazamiento` paginan el resultado.
+        """
+        condiciones = []
+        params = []
+        if periodo:
+            condiciones.append("periodo = %s")
+            params.append(periodo)
+        if estado:
+            condiciones.append("estado_cupo = %s")
+            params.append(estado)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        
+        paginacion = ""
+        if limite is not None:
+            paginacion = "LIMIT %s OFFSET %s"
+            params.extend([max(1, int(limite)), max(0, int(desplazamiento))])
+        
         with get_db_cursor(commit=False) as cursor:
             cursor.execute(
-                """SELECT grupo_id, materia, profesor, periodo,
-                          cupo_maximo, inscritos_count, cupos_disponibles,
-                          version, estado_cupo
-                   FROM vista_grupos_disponibles"""
+                f"""SELECT grupo_id, materia, profesor, periodo,
+                           cupo_maximo, inscritos_count, cupos_disponibles,
+                           version, estado_cupo
+                    FROM grupos_catalogo
+                    {where}
+                    ORDER BY materia, periodo, grupo_id
+                    {paginacion}""",
+                params
             )
             grupos = []
             for row in cursor.fetchall():
@@ -83,6 +146,14 @@ class Grupo:
                 })
             return grupos
     
+    @staticmethod
+    def listar_disponibles_cache():
+        """
+        Grupos para listas de selección desde el catálogo en caché.
+        Los cupos pueden tener hasta CATALOGO_GRUPOS_TTL segundos de atraso.
+        """
+        return catalogos.obtener('grupos', Grupo.listar_disponibles, ttl=CATALOGO_GRUPOS_TTL)
+    
     @staticmethod
     def obtener_por_id(grupo_id):
         """Obtener grupo con su versión actual"""
@@ -211,11 +282,114 @@ class Inscripcion:
                     (inscripcion_id,)
                 )
                 
+                EstadisticasDashboard.invalidar()
+                catalogos.invalidar('grupos')
                 return (True, "Inscripción exitosa (método optimista)", inscripcion_id)
                 
         except psycopg2.Error as e:
             return (False, f"Error: {str(e)}", None)
     
+    @staticmethod
+    def inscribir_optimista_con_reintentos(grupo_id, alumno_id, max_reintentos=None):
+        """
+        Inscribir con concurrencia OPTIMISTA en una sola transacción.
+        La actualización por versión y los INSERT usan la misma conexión;
+        ante un conflicto de versión se relee el grupo y se reintenta con
+        espera exponencial aleatoria.
+        Retorna (exito, mensaje, inscripcion_id, reintentos)
+        """
+        if max_reintentos is None:
+            max_reintentos = INSCRIPCION_MAX_REINTENTOS
+        
+        reintentos = 0
+        try:
+            with get_db_cursor() as cursor:
+                conn = cursor.connection
+                while True:
+                    # Releer la versión actual del grupo en cada intento
+                    cursor.execute(
+                        """SELECT cupo_maximo, inscritos_count, version
+                           FROM grupos WHERE id = %s""",
+                        (grupo_id,)
+                    )
+                    result = cursor.fetchone()
+                    
+                    if not result:
+                        return (False, "Grupo no encontrado", None, reintentos)
+                    
+                    cupo_maximo, inscritos, version = result
+                    
+                    # Verificar si ya está inscrito
+                    cursor.execute(
+                        """SELECT COUNT(*) FROM inscripciones
+                           WHERE alumno_id = %s AND grupo_id = %s""",
+                        (alumno_id, grupo_id)
+                    )
+                    if cursor.fetchone()[0] > 0:
+                        return (False, "El alumno ya está inscrito en este grupo", None, reintentos)
+                    
+                    # Verificar cupo
+                    if inscritos >= cupo_maximo:
+                        return (False, f"Cupo lleno ({inscritos}/{cupo_maximo})", None, reintentos)
+                    
+                    # Actualizar con verificación de versión en la misma transacción
+                    cursor.execute(
+                        """UPDATE grupos
+                           SET inscritos_count = inscritos_count + 1, version = version + 1
+                           WHERE id = %s AND version = %s
+                             AND inscritos_count < cupo_maximo""",
+                        (grupo_id, version)
+                    )
+                    if cursor.rowcount > 0:
+                        break
+                    
+                    # Conflicto: terminar la transacción y esperar antes de reintentar
+                    conn.rollback()
+                    if reintentos >= max_reintentos:
+                        Inscripcion._registrar_reintentos(reintentos, agotado=True)
+                        return (False, "Conflicto: el grupo fue modificado. Intente nuevamente.",
+                                None, reintentos)
+                    reintentos += 1
+                    espera = INSCRIPCION_BACKOFF_MS * (2 ** (reintentos - 1))
+                    time.sleep(random.uniform(0, espera) / 1000.0)
+                
+                # Insertar inscripción
+                cursor.execute(
+                    """INSERT INTO inscripciones (alumno_id, grupo_id)
+                       VALUES (%s, %s) RETURNING id""",
+                    (alumno_id, grupo_id)
+                )
+                inscripcion_id = cursor.fetchone()[0]
+                
+                # Crear calificaciones
+                cursor.execute(
+                    "INSERT INTO calificaciones (inscripcion_id) VALUES (%s)",
+                    (inscripcion_id,)
+                )
+                
+            Inscripcion._registrar_reintentos(reintentos)
+            EstadisticasDashboard.invalidar()
+            catalogos.invalidar('grupos')
+            return (True, "Inscripción exitosa (método optimista)", inscripcion_id, reintentos)
+                
+        except psycopg2.Error as e:
+            return (False, f"Error: {str(e)}", None, reintentos)
+    
+    @staticmethod
+    def _registrar_reintentos(reintentos, agotado=False):
+        """Acumular contadores de reintentos del método optimista"""
+        with _estadisticas_lock:
+            _estadisticas_reintentos['inscripciones'] += 1
+            _estadisticas_reintentos['reintentos'] += reintentos
+            if agotado:
+                _estadisticas_reintentos['agotados'] += 1
+    
+    @staticmethod
+    def estadisticas_reintentos():
+        """Obtener los contadores acumulados de reintentos optimistas"""
+        with _estadisticas_lock:
+            return dict(_estadisticas_reintentos)
+    
     @staticmethod
     def inscribir_pesimista(grupo_id, alumno_id):
         """
@@ -273,11 +447,210 @@ class Inscripcion:
                     (inscripcion_id,)
                 )
                 
+                EstadisticasDashboard.invalidar()
+                catalogos.invalidar('grupos')
                 return (True, "Inscripción exitosa (método pesimista)", inscripcion_id)
                 
         except psycopg2.Error as e:
             return (False, f"Error: {str(e)}", None)
     
+    @staticmethod
+    def inscribir_atomica(grupo_id, alumno_id):
+        """
+        Inscribir con una sola sentencia ATÓMICA.
+        El UPDATE condicionado reserva el lugar y los INSERT se encadenan
+        en la misma sentencia (CTE), así el bloqueo de la fila del grupo
+        dura solo una ida y vuelta al servidor.
+        Retorna (exito, mensaje, inscripcion_id)
+        """
+        try:
+            with get_db_cursor() as cursor:
+                cursor.execute(
+                    """WITH cupo AS (
+                           UPDATE grupos
+                           SET inscritos_count = inscritos_count + 1, version = version + 1
+                           WHERE id = %(grupo_id)s
+                             AND inscritos_count < cupo_maximo
+                             AND NOT EXISTS (
+                                 SELECT 1 FROM inscripciones
+                                 WHERE alumno_id = %(alumno_id)s AND grupo_id = %(grupo_id)s
+                             )
+                           RETURNING id
+                       ), nueva AS (
+                           INSERT INTO inscripciones (alumno_id, grupo_id)
+                           SELECT %(alumno_id)s, id FROM cupo
+                           ON CONFLICT (alumno_id, grupo_id) DO NOTHING
+                           RETURNING id
+                       ), calificacion AS (
+                           INSERT INTO calificaciones (inscripcion_id)
+                           SELECT id FROM nueva
+                       )
+                       SELECT (SELECT id FROM cupo), (SELECT id FROM nueva),
+                              g.cupo_maximo, g.inscritos_count,
+                              EXISTS (
+                                  SELECT 1 FROM inscripciones
+                                  WHERE alumno_id = %(alumno_id)s AND grupo_id = %(grupo_id)s
+                              )
+                       FROM (SELECT 1) AS uno
+                       LEFT JOIN grupos g ON g.id = %(grupo_id)s""",
+                    {'grupo_id': grupo_id, 'alumno_id': alumno_id}
+                )
+                reservado, inscripcion_id, cupo_maximo, inscritos, ya_inscrito = cursor.fetchone()
+                
+                if inscripcion_id:
+                    EstadisticasDashboard.invalidar()
+                    catalogos.invalidar('grupos')
+                    return (True, "Inscripción exitosa (método atómico)", inscripcion_id)
+                
+                if reservado:
+                    # Otra transacción inscribió al alumno entre la reserva y el
+                    # INSERT: deshacer el incremento del contador
+                    cursor.connection.rollback()
+                    return (False, "El alumno ya está inscrito en este grupo", None)
+                
+                if cupo_maximo is None:
+                    return (False, "Grupo no encontrado", None)
+                if ya_inscrito:
+                    return (False, "El alumno ya está inscrito en este grupo", None)
+                return (False, f"Cupo lleno ({inscritos}/{cupo_maximo})", None)
+                
+        except psycopg2.Error as e:
+            return (False, f"Error: {str(e)}", None)
+    
+    @staticmethod
+    def _asignar_lugares(resultados, grupos, alumnos, existentes):
+        """
+        Asignar lugares del lote en el orden recibido.
+        `grupos` es {id: [cupo_maximo, inscritos]} (se actualiza en sitio).
+        Anota el mensaje de los rechazados y retorna los aceptados.
+        """
+        aceptados = []
+        vistos = set()
+        for resultado in resultados:
+            par = (resultado['alumno_id'], resultado['grupo_id'])
+            grupo = grupos.get(resultado['grupo_id'])
+            if grupo is None:
+                resultado['mensaje'] = "Grupo no encontrado"
+            elif resultado['alumno_id'] not in alumnos:
+                resultado['mensaje'] = "Alumno no encontrado"
+            elif par in existentes or par in vistos:
+                resultado['mensaje'] = "El alumno ya está inscrito en este grupo"
+            elif grupo[1] >= grupo[0]:
+                resultado['mensaje'] = f"Cupo lleno ({grupo[1]}/{grupo[0]})"
+            else:
+                grupo[1] += 1
+                vistos.add(par)
+                aceptados.append(resultado)
+        return aceptados
+    
+    @staticmethod
+    def inscribir_lote(pares):
+        """
+        Inscribir muchos pares (alumno_id, grupo_id) en una sola transacción.
+        Bloquea cada grupo afectado una sola vez y en orden de id (evita
+        interbloqueos entre lotes concurrentes) e inserta con execute_values.
+        Retorna una lista con el resultado de cada par, en el mismo orden.
+        """
+        resultados = [
+            {'alumno_id': alumno_id, 'grupo_id': grupo_id,
+             'exito': False, 'mensaje': None, 'inscripcion_id': None}
+            for alumno_id, grupo_id in pares
+        ]
+        if not resultados:
+            return resultados
+        
+        grupo_ids = sorted({r['grupo_id'] for r in resultados})
+        alumno_ids = sorted({r['alumno_id'] for r in resultados})
+        
+        try:
+            with get_db_cursor() as cursor:
+                # BLOQUEAR los grupos en orden determinista
+                cursor.execute(
+                    """SELECT id, cupo_maximo, inscritos_count
+                       FROM grupos WHERE id = ANY(%s)
+                       ORDER BY id
+                       FOR UPDATE""",
+                    (grupo_ids,)
+                )
+                grupos = {row[0]: [row[1], row[2]] for row in cursor.fetchall()}
+                
+                cursor.execute(
+                    "SELECT id FROM alumnos WHERE id = ANY(%s)",
+                    (alumno_ids,)
+                )
+                alumnos = {row[0] for row in cursor.fetchall()}
+                
+                cursor.execute(
+                    """SELECT i.alumno_id, i.grupo_id
+                       FROM inscripciones i
+                       JOIN unnest(%s::int[], %s::int[]) AS p(alumno_id, grupo_id)
+                         ON i.alumno_id = p.alumno_id AND i.grupo_id = p.grupo_id""",
+                    ([r['alumno_id'] for r in resultados], [r['grupo_id'] for r in resultados])
+                )
+                existentes = set(cursor.fetchall())
+                
+                aceptados = Inscripcion._asignar_lugares(resultados, grupos, alumnos, existentes)
+                if not aceptados:
+                    return resultados
+                
+                # Insertar inscripciones y calificaciones en bloque. Una
+                # inscripción individual concurrente pudo insertar un par tras
+                # la comprobación: ese par se omite en vez de abortar el lote
+                filas = execute_values(
+                    cursor,
+                    """INSERT INTO inscripciones (alumno_id, grupo_id)
+                       VALUES %s
+                       ON CONFLICT (alumno_id, grupo_id) DO NOTHING
+                       RETURNING id, alumno_id, grupo_id""",
+                    [(r['alumno_id'], r['grupo_id']) for r in aceptados],
+                    page_size=1000,
+                    fetch=True
+                )
+                ids = {(alumno_id, grupo_id): id_ for id_, alumno_id, grupo_id in filas}
+                if ids:
+                    execute_values(
+                        cursor,
+                        "INSERT INTO calificaciones (inscripcion_id) VALUES %s",
+                        [(id_,) for id_ in ids.values()],
+                        page_size=1000
+                    )
+                
+                # Actualizar contadores de cada grupo una sola vez, con las
+                # filas realmente insertadas
+                incrementos = {}
+                for alumno_id, grupo_id in ids:
+                    incrementos[grupo_id] = incrementos.get(grupo_id, 0) + 1
+                if incrementos:
+                    execute_values(
+                        cursor,
+                        """UPDATE grupos g
+                           SET inscritos_count = g.inscritos_count + v.cantidad,
+                               version = g.version + 1
+                           FROM (VALUES %s) AS v(id, cantidad)
+                           WHERE g.id = v.id""",
+                        sorted(incrementos.items())
+                    )
+                
+                for r in aceptados:
+                    inscripcion_id = ids.get((r['alumno_id'], r['grupo_id']))
+                    if inscripcion_id is None:
+                        r['mensaje'] = "El alumno ya está inscrito en este grupo"
+                        continue
+                    r['exito'] = True
+                    r['mensaje'] = "Inscripción exitosa (lote)"
+                    r['inscripcion_id'] = inscripcion_id
+                
+            EstadisticasDashboard.invalidar()
+            catalogos.invalidar('grupos')
+            return resultados
+                
+        except psycopg2.Error as e:
+            for r in resultados:
+                r['exito'] = False
+                r['mensaje'] = f"Error: {str(e)}"
+                r['inscripcion_id'] = None
+            return resultados
+    
     @staticmethod
     def listar_por_alumno(alumno_id):
         """Listar inscripciones de un alumno"""
@@ -328,3 +701,291 @@ class Inscripcion:
                     'estado': row[6]
                 })
             return inscripciones
+    
+    @staticmethod
+    def listar_historial_pagina(cursor=None, direccion='siguiente', limite=HISTORIAL_LIMITE_DEFAULT,
+                                periodo=None, estado=None, grupo_id=None):
+        """
+        Listar inscripciones con paginación por llave (fecha_inscripcion, id).
+        `cursor` es el token de la página vecina; `direccion` indica si se
+        avanza ('siguiente') o se retrocede ('anterior').
+        Retorna {'inscripciones': [...], 'siguiente': token, 'anterior': token}
+        """
+        limite = max(1, min(int(limite), HISTORIAL_LIMITE_MAXIMO))
+        hacia_atras = direccion == 'anterior'
+        
+        condiciones = []
+        params = []
+        if periodo:
+            condiciones.append("g.periodo = %s")
+            params.append(periodo)
+        if estado:
+            condiciones.append("i.estado = %s")
+            params.append(estado)
+        if grupo_id:
+            condiciones.append("i.grupo_id = %s")
+            params.append(grupo_id)
+        
+        llave = decodificar_cursor(cursor, 2)
+        if llave:
+            try:
+                params.extend([date.fromisoformat(llave[0]), int(llave[1])])
+                condiciones.append(
+                    "(i.fecha_inscripcion, i.id) > (%s, %s)" if hacia_atras
+                    else "(i.fecha_inscripcion, i.id) < (%s, %s)"
+                )
+            except (TypeError, ValueError):
+                llave = None
+        
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        orden = "ASC" if hacia_atras else "DESC"
+        params.append(limite + 1)
+        
+        with get_db_cursor(commit=False) as cursor_db:
+            cursor_db.execute(
+                f"""SELECT i.id, a.matricula, a.nombre, m.nombre, g.periodo,
+                           i.fecha_inscripcion, i.estado
+                    FROM inscripciones i
+                    JOIN alumnos a ON i.alumno_id = a.id
+                    JOIN grupos g ON i.grupo_id = g.id
+                    JOIN materias m ON g.materia_id = m.id
+                    {where}
+                    ORDER BY i.fecha_inscripcion {orden}, i.id {orden}
+                    LIMIT %s""",
+                params
+            )
+            filas = cursor_db.fetchall()
+        
+        hay_mas = len(filas) > limite
+        filas = filas[:limite]
+        if hacia_atras:
+            filas.reverse()
+        
+        inscripciones = []
+        for row in filas:
+            inscripciones.append({
+                'id': row[0],
+                'matricula': row[1],
+                'alumno': row[2],
+                'materia': row[3],
+                'periodo': row[4],
+                'fecha': row[5],
+                'estado': row[6]
+            })
+        
+        primera = codificar_cursor(filas[0][5], filas[0][0]) if filas else None
+        ultima = codificar_cursor(filas[-1][5], filas[-1][0]) if filas else None
+        if hacia_atras:
+            siguiente = ultima if llave else None
+            anterior = primera if hay_mas else None
+        else:
+            siguiente = ultima if hay_mas else None
+            anterior = primera if llave else None
+        
+        return {
+            'inscripciones': inscripciones,
+            'siguiente': siguiente,
+            'anterior': anterior
+        }
+
+
+class Calificacion:
+    """Modelo para calificaciones (parcial1, parcial2, final)"""
+    
+    CAMPOS = ('parcial1', 'parcial2', 'final')
+    
+    @staticmethod
+    def listar_por_grupo(grupo_id):
+        """Listar calificaciones de un grupo ordenadas por alumno"""
+        with get_db_cursor(commit=False) as cursor:
+            cursor.execute(
+                """SELECT c.inscripcion_id, a.nombre, a.matricula, m.nombre as materia,
+                          c.parcial1, c.parcial2, c.final, c.fecha_modificacion, c.promedio
+                   FROM calificaciones c
+                   JOIN inscripciones i ON c.inscripcion_id = i.id
+                   JOIN alumnos a ON i.alumno_id = a.id
+                   JOIN grupos g ON i.grupo_id = g.id
+                   JOIN materias m ON g.materia_id = m.id
+                   WHERE g.id = %s
+                   ORDER BY a.nombre""",
+                (grupo_id,)
+            )
+            calificaciones = []
+            for row in cursor.fetchall():
+                calificaciones.append({
+                    'inscripcion_id': row[0],
+                    'alumno': row[1],
+                    'matricula': row[2],
+                    'materia': row[3],
+                    'parcial1': row[4],
+                    'parcial2': row[5],
+                    'final': row[6],
+                    'fecha_modificacion': row[7],
+                    'promedio': row[8]
+                })
+            return calificaciones
+    
+    @staticmethod
+    def _fila_estadisticas(row):
+        """Convertir una fila de estadisticas_grupo (con grupo) a dict"""
+        numero = lambda valor: float(valor) if valor is not None else None
+        return {
+            'grupo_id': row[0],
+            'materia': row[1],
+            'periodo': row[2],
+            'inscritos': row[3],
+            'con_promedio': row[4],
+            'media': numero(row[5]),
+            'desviacion': numero(row[6]),
+            'minimo': numero(row[7]),
+            'percentil_25': numero(row[8]),
+            'mediana': numero(row[9]),
+            'percentil_75': numero(row[10]),
+            'maximo': numero(row[11]),
+            'aprobados': row[12],
+            'reprobados': row[13],
+            'tasa_aprobacion': round(row[12] / row[4], 4) if row[4] else None,
+            'parciales': {
+                'parcial1': {'aprobados': row[14], 'reprobados': row[15]},
+                'parcial2': {'aprobados': row[16], 'reprobados': row[17]},
+                'final': {'aprobados': row[18], 'reprobados': row[19]}
+            },
+            'fecha_actualizacion': row[20]
+        }
+    
+    @staticmethod
+    def estadisticas_por_grupos(grupo_id=None, periodo=None):
+        """
+        Agregados precalculados (tabla estadisticas_grupo) de uno o varios
+        grupos; permite comparar todos los grupos de un periodo en una consulta.
+        """
+        condiciones = []
+        params = []
+        if grupo_id:
+            condiciones.append("g.id = %s")
+            params.append(grupo_id)
+        if periodo:
+            condiciones.append("g.periodo = %s")
+            params.append(periodo)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+        
+        with get_db_cursor(commit=False) as cursor:
+            cursor.execute(
+                f"""SELECT g.id, m.nombre, g.periodo,
+                           COALESCE(e.inscritos, 0), COALESCE(e.con_promedio, 0),
+                           e.media, e.desviacion, e.minimo, e.percentil_25, e.mediana,
+                           e.percentil_75, e.maximo,
+                           COALESCE(e.aprobados, 0), COALESCE(e.reprobados, 0),
+                           COALESCE(e.aprobados_parcial1, 0), COALESCE(e.reprobados_parcial1, 0),
+                           COALESCE(e.aprobados_parcial2, 0), COALESCE(e.reprobados_parcial2, 0),
+                           COALESCE(e.aprobados_final, 0), COALESCE(e.reprobados_final, 0),
+                           e.fecha_actualizacion
+                    FROM grupos g
+                    JOIN materias m ON g.materia_id = m.id
+                    LEFT JOIN estadisticas_grupo e ON e.grupo_id = g.id
+                    {where}
+                    ORDER BY m.nombre, g.periodo""",
+                params
+            )
+            return [Calificacion._fila_estadisticas(row) for row in cursor.fetchall()]
+    
+    @staticmethod
+    def estadisticas_grupo(grupo_id):
+        """Agregados precalculados de un grupo o None"""
+        resultado = Calificacion.estadisticas_por_grupos(grupo_id=grupo_id)
+        return resultado[0] if resultado else None
+    
+    @staticmethod
+    def validar_fila(fila):
+        """
+        Validar una fila contra las restricciones CHECK (0 a 100, dos decimales).
+        Retorna (valores, error): valores es (inscripcion_id, parcial1, parcial2,
+        final, hay_parcial1, hay_parcial2, hay_final). Un campo ausente no se
+        modifica; null o vacío borra la calificación.
+        """
+        if not isinstance(fila, dict):
+            return None, "La fila debe ser un objeto"
+        try:
+            inscripcion_id = int(fila.get('inscripcion_id'))
+        except (TypeError, ValueError):
+            return None, "inscripcion_id inválido"
+        
+        presentes = tuple(campo in fila for campo in Calificacion.CAMPOS)
+        if not any(presentes):
+            return None, f"Indique al menos uno de: {', '.join(Calificacion.CAMPOS)}"
+        
+        valores = [inscripcion_id]
+        for campo in Calificacion.CAMPOS:
+            crudo = fila.get(campo)
+            if crudo is None or str(crudo).strip() == '':
+                valores.append(None)
+                continue
+            try:
+                valor = Decimal(str(crudo).strip())
+            except InvalidOperation:
+                return None, f"{campo}: no es un número"
+            if not valor.is_finite() or valor < 0 or valor > 100:
+                return None, f"{campo}: debe estar entre 0 y 100"
+            valores.append(valor.quantize(Decimal('0.01')))
+        return tuple(valores) + presentes, None
+    
+    @staticmethod
+    def actualizar_lote(grupo_id, filas):
+        """
+        Actualizar las calificaciones de un grupo con un solo UPDATE ... FROM (VALUES ...).
+        Las filas inválidas o que no pertenecen al grupo se reportan sin
+        detener el resto.
+        Retorna {'actualizadas': n, 'errores': [{'inscripcion_id', 'error'}]}
+        """
+        if not isinstance(filas, list):
+            return {'actualizadas': 0,
+                    'errores': [{'inscripcion_id': None, 'error': "Se esperaba una lista de calificaciones"}]}
+        
+        errores = []
+        validas = {}
+        for fila in filas:
+            valores, error = Calificacion.validar_fila(fila)
+            if error:
+                inscripcion_id = fila.get('inscripcion_id') if isinstance(fila, dict) else None
+                errores.append({'inscripcion_id': inscripcion_id, 'error': error})
+            elif valores[0] in validas:
+                errores.append({'inscripcion_id': valores[0], 'error': "inscripcion_id repetido"})
+            else:
+                validas[valores[0]] = valores
+        
+        if not validas:
+            return {'actualizadas': 0, 'errores': errores}
+        
+        with get_db_cursor() as cursor:
+            actualizadas = execute_values(
+                cursor,
+                sql.SQL(
+                    """UPDATE calificaciones c
+                       SET parcial1 = CASE WHEN v.hay_parcial1 THEN v.parcial1 ELSE c.parcial1 END,
+                           parcial2 = CASE WHEN v.hay_parcial2 THEN v.parcial2 ELSE c.parcial2 END,
+                           final = CASE WHEN v.hay_final THEN v.final ELSE c.final END,
+                           fecha_modificacion = CURRENT_TIMESTAMP
+                       FROM (VALUES %s) AS v(inscripcion_id, parcial1, parcial2, final,
+                                             hay_parcial1, hay_parcial2, hay_final),
+                            inscripciones i
+                       WHERE c.inscripcion_id = v.inscripcion_id
+                         AND i.id = c.inscripcion_id
+                         AND i.grupo_id = {}
+                       RETURNING c.inscripcion_id"""
+                ).format(sql.Literal(grupo_id)),
+                list(validas.values()),
+                template="(%s::integer, %s::numeric, %s::numeric, %s::numeric, "
+                         "%s::boolean, %s::boolean, %s::boolean)",
+                page_size=len(validas),
+                fetch=True
+            )
+        
+        encontradas = {row[0] for row in actualizadas}
+        if encontradas:
+            analitica.invalidar_periodo()
+        for inscripcion_id in validas:
+            if inscripcion_id not in encontradas:
+                errores.append({'inscripcion_id': inscripcion_id,
+                                'error': "La inscripción no pertenece al grupo"})
+        
+        return {'actualizadas': len(encontradas), 'errores': errores}
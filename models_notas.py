@@ -3,9 +3,45 @@
 # Modelo MongoDB para Notas de Estudiantes
 # ================================================
 
-from database import get_notas_collection
+import os
+
+from cache import CacheTTL
+from database import get_db_cursor, get_notas_collection
+from paginacion import codificar_cursor, decodificar_cursor
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+
+# Tamaño de página de listados y búsquedas
+NOTAS_POR_PAGINA = 20
+NOTAS_LIMITE_MAXIMO = 100
+
+TIPOS_NOTA = ('performance', 'attendance', 'behavior')
+
+# Documentos por llamada a insert_many / bulk_write
+NOTAS_LOTE_TAMANO = 1000
+NOTAS_IMPORTACION_MAXIMO = 20000
+COMENTARIO_MAX = 2000
+
+# Código de MongoDB para $text sin índice de texto (IndexNotFound)
+CODIGO_INDICE_NO_ENCONTRADO = 27
+
+# Caché del tablero de notas por periodo
+NOTAS_TABLERO_CACHE_TTL = float(os.getenv('NOTAS_TABLERO_CACHE_TTL', '60'))
+_cache_tablero = CacheTTL(max_entradas=32, ttl=NOTAS_TABLERO_CACHE_TTL)
+
+# Campos de las vistas de lista: sin seguimientos ni datos_adicionales
+PROYECCION_RESUMEN = {
+    'student_id': 1,
+    'teacher_id': 1,
+    'group_id': 1,
+    'date': 1,
+    'type': 1,
+    'comment': 1,
+    'total_seguimientos': {'$size': {'$ifNull': ['$seguimientos', []]}}
+}
 
 class NotaEstudiante:
     """
@@ -21,27 +57,108 @@ class NotaEstudiante:
         """
         notas = get_notas_collection()
         
+        ahora = datetime.utcnow()
         documento = {
             'student_id': student_id,
             'teacher_id': teacher_id,
             'group_id': group_id,
-            'date': datetime.utcnow(),
+            'date': ahora,
             'type': tipo,  # 'performance', 'attendance', 'behavior'
             'comment': comentario,
             'datos_adicionales': datos_adicionales or {},
             'seguimientos': [],
-            'fecha_creacion': datetime.utcnow(),
-            'ultima_modificacion': datetime.utcnow()
+            'fecha_creacion': ahora,
+            'ultima_modificacion': ahora
         }
         
         result = notas.insert_one(documento)
+        NotaEstudiante.invalidar_tablero()
         return str(result.inserted_id)
     
     @staticmethod
-    def listar(filtros=None):
-        """Listar notas con filtros opcionales"""
+    def validar_fila(fila, ahora):
+        """
+        Validar una fila de importación (student_id, group_id, type, comment, date opcional).
+        Retorna (documento, error)
+        """
+        if not isinstance(fila, dict):
+            return None, "La fila debe ser un objeto"
+        
+        try:
+            student_id = int(fila.get('student_id'))
+            group_id = int(fila.get('group_id'))
+        except (TypeError, ValueError):
+            return None, "student_id y group_id deben ser enteros"
+        
+        tipo = str(fila.get('type') or '').strip()
+        if tipo not in TIPOS_NOTA:
+            return None, f"type debe ser uno de: {', '.join(TIPOS_NOTA)}"
+        
+        comentario = str(fila.get('comment') or '').strip()
+        if not comentario:
+            return None, "comment es obligatorio"
+        if len(comentario) > COMENTARIO_MAX:
+            return None, f"comment excede {COMENTARIO_MAX} caracteres"
+        
+        fecha = ahora
+        if fila.get('date'):
+            try:
+                fecha = datetime.fromisoformat(str(fila['date']).strip())
+            except ValueError:
+                return None, "date debe tener formato AAAA-MM-DD"
+        
+        return {
+            'student_id': student_id,
+            'group_id': group_id,
+            'date': fecha,
+            'type': tipo,
+            'comment': comentario,
+            'datos_adicionales': fila['datos_adicionales'] if isinstance(fila.get('datos_adicionales'), dict) else {},
+            'seguimientos': [],
+            'fecha_creacion': ahora,
+            'ultima_modificacion': ahora
+        }, None
+    
+    @staticmethod
+    def crear_lote(filas, teacher_id):
+        """
+        Crear muchas notas con insert_many no ordenado, en bloques.
+        Las filas inválidas o rechazadas por MongoDB se reportan sin
+        detener el resto (`fila` es la posición en la entrada, desde 1).
+        Retorna {'insertadas': n, 'errores': [{'fila', 'error'}]}
+        """
         notas = get_notas_collection()
+        ahora = datetime.utcnow()
+        
+        errores = []
+        validas = []   # (fila, documento)
+        for numero, fila in enumerate(filas, start=1):
+            documento, error = NotaEstudiante.validar_fila(fila, ahora)
+            if error:
+                errores.append({'fila': numero, 'error': error})
+            else:
+                documento['teacher_id'] = teacher_id
+                validas.append((numero, documento))
         
+        insertadas = 0
+        for inicio in range(0, len(validas), NOTAS_LOTE_TAMANO):
+            bloque = validas[inicio:inicio + NOTAS_LOTE_TAMANO]
+            try:
+                result = notas.insert_many([doc for _, doc in bloque], ordered=False)
+                insertadas += len(result.inserted_ids)
+            except BulkWriteError as e:
+                insertadas += e.details.get('nInserted', 0)
+                for error in e.details.get('writeErrors', []):
+                    errores.append({'fila': bloque[error['index']][0], 'error': error['errmsg']})
+        
+        if insertadas:
+            NotaEstudiante.invalidar_tablero()
+        errores.sort(key=lambda error: error['fila'])
+        return {'insertadas': insertadas, 'errores': errores}
+    
+    @staticmethod
+    def _construir_filtro(filtros=None):
+        """Filtro MongoDB a partir de student_id, group_id, type, desde y hasta"""
         query = {}
         if filtros:
             if 'student_id' in filtros:
@@ -50,13 +167,83 @@ class NotaEstudiante:
                 query['group_id'] = filtros['group_id']
             if 'type' in filtros:
                 query['type'] = filtros['type']
+            if filtros.get('desde') or filtros.get('hasta'):
+                query['date'] = {}
+                if filtros.get('desde'):
+                    query['date']['$gte'] = filtros['desde']
+                if filtros.get('hasta'):
+                    query['date']['$lt'] = filtros['hasta']
+        return query
+    
+    @staticmethod
+    def listar(filtros=None, limite=NOTAS_LIMITE_MAXIMO):
+        """Listar notas (resumen, más recientes primero) con filtros opcionales"""
+        return NotaEstudiante.listar_pagina(filtros, limite=limite)['notas']
+    
+    @staticmethod
+    def _consulta_pagina(filtros=None, cursor=None, direccion='siguiente'):
+        """
+        Filtro y orden de una página por rango sobre (date, _id).
+        Retorna (query, orden, llave, hacia_atras)
+        """
+        hacia_atras = direccion == 'anterior'
+        query = NotaEstudiante._construir_filtro(filtros)
         
-        resultados = []
-        for doc in notas.find(query).sort('date', -1):
+        llave = decodificar_cursor(cursor, 2)
+        if llave:
+            try:
+                fecha, nota_id = datetime.fromisoformat(llave[0]), ObjectId(llave[1])
+                operador = '$gt' if hacia_atras else '$lt'
+                query = {'$and': [query, {'$or': [
+                    {'date': {operador: fecha}},
+                    {'date': fecha, '_id': {operador: nota_id}}
+                ]}]}
+            except (TypeError, ValueError, InvalidId):
+                llave = None
+        
+        orden = 1 if hacia_atras else -1
+        return query, [('date', orden), ('_id', orden)], llave, hacia_atras
+    
+    @staticmethod
+    def _armar_pagina(documentos, limite, llave, hacia_atras):
+        """Recortar los limite + 1 documentos leídos y calcular los tokens de página"""
+        hay_mas = len(documentos) > limite
+        documentos = documentos[:limite]
+        if hacia_atras:
+            documentos.reverse()
+        
+        primera = codificar_cursor(documentos[0]['date'], str(documentos[0]['_id'])) if documentos else None
+        ultima = codificar_cursor(documentos[-1]['date'], str(documentos[-1]['_id'])) if documentos else None
+        if hacia_atras:
+            siguiente = ultima if llave else None
+            anterior = primera if hay_mas else None
+        else:
+            siguiente = ultima if hay_mas else None
+            anterior = primera if llave else None
+        
+        for doc in documentos:
             doc['_id'] = str(doc['_id'])
-            resultados.append(doc)
         
-        return resultados
+        return {
+            'notas': documentos,
+            'siguiente': siguiente,
+            'anterior': anterior
+        }
+    
+    @staticmethod
+    def listar_pagina(filtros=None, cursor=None, direccion='siguiente', limite=NOTAS_POR_PAGINA):
+        """
+        Listar notas con paginación por rango sobre (date, _id).
+        Solo trae la proyección resumen; el documento completo se carga
+        con obtener_por_id().
+        Retorna {'notas': [...], 'siguiente': token, 'anterior': token}
+        """
+        notas = get_notas_collection()
+        limite = max(1, min(int(limite), NOTAS_LIMITE_MAXIMO))
+        query, orden, llave, hacia_atras = NotaEstudiante._consulta_pagina(filtros, cursor, direccion)
+        
+        documentos = list(notas.find(query, PROYECCION_RESUMEN).sort(orden).limit(limite + 1))
+        return NotaEstudiante._armar_pagina(documentos, limite, llave, hacia_atras)
     
     @staticmethod
     def obtener_por_id(nota_id):
@@ -85,6 +272,7 @@ class NotaEstudiante:
                 {'_id': ObjectId(nota_id)},
                 {'$set': datos_actualizacion}
             )
+            NotaEstudiante.invalidar_tablero()
             return result.modified_count > 0
         except Exception:
             return False
@@ -113,23 +301,99 @@ class NotaEstudiante:
             return False
     
     @staticmethod
-    def buscar_por_texto(texto_busqueda):
-        """Búsqueda de texto en notas"""
+    def agregar_seguimientos_lote(seguimientos, autor):
+        """
+        Agregar muchos seguimientos ($push) con bulk_write no ordenado, en bloques.
+        `seguimientos` es una lista de {'nota_id', 'texto'}.
+        Retorna {'actualizadas': n, 'errores': [{'fila', 'error'}]}
+        """
         notas = get_notas_collection()
+        ahora = datetime.utcnow()
         
-        query = {
-            '$or': [
-                {'comment': {'$regex': texto_busqueda, '$options': 'i'}},
-                {'type': {'$regex': texto_busqueda, '$options': 'i'}}
-            ]
-        }
+        errores = []
+        validas = []   # (fila, nota_id, texto)
+        for numero, fila in enumerate(seguimientos, start=1):
+            if not isinstance(fila, dict):
+                errores.append({'fila': numero, 'error': "La fila debe ser un objeto"})
+                continue
+            texto = str(fila.get('texto') or '').strip()
+            if not texto:
+                errores.append({'fila': numero, 'error': "texto es obligatorio"})
+                continue
+            try:
+                validas.append((numero, ObjectId(fila.get('nota_id')), texto))
+            except (InvalidId, TypeError):
+                errores.append({'fila': numero, 'error': "nota_id inválido"})
+        
+        actualizadas = 0
+        for inicio in range(0, len(validas), NOTAS_LOTE_TAMANO):
+            bloque = validas[inicio:inicio + NOTAS_LOTE_TAMANO]
+            existentes = {doc['_id'] for doc in notas.find(
+                {'_id': {'$in': list({nota_id for _, nota_id, _ in bloque})}}, {'_id': 1})}
+            
+            filas_bloque = []
+            operaciones = []
+            for numero, nota_id, texto in bloque:
+                if nota_id not in existentes:
+                    errores.append({'fila': numero, 'error': "Nota no encontrada"})
+                    continue
+                filas_bloque.append(numero)
+                operaciones.append(UpdateOne(
+                    {'_id': nota_id},
+                    {
+                        '$push': {'seguimientos': {'texto': texto, 'autor': autor, 'fecha': ahora}},
+                        '$set': {'ultima_modificacion': ahora}
+                    }
+                ))
+            if not operaciones:
+                continue
+            
+            try:
+                result = notas.bulk_write(operaciones, ordered=False)
+                actualizadas += result.modified_count
+            except BulkWriteError as e:
+                actualizadas += e.details.get('nModified', 0)
+                for error in e.details.get('writeErrors', []):
+                    errores.append({'fila': filas_bloque[error['index']], 'error': error['errmsg']})
+        
+        errores.sort(key=lambda error: error['fila'])
+        return {'actualizadas': actualizadas, 'errores': errores}
+    
+    @staticmethod
+    def buscar_por_texto(texto_busqueda, filtros=None, limite=NOTAS_POR_PAGINA, saltar=0):
+        """
+        Búsqueda de texto en comentarios y seguimientos.
+        Usa el índice de texto (español, con raíces) y ordena por relevancia.
+        Retorna {'notas': [...], 'hay_mas': bool, 'error': str | None};
+        `limite` se acota a NOTAS_LIMITE_MAXIMO.
+        """
+        notas = get_notas_collection()
+        
+        query = NotaEstudiante._construir_filtro(filtros)
+        query['$text'] = {'$search': texto_busqueda[:200], '$language': 'spanish'}
+        limite = max(1, min(int(limite), NOTAS_LIMITE_MAXIMO))
+        
+        cursor = notas.find(
+            query,
+            {**PROYECCION_RESUMEN, 'score': {'$meta': 'textScore'}}
+        ).sort([
+            ('score', {'$meta': 'textScore'}),
+            ('date', -1)
+        ]).skip(max(0, saltar)).limit(limite + 1)
         
         resultados = []
-        for doc in notas.find(query):
-            doc['_id'] = str(doc['_id'])
-            resultados.append(doc)
+        try:
+            for doc in cursor:
+                doc['_id'] = str(doc['_id'])
+                resultados.append(doc)
+        except OperationFailure as e:
+            if e.code == CODIGO_INDICE_NO_ENCONTRADO:
+                error = "La búsqueda de texto no está disponible: faltan los índices de MongoDB"
+            else:
+                error = f"Error en la búsqueda de texto: {e}"
+            return {'notas': [], 'hay_mas': False, 'error': error}
         
-        return resultados
+        return {'notas': resultados[:limite], 'hay_mas': len(resultados) > limite, 'error': None}
     
     @staticmethod
     def eliminar(nota_id):
@@ -138,18 +402,135 @@ class NotaEstudiante:
         
         try:
             result = notas.delete_one({'_id': ObjectId(nota_id)})
+            NotaEstudiante.invalidar_tablero()
             return result.deleted_count > 0
         except Exception:
             return False
     
+    @staticmethod
+    def _etapas_por_tipo(clave=None):
+        """
+        Etapas que cuentan notas por tipo; con `clave` (expresión de agregación)
+        cuentan por clave y tipo y agrupan los tipos de cada clave.
+        """
+        if clave is None:
+            return [{'$group': {'_id': '$type', 'count': {'$sum': 1}}}]
+        return [
+            {'$group': {'_id': {'clave': clave, 'tipo': '$type'}, 'count': {'$sum': 1}}},
+            {'$group': {
+                '_id': '$_id.clave',
+                'tipos': {'$push': {'tipo': '$_id.tipo', 'count': '$count'}},
+                'total': {'$sum': '$count'}
+            }},
+            {'$sort': {'_id': 1}}
+        ]
+    
     @staticmethod
     def contar_por_tipo(group_id):
         """Agregación: contar notas por tipo en un grupo"""
         notas = get_notas_collection()
         
+        pipeline = [{'$match': {'group_id': group_id}}] + NotaEstudiante._etapas_por_tipo()
+        
+        return list(notas.aggregate(pipeline))
+    
+    @staticmethod
+    def contar_desglose(group_ids, desde=None, hasta=None):
+        """
+        Conteos por tipo en total, por grupo, por profesor y por semana ISO,
+        en un solo aggregate: $match sobre campos indexados (group_id, date)
+        y un $facet por desglose.
+        """
+        notas = get_notas_collection()
+        
+        match = {'group_id': {'$in': [int(g) for g in group_ids]}}
+        if desde or hasta:
+            match['date'] = {}
+            if desde:
+                match['date']['$gte'] = desde
+            if hasta:
+                match['date']['$lt'] = hasta
+        
         pipeline = [
-            {'$match': {'group_id': group_id}},
-            {'$group': {'_id': '$type', 'count': {'$sum': 1}}}
+            {'$match': match},
+            {'$project': {'_id': 0, 'type': 1, 'group_id': 1, 'teacher_id': 1, 'date': 1}},
+            {'$facet': {
+                'por_tipo': NotaEstudiante._etapas_por_tipo(),
+                'por_grupo': NotaEstudiante._etapas_por_tipo('$group_id'),
+                'por_profesor': NotaEstudiante._etapas_por_tipo('$teacher_id'),
+                'por_semana': NotaEstudiante._etapas_por_tipo(
+                    {'anio': {'$isoWeekYear': '$date'}, 'semana': {'$isoWeek': '$date'}})
+            }}
         ]
         
-        return list(notas.aggregate(pipeline))
+        resultado = next(notas.aggregate(pipeline), None) or {}
+        
+        def filas(desglose):
+            return [
+                {
+                    'clave': fila['_id'],
+                    'total': fila['total'],
+                    **{tipo: 0 for tipo in TIPOS_NOTA},
+                    **{t['tipo']: t['count'] for t in fila['tipos'] if t['tipo'] in TIPOS_NOTA}
+                }
+                for fila in resultado.get(desglose, [])
+            ]
+        
+        por_tipo = {tipo: 0 for tipo in TIPOS_NOTA}
+        for fila in resultado.get('por_tipo', []):
+            if fila['_id'] in por_tipo:
+                por_tipo[fila['_id']] = fila['count']
+        
+        return {
+            'por_tipo': por_tipo,
+            'total': sum(por_tipo.values()),
+            'por_grupo': filas('por_grupo'),
+            'por_profesor': filas('por_profesor'),
+            'por_semana': filas('por_semana')
+        }
+    
+    @staticmethod
+    def tablero_periodo(periodo):
+        """Desglose de notas de los grupos de un periodo, con nombres; en caché por periodo"""
+        return _cache_tablero.obtener_o_calcular(
+            periodo, lambda: NotaEstudiante._calcular_tablero(periodo))
+    
+    @staticmethod
+    def _calcular_tablero(periodo):
+        with get_db_cursor(commit=False) as cursor:
+            cursor.execute(
+                """SELECT g.id, m.nombre, COALESCE(p.nombre, 'Sin asignar')
+                   FROM grupos g
+                   JOIN materias m ON g.materia_id = m.id
+                   LEFT JOIN profesores p ON g.profesor_id = p.id
+                   WHERE g.periodo = %s""",
+                (periodo,)
+            )
+            grupos = {row[0]: f"{row[1]} ({row[2]})" for row in cursor.fetchall()}
+        
+        desglose = NotaEstudiante.contar_desglose(list(grupos))
+        
+        profesores = [fila['clave'] for fila in desglose['por_profesor'] if fila['clave'] is not None]
+        nombres = {}
+        if profesores:
+            with get_db_cursor(commit=False) as cursor:
+                cursor.execute(
+                    "SELECT id, nombre_completo FROM usuarios WHERE id = ANY(%s)",
+                    (profesores,)
+                )
+                nombres = dict(cursor.fetchall())
+        
+        for fila in desglose['por_grupo']:
+            fila['nombre'] = grupos.get(fila['clave'], f"Grupo {fila['clave']}")
+        for fila in desglose['por_profesor']:
+            fila['nombre'] = nombres.get(fila['clave'], f"Usuario {fila['clave']}")
+        for fila in desglose['por_semana']:
+            fila['nombre'] = f"{fila['clave']['anio']}-S{fila['clave']['semana']:02d}"
+        
+        desglose['periodo'] = periodo
+        return desglose
+    
+    @staticmethod
+    def invalidar_tablero():
+        """Descartar los tableros en caché tras escribir notas"""
+        _cache_tablero.limpiar()
@@ -0,0 +1,166 @@
+# ================================================
+# EduTrack - notificaciones.py
+# Cupos de grupos en tiempo real (LISTEN/NOTIFY -> Server-Sent Events)
+# ================================================
+
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+
+import psycopg2
+from psycopg2 import sql
+
+from database import POSTGRES_CONFIG
+
+logger = logging.getLogger('edutrack.notificaciones')
+
+# Canal que usa el trigger notificar_cupo_grupo() del schema
+CANAL_CUPOS = 'cupos_grupos'
+
+# Segundos entre comentarios de latido (mantienen viva la conexión)
+SSE_LATIDO = float(os.getenv('SSE_LATIDO', '15'))
+# Eventos pendientes por navegador antes de pedirle recargar
+SSE_COLA_MAXIMA = int(os.getenv('SSE_COLA_MAXIMA', '256'))
+
+# Se envía cuando pudieron perderse avisos (reconexión o cliente lento)
+EVENTO_RECARGAR = ('recargar', {})
+
+
+class Suscriptor:
+    """Cola de eventos de un navegador conectado"""
+
+    def __init__(self, maximo=SSE_COLA_MAXIMA):
+        self.cola = queue.Queue(maxsize=maximo)
+
+    def entregar(self, evento):
+        """Encolar sin bloquear; si el cliente no alcanza, se le pide recargar"""
+        try:
+            self.cola.put_nowait(evento)
+        except queue.Full:
+            while True:
+                try:
+                    self.cola.get_nowait()
+                except queue.Empty:
+                    break
+            self.cola.put_nowait(EVENTO_RECARGAR)
+
+
+class EscuchaCupos:
+    """
+    Un hilo por proceso con una conexión dedicada en LISTEN que reparte
+    cada aviso a las colas de los suscriptores. El hilo arranca con el
+    primer suscriptor y termina cuando ya no queda ninguno.
+    """
+
+    def __init__(self, canal=CANAL_CUPOS, intervalo=5.0):
+        self.canal = canal
+        self.intervalo = intervalo
+        self._suscriptores = set()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self.avisos = 0
+        self.reconexiones = 0
+
+    def suscribir(self):
+        suscriptor = Suscriptor()
+        with self._lock:
+            self._suscriptores.add(suscriptor)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._escuchar, name='escucha-cupos', daemon=True)
+                self._hilo.start()
+        return suscriptor
+
+    def desuscribir(self, suscriptor):
+        with self._lock:
+            self._suscriptores.discard(suscriptor)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'suscriptores': len(self._suscriptores),
+                'activo': self._hilo is not None,
+                'avisos': self.avisos,
+                'reconexiones': self.reconexiones
+            }
+
+    def _publicar(self, evento):
+        with self._lock:
+            suscriptores = list(self._suscriptores)
+        for suscriptor in suscriptores:
+            suscriptor.entregar(evento)
+
+    def _sin_suscriptores(self):
+        """Terminar el hilo si nadie escucha (dentro del lock, sin carrera con suscribir)"""
+        with self._lock:
+            if not self._suscriptores:
+                self._hilo = None
+                return True
+            return False
+
+    def _escuchar(self):
+        espera = 1.0
+        primera = True
+        while True:
+            conn = None
+            try:
+                conn = psycopg2.connect(**POSTGRES_CONFIG)
+                conn.set_session(autocommit=True)
+                with conn.cursor() as cursor:
+                    cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.canal)))
+                if not primera:
+                    # Los avisos emitidos mientras no hubo conexión se perdieron
+                    self.reconexiones += 1
+                    self._publicar(EVENTO_RECARGAR)
+                primera = False
+                espera = 1.0
+
+                while True:
+                    if not select.select([conn], [], [], self.intervalo)[0]:
+                        if self._sin_suscriptores():
+                            return
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        aviso = conn.notifies.pop(0)
+                        try:
+                            datos = json.loads(aviso.payload)
+                        except ValueError:
+                            continue
+                        self.avisos += 1
+                        self._publicar(('cupo', datos))
+            except (psycopg2.Error, OSError) as e:
+                logger.warning("Error listening on '%s', retrying in %.0f s: %s",
+                               self.canal, espera, e)
+                if self._sin_suscriptores():
+                    return
+                time.sleep(espera)
+                espera = min(espera * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+
+escucha_cupos = EscuchaCupos()
+
+
+def flujo_sse(escucha=escucha_cupos, latido=SSE_LATIDO):
+    """
+    Generador de texto Server-Sent Events para una respuesta de Flask.
+    Se desuscribe al cerrarse la conexión del navegador.
+    """
+    suscriptor = escucha.suscribir()
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                tipo, datos = suscriptor.cola.get(timeout=latido)
+            except queue.Empty:
+                yield ": latido\n\n"
+                continue
+            yield f"event: {tipo}\ndata: {json.dumps(datos)}\n\n"
+    finally:
+        escucha.desuscribir(suscriptor)
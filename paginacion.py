@@ -0,0 +1,32 @@
+# ================================================
+# EduTrack - paginacion.py
+# Cursores opacos para paginación por llave (keyset)
+# ================================================
+
+import base64
+import json
+
+
+def codificar_cursor(*valores):
+    """Codificar los valores de la última fila vista en un token para URL"""
+    crudo = json.dumps([
+        v.isoformat() if hasattr(v, 'isoformat') else v for v in valores
+    ])
+    return base64.urlsafe_b64encode(crudo.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token, cantidad):
+    """
+    Decodificar un token de codificar_cursor().
+    Retorna la lista de valores o None si el token no es válido.
+    """
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(token + relleno).decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if not isinstance(valores, list) or len(valores) != cantidad:
+        return None
+    return valores
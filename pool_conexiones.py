@@ -0,0 +1,236 @@
+# ================================================
+# EduTrack - pool_conexiones.py
+# Pool de conexiones PostgreSQL seguro para hilos
+# ================================================
+
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+# Límites (ms) del histograma de tiempo de espera al obtener conexión
+LIMITES_ESPERA_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolAgotadoError(pool.PoolError):
+    """No se obtuvo una conexión libre antes del tiempo límite"""
+
+
+class PoolConexiones:
+    """
+    Pool acotado y seguro para hilos.
+    getconn() espera (con tiempo límite) cuando todas las conexiones están
+    en uso, valida las conexiones inactivas antes de entregarlas y recicla
+    las que superan su tiempo de vida máximo.
+    """
+
+    def __init__(self, minconn, maxconn, timeout=10.0, max_vida=1800.0,
+                 validar_inactiva=30.0, configurar=None, **kwargs):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise pool.PoolError("minconn/maxconn inválidos")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_vida = max_vida
+        self.validar_inactiva = validar_inactiva
+        self._configurar = configurar
+        self._kwargs = kwargs
+
+        self._cond = threading.Condition(threading.Lock())
+        self._disponibles = deque()   # (conn, creada, ultimo_uso)
+        self._en_uso = {}             # id(conn) -> creada
+        self._total = 0
+        self._esperando = 0
+        self._cerrado = False
+
+        self._stats = {
+            'entregas': 0,
+            'agotados': 0,
+            'recicladas': 0,
+            'invalidas': 0,
+            'espera_total_s': 0.0,
+        }
+        self._histograma = [0] * (len(LIMITES_ESPERA_MS) + 1)
+
+    # ------------------------------------------------
+    # Conexiones
+    # ------------------------------------------------
+    def _conectar(self):
+        """Abrir una conexión nueva y aplicar la configuración de sesión"""
+        conn = psycopg2.connect(**self._kwargs)
+        if self._configurar:
+            self._configurar(conn)
+        return conn, time.monotonic()
+
+    def _cerrar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _es_valida(self, conn):
+        """Comprobar con un SELECT 1 que la conexión sigue viva"""
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            if not conn.autocommit:
+                conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def calentar(self):
+        """Abrir minconn conexiones por adelantado"""
+        with self._cond:
+            faltantes = max(0, self.minconn - self._total)
+            self._total += faltantes
+        for i in range(faltantes):
+            try:
+                conn, creada = self._conectar()
+            except Exception:
+                # Liberar este lugar y los que no se alcanzaron a abrir
+                with self._cond:
+                    self._total -= faltantes - i
+                    self._cond.notify_all()
+                raise
+            with self._cond:
+                self._disponibles.append((conn, creada, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self, timeout=None):
+        """Obtener una conexión, esperando hasta `timeout` segundos"""
+        timeout = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        limite = inicio + timeout
+
+        with self._cond:
+            if self._cerrado:
+                raise pool.PoolError("el pool está cerrado")
+            entrada = None
+            while True:
+                if self._disponibles:
+                    entrada = self._disponibles.pop()
+                    break
+                if self._total < self.maxconn:
+                    self._total += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._stats['agotados'] += 1
+                    raise PoolAgotadoError(
+                        f"sin conexiones libres tras {timeout:.1f}s "
+                        f"({self._total}/{self.maxconn} en uso)"
+                    )
+                self._esperando += 1
+                try:
+                    self._cond.wait(restante)
+                finally:
+                    self._esperando -= 1
+                if self._cerrado:
+                    raise pool.PoolError("el pool está cerrado")
+            self._registrar_espera(time.monotonic() - inicio)
+
+        try:
+            if entrada is None:
+                conn, creada = self._conectar()
+            else:
+                conn, creada, ultimo_uso = entrada
+                ahora = time.monotonic()
+                if ahora - creada > self.max_vida:
+                    self._cerrar(conn)
+                    self._contar('recicladas')
+                    conn, creada = self._conectar()
+                elif conn.closed or (ahora - ultimo_uso > self.validar_inactiva
+                                     and not self._es_valida(conn)):
+                    self._cerrar(conn)
+                    self._contar('invalidas')
+                    conn, creada = self._conectar()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._en_uso[id(conn)] = creada
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Devolver una conexión al pool (o cerrarla si ya no sirve)"""
+        with self._cond:
+            creada = self._en_uso.pop(id(conn), None)
+        if creada is None:
+            raise pool.PoolError("conexión desconocida para este pool")
+
+        if not close and not conn.closed:
+            estado = conn.info.transaction_status
+            if estado == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif estado != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+
+        vencida = time.monotonic() - creada > self.max_vida
+        with self._cond:
+            if close or conn.closed or vencida or self._cerrado:
+                self._total -= 1
+                descartar = True
+            else:
+                self._disponibles.append((conn, creada, time.monotonic()))
+                descartar = False
+            self._cond.notify()
+
+        if descartar:
+            self._cerrar(conn)
+            if vencida:
+                self._contar('recicladas')
+
+    def closeall(self):
+        """Cerrar todas las conexiones inactivas y rechazar nuevas entregas"""
+        with self._cond:
+            self._cerrado = True
+            inactivas = [entrada[0] for entrada in self._disponibles]
+            self._total -= len(inactivas)
+            self._disponibles.clear()
+            self._cond.notify_all()
+        for conn in inactivas:
+            self._cerrar(conn)
+
+    # ------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------
+    def _contar(self, clave):
+        with self._cond:
+            self._stats[clave] += 1
+
+    def _registrar_espera(self, segundos):
+        """Se llama con el lock tomado"""
+        self._stats['entregas'] += 1
+        self._stats['espera_total_s'] += segundos
+        milisegundos = segundos * 1000
+        for i, limite in enumerate(LIMITES_ESPERA_MS):
+            if milisegundos <= limite:
+                self._histograma[i] += 1
+                return
+        self._histograma[-1] += 1
+
+    def estadisticas(self):
+        """Instantánea del estado del pool"""
+        with self._cond:
+            etiquetas = [f"<={limite}ms" for limite in LIMITES_ESPERA_MS] + ['+Inf']
+            return {
+                'minconn': self.minconn,
+                'maxconn': self.maxconn,
+                'total': self._total,
+                'en_uso': len(self._en_uso),
+                'disponibles': len(self._disponibles),
+                'esperando': self._esperando,
+                **self._stats,
+                'histograma_espera': dict(zip(etiquetas, self._histograma)),
+            }
@@ -82,6 +82,9 @@ CREATE TABLE alumnos (
 
 CREATE INDEX idx_alumnos_matricula ON alumnos(matricula);
 CREATE INDEX idx_alumnos_nombre ON alumnos(nombre);
+-- Búsqueda por prefijo (LIKE 'texto%') sin distinguir mayúsculas
+CREATE INDEX idx_alumnos_nombre_prefijo ON alumnos (lower(nombre) text_pattern_ops);
+CREATE INDEX idx_alumnos_matricula_prefijo ON alumnos (lower(matricula) text_pattern_ops);
 
 -- ================================================
 -- TABLA: grupos (con control de versión para concurrencia)
@@ -117,6 +120,9 @@ CREATE TABLE inscripciones (
 
 CREATE INDEX idx_inscripciones_alumno ON inscripciones(alumno_id);
 CREATE INDEX idx_inscripciones_grupo ON inscripciones(grupo_id);
+-- Paginación por llave del historial (fecha_inscripcion, id)
+CREATE INDEX idx_inscripciones_fecha_id ON inscripciones(fecha_inscripcion DESC, id DESC);
+CREATE INDEX idx_inscripciones_grupo_fecha_id ON inscripciones(grupo_id, fecha_inscripcion DESC, id DESC);
 
 -- ================================================
 -- TABLA: calificaciones
@@ -127,11 +133,146 @@ CREATE TABLE calificaciones (
     parcial1 NUMERIC(5,2) CHECK (parcial1 IS NULL OR (parcial1 >= 0 AND parcial1 <= 100)),
     parcial2 NUMERIC(5,2) CHECK (parcial2 IS NULL OR (parcial2 >= 0 AND parcial2 <= 100)),
     final NUMERIC(5,2) CHECK (final IS NULL OR (final >= 0 AND final <= 100)),
+    -- Promedio de los tres (o de los dos parciales si aún no hay final)
+    promedio NUMERIC(5,2) GENERATED ALWAYS AS (
+        CASE
+            WHEN parcial1 IS NOT NULL AND parcial2 IS NOT NULL AND final IS NOT NULL
+                THEN ROUND((parcial1 + parcial2 + final) / 3, 2)
+            WHEN parcial1 IS NOT NULL AND parcial2 IS NOT NULL
+                THEN ROUND((parcial1 + parcial2) / 2, 2)
+        END
+    ) STORED,
     fecha_modificacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_calificaciones_inscripcion ON calificaciones(inscripcion_id);
 
+-- ================================================
+-- TABLA: estadisticas_grupo (agregados de calificaciones por grupo)
+-- Aprobatoria: 70
+-- ================================================
+CREATE TABLE estadisticas_grupo (
+    grupo_id INTEGER PRIMARY KEY REFERENCES grupos(id) ON DELETE CASCADE,
+    inscritos INTEGER NOT NULL DEFAULT 0,
+    con_promedio INTEGER NOT NULL DEFAULT 0,
+    media NUMERIC(5,2),
+    desviacion NUMERIC(5,2),
+    minimo NUMERIC(5,2),
+    percentil_25 NUMERIC(5,2),
+    mediana NUMERIC(5,2),
+    percentil_75 NUMERIC(5,2),
+    maximo NUMERIC(5,2),
+    aprobados INTEGER NOT NULL DEFAULT 0,
+    reprobados INTEGER NOT NULL DEFAULT 0,
+    aprobados_parcial1 INTEGER NOT NULL DEFAULT 0,
+    reprobados_parcial1 INTEGER NOT NULL DEFAULT 0,
+    aprobados_parcial2 INTEGER NOT NULL DEFAULT 0,
+    reprobados_parcial2 INTEGER NOT NULL DEFAULT 0,
+    aprobados_final INTEGER NOT NULL DEFAULT 0,
+    reprobados_final INTEGER NOT NULL DEFAULT 0,
+    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION recalcular_estadisticas_grupo(p_grupos INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    -- Un recálculo a la vez por grupo (en orden, sin interbloqueos): la
+    -- siguiente sentencia toma un snapshot nuevo y ve las filas de la
+    -- transacción que tenía el lock, que ya confirmó
+    PERFORM pg_advisory_xact_lock('estadisticas_grupo'::regclass::oid::integer, g)
+    FROM (SELECT DISTINCT unnest(p_grupos) AS g ORDER BY 1) AS bloqueos;
+
+    INSERT INTO estadisticas_grupo AS e (
+        grupo_id, inscritos, con_promedio, media, desviacion, minimo,
+        percentil_25, mediana, percentil_75, maximo, aprobados, reprobados,
+        aprobados_parcial1, reprobados_parcial1, aprobados_parcial2,
+        reprobados_parcial2, aprobados_final, reprobados_final, fecha_actualizacion
+    )
+    SELECT gr.id,
+           COUNT(i.id),
+           COUNT(c.promedio),
+           ROUND(AVG(c.promedio), 2),
+           ROUND(STDDEV_SAMP(c.promedio), 2),
+           MIN(c.promedio),
+           ROUND(PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY c.promedio)::NUMERIC, 2),
+           ROUND(PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY c.promedio)::NUMERIC, 2),
+           ROUND(PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY c.promedio)::NUMERIC, 2),
+           MAX(c.promedio),
+           COUNT(*) FILTER (WHERE c.promedio >= 70),
+           COUNT(*) FILTER (WHERE c.promedio < 70),
+           COUNT(*) FILTER (WHERE c.parcial1 >= 70),
+           COUNT(*) FILTER (WHERE c.parcial1 < 70),
+           COUNT(*) FILTER (WHERE c.parcial2 >= 70),
+           COUNT(*) FILTER (WHERE c.parcial2 < 70),
+           COUNT(*) FILTER (WHERE c.final >= 70),
+           COUNT(*) FILTER (WHERE c.final < 70),
+           CURRENT_TIMESTAMP
+    FROM grupos gr
+    LEFT JOIN inscripciones i ON i.grupo_id = gr.id
+    LEFT JOIN calificaciones c ON c.inscripcion_id = i.id
+    WHERE gr.id = ANY(p_grupos)
+    GROUP BY gr.id
+    ON CONFLICT (grupo_id) DO UPDATE SET
+        inscritos = EXCLUDED.inscritos,
+        con_promedio = EXCLUDED.con_promedio,
+        media = EXCLUDED.media,
+        desviacion = EXCLUDED.desviacion,
+        minimo = EXCLUDED.minimo,
+        percentil_25 = EXCLUDED.percentil_25,
+        mediana = EXCLUDED.mediana,
+        percentil_75 = EXCLUDED.percentil_75,
+        maximo = EXCLUDED.maximo,
+        aprobados = EXCLUDED.aprobados,
+        reprobados = EXCLUDED.reprobados,
+        aprobados_parcial1 = EXCLUDED.aprobados_parcial1,
+        reprobados_parcial1 = EXCLUDED.reprobados_parcial1,
+        aprobados_parcial2 = EXCLUDED.aprobados_parcial2,
+        reprobados_parcial2 = EXCLUDED.reprobados_parcial2,
+        aprobados_final = EXCLUDED.aprobados_final,
+        reprobados_final = EXCLUDED.reprobados_final,
+        fecha_actualizacion = EXCLUDED.fecha_actualizacion;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recalcular solo los grupos tocados por la sentencia. Corre con los
+-- privilegios del dueño: quien inscribe o califica no escribe estadisticas_grupo
+CREATE OR REPLACE FUNCTION actualizar_estadisticas_grupo()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'inscripciones' AND TG_OP = 'INSERT' THEN
+        -- Un alta sólo cambia inscritos (sus calificaciones nacen vacías):
+        -- sumar sin recalcular. El lock compartido no frena otras altas, pero
+        -- espera a un recálculo en curso y hace que el siguiente vea esta fila
+        PERFORM pg_advisory_xact_lock_shared('estadisticas_grupo'::regclass::oid::integer, g)
+        FROM (SELECT DISTINCT grupo_id AS g FROM nuevas ORDER BY 1) AS bloqueos;
+
+        INSERT INTO estadisticas_grupo AS e (grupo_id, inscritos)
+        SELECT grupo_id, COUNT(*) FROM nuevas GROUP BY grupo_id
+        ON CONFLICT (grupo_id) DO UPDATE SET
+            inscritos = e.inscritos + EXCLUDED.inscritos,
+            fecha_actualizacion = CURRENT_TIMESTAMP;
+    ELSIF TG_TABLE_NAME = 'inscripciones' THEN
+        PERFORM recalcular_estadisticas_grupo(ARRAY(SELECT DISTINCT grupo_id FROM viejas));
+    ELSE
+        PERFORM recalcular_estadisticas_grupo(ARRAY(
+            SELECT DISTINCT i.grupo_id
+            FROM nuevas n JOIN inscripciones i ON i.id = n.inscripcion_id
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER trigger_calificaciones_estadisticas AFTER UPDATE ON calificaciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION actualizar_estadisticas_grupo();
+CREATE TRIGGER trigger_inscripciones_estadisticas AFTER DELETE ON inscripciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION actualizar_estadisticas_grupo();
+CREATE TRIGGER trigger_inscripciones_estadisticas_alta AFTER INSERT ON inscripciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION actualizar_estadisticas_grupo();
+
 -- ================================================
 -- FUNCIÓN: Actualizar timestamp automáticamente
 -- ================================================
@@ -151,28 +292,304 @@ CREATE TRIGGER trigger_grupos_timestamp
     BEFORE UPDATE ON grupos
     FOR EACH ROW EXECUTE FUNCTION actualizar_timestamp();
 
+-- ================================================
+-- TABLA: estadisticas_conteos (totales del dashboard)
+-- Repartida en fragmentos por backend para no crear una fila caliente
+-- ================================================
+CREATE TABLE estadisticas_conteos (
+    clave VARCHAR(40) NOT NULL,
+    fragmento SMALLINT NOT NULL,
+    valor BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (clave, fragmento)
+);
+
+CREATE OR REPLACE FUNCTION estadisticas_sumar(p_clave TEXT, p_delta BIGINT)
+RETURNS VOID AS $$
+BEGIN
+    IF p_delta <> 0 THEN
+        INSERT INTO estadisticas_conteos (clave, fragmento, valor)
+        VALUES (p_clave, pg_backend_pid() % 16, p_delta)
+        ON CONFLICT (clave, fragmento)
+        DO UPDATE SET valor = estadisticas_conteos.valor + EXCLUDED.valor;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Los triggers corren con los privilegios del dueño del esquema: los roles
+-- que inscriben no tienen permisos de escritura sobre estadisticas_conteos
+CREATE OR REPLACE FUNCTION contar_altas()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM estadisticas_sumar(TG_ARGV[0], (SELECT COUNT(*) FROM nuevas));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION contar_bajas()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM estadisticas_sumar(TG_ARGV[0], -(SELECT COUNT(*) FROM viejas));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION contar_inscripciones_activas()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        delta := delta + (SELECT COUNT(*) FROM nuevas WHERE estado = 'activa');
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        delta := delta - (SELECT COUNT(*) FROM viejas WHERE estado = 'activa');
+    END IF;
+    PERFORM estadisticas_sumar('inscripciones_activas', delta);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE TRIGGER trigger_materias_altas AFTER INSERT ON materias
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_altas('materias');
+CREATE TRIGGER trigger_materias_bajas AFTER DELETE ON materias
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_bajas('materias');
+
+CREATE TRIGGER trigger_grupos_altas AFTER INSERT ON grupos
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_altas('grupos');
+CREATE TRIGGER trigger_grupos_bajas AFTER DELETE ON grupos
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_bajas('grupos');
+
+CREATE TRIGGER trigger_alumnos_altas AFTER INSERT ON alumnos
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_altas('alumnos');
+CREATE TRIGGER trigger_alumnos_bajas AFTER DELETE ON alumnos
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_bajas('alumnos');
+
+CREATE TRIGGER trigger_inscripciones_altas AFTER INSERT ON inscripciones
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_inscripciones_activas();
+CREATE TRIGGER trigger_inscripciones_bajas AFTER DELETE ON inscripciones
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_inscripciones_activas();
+CREATE TRIGGER trigger_inscripciones_estado AFTER UPDATE ON inscripciones
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION contar_inscripciones_activas();
+
+-- Reconstruir los contadores a partir de las tablas (bases existentes)
+CREATE OR REPLACE FUNCTION recalcular_estadisticas_conteos()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM estadisticas_conteos;
+    INSERT INTO estadisticas_conteos (clave, fragmento, valor) VALUES
+        ('materias', 0, (SELECT COUNT(*) FROM materias)),
+        ('grupos', 0, (SELECT COUNT(*) FROM grupos)),
+        ('alumnos', 0, (SELECT COUNT(*) FROM alumnos)),
+        ('inscripciones_activas', 0,
+         (SELECT COUNT(*) FROM inscripciones WHERE estado = 'activa'));
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT recalcular_estadisticas_conteos();
+SELECT recalcular_estadisticas_grupo(ARRAY(SELECT id FROM grupos));
+
+-- ================================================
+-- TABLA: catalogo_versiones (invalidación de catálogos en caché)
+-- Cambia con altas, bajas y cambios de estructura, no con los cupos
+-- ================================================
+CREATE TABLE catalogo_versiones (
+    catalogo VARCHAR(30) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO catalogo_versiones (catalogo) VALUES ('grupos'), ('alumnos'), ('profesores');
+
+CREATE OR REPLACE FUNCTION incrementar_version_catalogo()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE catalogo_versiones SET version = version + 1
+    WHERE catalogo = ANY(TG_ARGV);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_version_alumnos AFTER INSERT OR UPDATE OR DELETE ON alumnos
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_catalogo('alumnos');
+CREATE TRIGGER trigger_version_profesores AFTER INSERT OR UPDATE OR DELETE ON profesores
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_catalogo('profesores', 'grupos');
+CREATE TRIGGER trigger_version_materias AFTER INSERT OR UPDATE OR DELETE ON materias
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_catalogo('grupos');
+CREATE TRIGGER trigger_version_grupos_altas AFTER INSERT OR DELETE ON grupos
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_catalogo('grupos');
+CREATE TRIGGER trigger_version_grupos_cambios
+    AFTER UPDATE OF materia_id, profesor_id, periodo, cupo_maximo ON grupos
+    FOR EACH STATEMENT EXECUTE FUNCTION incrementar_version_catalogo('grupos');
+
+-- ================================================
+-- TABLA: grupos_catalogo (disponibilidad desnormalizada)
+-- Modelo de lectura del catálogo de grupos, mantenido por triggers.
+-- El orden lo pide cada consulta; los índices cubren los órdenes usados.
+-- ================================================
+CREATE TABLE grupos_catalogo (
+    grupo_id INTEGER PRIMARY KEY REFERENCES grupos(id) ON DELETE CASCADE,
+    materia_id INTEGER NOT NULL,
+    profesor_id INTEGER,
+    materia VARCHAR(100) NOT NULL,
+    profesor VARCHAR(100),
+    periodo VARCHAR(20) NOT NULL,
+    cupo_maximo INTEGER NOT NULL,
+    inscritos_count INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    cupos_disponibles INTEGER GENERATED ALWAYS AS (cupo_maximo - inscritos_count) STORED,
+    estado_cupo VARCHAR(12) GENERATED ALWAYS AS (
+        CASE
+            WHEN inscritos_count >= cupo_maximo THEN 'lleno'
+            WHEN cupo_maximo - inscritos_count <= 5 THEN 'casi_lleno'
+            ELSE 'disponible'
+        END
+    ) STORED
+);
+
+CREATE INDEX idx_grupos_catalogo_orden ON grupos_catalogo(materia, periodo, grupo_id);
+CREATE INDEX idx_grupos_catalogo_periodo ON grupos_catalogo(periodo, materia, grupo_id);
+CREATE INDEX idx_grupos_catalogo_materia ON grupos_catalogo(materia_id);
+CREATE INDEX idx_grupos_catalogo_profesor ON grupos_catalogo(profesor_id);
+
+-- Alta o cambio de un grupo. Los cambios de cupo (inscripciones) solo
+-- actualizan los contadores, sin volver a unir materias y profesores.
+-- Las funciones de estos triggers corren con los privilegios del dueño:
+-- quien inscribe actualiza grupos pero no escribe grupos_catalogo.
+CREATE OR REPLACE FUNCTION sincronizar_grupos_catalogo()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.materia_id = OLD.materia_id
+       AND NEW.profesor_id IS NOT DISTINCT FROM OLD.profesor_id
+       AND NEW.periodo = OLD.periodo THEN
+        UPDATE grupos_catalogo
+        SET cupo_maximo = NEW.cupo_maximo,
+            inscritos_count = NEW.inscritos_count,
+            version = NEW.version
+        WHERE grupo_id = NEW.id;
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO grupos_catalogo (grupo_id, materia_id, profesor_id, materia, profesor,
+                                 periodo, cupo_maximo, inscritos_count, version)
+    SELECT NEW.id, NEW.materia_id, NEW.profesor_id, m.nombre, p.nombre,
+           NEW.periodo, NEW.cupo_maximo, NEW.inscritos_count, NEW.version
+    FROM materias m
+    LEFT JOIN profesores p ON p.id = NEW.profesor_id
+    WHERE m.id = NEW.materia_id
+    ON CONFLICT (grupo_id) DO UPDATE
+    SET materia_id = EXCLUDED.materia_id,
+        profesor_id = EXCLUDED.profesor_id,
+        materia = EXCLUDED.materia,
+        profesor = EXCLUDED.profesor,
+        periodo = EXCLUDED.periodo,
+        cupo_maximo = EXCLUDED.cupo_maximo,
+        inscritos_count = EXCLUDED.inscritos_count,
+        version = EXCLUDED.version;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION renombrar_materia_catalogo()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE grupos_catalogo c SET materia = n.nombre
+    FROM nuevas n
+    WHERE c.materia_id = n.id AND c.materia IS DISTINCT FROM n.nombre;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION renombrar_profesor_catalogo()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE grupos_catalogo c SET profesor = n.nombre
+    FROM nuevas n
+    WHERE c.profesor_id = n.id AND c.profesor IS DISTINCT FROM n.nombre;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+-- Las bajas de grupos se propagan por ON DELETE CASCADE
+CREATE TRIGGER trigger_grupos_catalogo AFTER INSERT OR UPDATE ON grupos
+    FOR EACH ROW EXECUTE FUNCTION sincronizar_grupos_catalogo();
+CREATE TRIGGER trigger_materias_catalogo AFTER UPDATE ON materias
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION renombrar_materia_catalogo();
+CREATE TRIGGER trigger_profesores_catalogo AFTER UPDATE ON profesores
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION renombrar_profesor_catalogo();
+
+-- Aviso de cupo para las páginas abiertas (notificaciones.py escucha el canal).
+-- NOTIFY se entrega al confirmar la transacción.
+CREATE OR REPLACE FUNCTION notificar_cupo_grupo()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.inscritos_count IS DISTINCT FROM OLD.inscritos_count
+       OR NEW.version IS DISTINCT FROM OLD.version
+       OR NEW.cupo_maximo IS DISTINCT FROM OLD.cupo_maximo THEN
+        PERFORM pg_notify('cupos_grupos', json_build_object(
+            'grupo_id', NEW.id,
+            'inscritos', NEW.inscritos_count,
+            'cupo_maximo', NEW.cupo_maximo,
+            'disponibles', NEW.cupo_maximo - NEW.inscritos_count,
+            'version', NEW.version,
+            'estado', CASE
+                WHEN NEW.inscritos_count >= NEW.cupo_maximo THEN 'lleno'
+                WHEN NEW.cupo_maximo - NEW.inscritos_count <= 5 THEN 'casi_lleno'
+                ELSE 'disponible'
+            END
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_grupos_notificar_cupo
+    AFTER UPDATE OF inscritos_count, version, cupo_maximo ON grupos
+    FOR EACH ROW EXECUTE FUNCTION notificar_cupo_grupo();
+
+-- Reconstruir el catálogo a partir de las tablas (bases existentes, cargas masivas)
+CREATE OR REPLACE FUNCTION recalcular_grupos_catalogo()
+RETURNS VOID AS $$
+BEGIN
+    DELETE FROM grupos_catalogo;
+    INSERT INTO grupos_catalogo (grupo_id, materia_id, profesor_id, materia, profesor,
+                                 periodo, cupo_maximo, inscritos_count, version)
+    SELECT g.id, g.materia_id, g.profesor_id, m.nombre, p.nombre,
+           g.periodo, g.cupo_maximo, g.inscritos_count, g.version
+    FROM grupos g
+    JOIN materias m ON g.materia_id = m.id
+    LEFT JOIN profesores p ON g.profesor_id = p.id;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT recalcular_grupos_catalogo();
+
 -- ================================================
 -- VISTA: Grupos con disponibilidad
+-- Sobre grupos_catalogo; sin ORDER BY (lo decide cada consulta)
 -- ================================================
 CREATE VIEW vista_grupos_disponibles AS
 SELECT
-    g.id AS grupo_id,
-    m.nombre AS materia,
-    p.nombre AS profesor,
-    g.periodo,
-    g.cupo_maximo,
-    g.inscritos_count,
-    g.cupo_maximo - g.inscritos_count AS cupos_disponibles,
-    g.version,
-    CASE
-        WHEN g.inscritos_count >= g.cupo_maximo THEN 'lleno'
-        WHEN g.cupo_maximo - g.inscritos_count <= 5 THEN 'casi_lleno'
-        ELSE 'disponible'
-    END AS estado_cupo
-FROM grupos g
-JOIN materias m ON g.materia_id = m.id
-LEFT JOIN profesores p ON g.profesor_id = p.id
-ORDER BY m.nombre, g.periodo;
+    grupo_id,
+    materia,
+    profesor,
+    periodo,
+    cupo_maximo,
+    inscritos_count,
+    cupos_disponibles,
+    version,
+    estado_cupo
+FROM grupos_catalogo;
 
 -- ================================================
 -- PRIVILEGIOS POR ROL
@@ -191,6 +608,12 @@ GRANT UPDATE ON calificaciones TO teacher_role;
 
 GRANT SELECT ON materias, grupos, inscripciones, calificaciones TO student_role;
 
+-- Tablas derivadas: sólo las escriben los triggers (SECURITY DEFINER)
+REVOKE EXECUTE ON FUNCTION estadisticas_sumar(TEXT, BIGINT), recalcular_estadisticas_conteos()
+    FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION recalcular_estadisticas_grupo(INTEGER[]) FROM PUBLIC;
+REVOKE EXECUTE ON FUNCTION recalcular_grupos_catalogo() FROM PUBLIC;
+
 -- ================================================
 -- LOGINS
 -- ================================================
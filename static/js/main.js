@@ -66,3 +66,60 @@ function hideLoading() {
         overlay.remove();
     }
 }
+
+// Búsqueda de alumnos por nombre o matrícula (/api/alumnos/buscar).
+// <input data-buscar-alumnos="id_del_campo_oculto"> guarda el id elegido
+// en el campo oculto y dispara 'change' sobre él.
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('[data-buscar-alumnos]').forEach(function(input) {
+        const oculto = document.getElementById(input.dataset.buscarAlumnos);
+        const lista = document.createElement('div');
+        lista.className = 'list-group position-absolute w-100 shadow-sm d-none';
+        lista.style.zIndex = 1000;
+        input.parentNode.appendChild(lista);
+        let temporizador = null;
+        let consulta = 0;
+
+        function elegir(alumno) {
+            input.value = alumno.matricula + ' - ' + alumno.nombre;
+            oculto.value = alumno.id;
+            input.setCustomValidity('');
+            lista.classList.add('d-none');
+            oculto.dispatchEvent(new Event('change'));
+        }
+
+        input.addEventListener('input', function() {
+            oculto.value = '';
+            input.setCustomValidity('Seleccione un alumno de la lista');
+            oculto.dispatchEvent(new Event('change'));
+            clearTimeout(temporizador);
+            const texto = input.value.trim();
+            if (texto.length < 2) {
+                lista.classList.add('d-none');
+                return;
+            }
+            temporizador = setTimeout(function() {
+                const numero = ++consulta;
+                fetch('/api/alumnos/buscar?q=' + encodeURIComponent(texto))
+                    .then(function(respuesta) { return respuesta.json(); })
+                    .then(function(alumnos) {
+                        if (numero !== consulta) return;
+                        lista.innerHTML = '';
+                        alumnos.forEach(function(alumno) {
+                            const opcion = document.createElement('button');
+                            opcion.type = 'button';
+                            opcion.className = 'list-group-item list-group-item-action';
+                            opcion.textContent = alumno.matricula + ' - ' + alumno.nombre;
+                            opcion.addEventListener('click', function() { elegir(alumno); });
+                            lista.appendChild(opcion);
+                        });
+                        lista.classList.toggle('d-none', alumnos.length === 0);
+                    });
+            }, 250);
+        });
+
+        input.addEventListener('blur', function() {
+            setTimeout(function() { lista.classList.add('d-none'); }, 200);
+        });
+    });
+});